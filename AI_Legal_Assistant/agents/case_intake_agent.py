@@ -1,10 +1,11 @@
 # case_intake_agent.py
 
-from crewai import Agent, LLM
+from crewai import Agent
+from pipeline.rate_limit import RateLimitedLLM
 
 
 # agent specific LLM - can also be configured din .env file
-llm = LLM(
+llm = RateLimitedLLM(
     model="groq/gemma2-9b-it",
     temperature=0
 )
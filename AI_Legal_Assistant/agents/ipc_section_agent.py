@@ -1,9 +1,10 @@
 # ipc_section_agent.py
 
-from crewai import Agent, LLM
+from crewai import Agent
+from pipeline.rate_limit import RateLimitedLLM
 from tools.ipc_sections_search_tool import search_ipc_sections
 
-llm = LLM(model="groq/gemma2-9b-it", temperature=0.3)
+llm = RateLimitedLLM(model="groq/gemma2-9b-it", temperature=0.3)
 
 ipc_section_agent = Agent(
     role="IPC Section Agent",
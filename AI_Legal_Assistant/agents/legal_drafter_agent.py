@@ -1,8 +1,9 @@
 # legal_drafter_agent.py
 
-from crewai import Agent, LLM
+from crewai import Agent
+from pipeline.rate_limit import RateLimitedLLM
 
-llm = LLM(model="groq/gemma2-9b-it", temperature=0.4)
+llm = RateLimitedLLM(model="groq/gemma2-9b-it", temperature=0.4)
 
 legal_drafter_agent = Agent(
     role="Legal Document Drafting Agent",
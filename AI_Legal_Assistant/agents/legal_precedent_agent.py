@@ -1,9 +1,10 @@
 # legal_precedent_agent.py
 
-from crewai import Agent, LLM
+from crewai import Agent
+from pipeline.rate_limit import RateLimitedLLM
 from tools.legal_precedent_search_tool import search_legal_precedents
 
-llm = LLM(model="groq/gemma2-9b-it", temperature=0)
+llm = RateLimitedLLM(model="groq/gemma2-9b-it", temperature=0)
 
 legal_precedent_agent = Agent(
     role="Legal Precedent Agent",
@@ -2,14 +2,30 @@
 
 import streamlit as st
 from dotenv import load_dotenv
-from crew import legal_assistant_crew
+from pipeline.job_client import JobServiceError, job_service_url
+from pipeline.startup import is_ready, load_pipeline, start_warmup, timings, warmup_error
 
 # Load environment variables
 load_dotenv()
 
+# With LEGAL_JOB_SERVICE_URL set the app is a thin client of job_service.py, which
+# owns the crew and the warm retrieval stack. Otherwise crewAI, the agents and the
+# IPC search stack are imported and warmed in a background thread (once per process)
+# so the page renders immediately; the Prometheus-style /metrics endpoint is started
+# there too (only when LEGAL_METRICS_PORT is set)
+if not job_service_url():
+    start_warmup()
+
 # Streamlit page setup
 st.set_page_config(page_title="AI Legal Assistant", page_icon="⚖️", layout="wide")
 
+# Intermediate stages shown as soon as each agent finishes (keyed by agent role)
+STAGE_TITLES = {
+    "Case Intake Agent": "🧾 Case Intake Summary",
+    "IPC Section Agent": "📜 Applicable IPC Sections",
+    "Legal Precedent Agent": "📚 Relevant Legal Precedents",
+}
+
 # ------------------------------
 # Session state for API key validation
 # ------------------------------
@@ -18,6 +34,14 @@ if "api_keys_valid" not in st.session_state:
 
 # Sidebar: API key inputs
 st.sidebar.title("🔑 API Key Validation")
+if job_service_url():
+    st.sidebar.caption(f"🛰️ Cases run by the job service at {job_service_url()}")
+elif warmup_error() is not None:
+    st.sidebar.error(f"❌ Loading legal models failed: {warmup_error()}")
+elif is_ready():
+    st.sidebar.caption(f"✅ Legal models loaded in {sum(timings.values()):.1f}s")
+else:
+    st.sidebar.caption("⏳ Loading legal models in the background...")
 
 def validate_keys():
     groq = st.session_state.groq_api_key
@@ -86,34 +110,78 @@ if st.session_state.api_keys_valid:
         if not user_input.strip():
             st.warning("⚠️ Please enter your incident details to analyze.")
         else:
-            with st.spinner("🔎 Analyzing your case and preparing legal output..."):
-
-                # Prepare all user details
-                inputs_dict = {
-                    "user_name": user_name,
-                    "incident_date": str(incident_date),
-                    "incident_time": str(incident_time),
-                    "user_address": user_address,
-                    "police_station_name": police_station_name,
-                    "police_station_address": police_station_address,
-                    "phone_number": phone_number,
-                    "email": email,
-                    "user_input": user_input,
-                    "groq_api_key": st.session_state.groq_api_key,
-                    "tavily_api_key": st.session_state.tavily_api_key,
-                }
-
-                # Kickoff the crew with all inputs
-                result = legal_assistant_crew.kickoff(inputs=inputs_dict)
-
-            st.success("✅ Legal Assistant completed the workflow!")
+            # Prepare all user details
+            inputs_dict = {
+                "user_name": user_name,
+                "incident_date": str(incident_date),
+                "incident_time": str(incident_time),
+                "user_address": user_address,
+                "police_station_name": police_station_name,
+                "police_station_address": police_station_address,
+                "phone_number": phone_number,
+                "email": email,
+                "user_input": user_input,
+                "groq_api_key": st.session_state.groq_api_key,
+                "tavily_api_key": st.session_state.tavily_api_key,
+            }
+
+            status = st.status("🔎 Analyzing your case and preparing legal output...", expanded=True)
+            stages_area = st.container()
+            st.subheader("📄 Final Legal Complaint")
+            complaint_placeholder = st.empty()
+
+            # Run the crew (in-process or in the job service) and render each stage as soon as it is produced
+            pipeline = load_pipeline()
+            complaint = ""
+            result = None
+            summary = None
+            failure = None
+            try:
+                for kind, payload in pipeline.run_case(inputs_dict):
+                    if kind == "cached_intake":
+                        # Same incident text seen before: intake is skipped and its cached output reused
+                        status.write("♻️ Case Intake Agent served from cache")
+                        with stages_area.expander(STAGE_TITLES[payload.agent], expanded=True):
+                            st.markdown(payload.raw)
+                    elif kind == "task":
+                        status.write(f"✅ {payload.agent} finished")
+                        if payload.agent in STAGE_TITLES:
+                            with stages_area.expander(STAGE_TITLES[payload.agent], expanded=True):
+                                st.markdown(payload.raw)
+                    elif kind == "token":
+                        # Drafter output streams token by token
+                        complaint += payload
+                        complaint_placeholder.markdown(complaint + "▌")
+                    elif kind == "result":
+                        result = payload
+                    else:
+                        summary = payload
+            except JobServiceError as error:
+                failure = str(error)
+
+            if result is None:
+                # The job service failed the job, became unreachable or ended the stream without a result
+                status.update(label="❌ Legal Assistant could not finish the workflow", state="error", expanded=True)
+                st.error(f"❌ {failure or 'The job ended without a final complaint.'} Please try again.")
+                st.stop()
+
+            status.update(label="✅ Legal Assistant completed the workflow!", state="complete", expanded=False)
 
             # Display the final output
-            st.subheader("📄 Final Legal Complaint")
-            if isinstance(result, str):
-                st.markdown(result)
-            else:
-                st.json(result)
+            complaint_placeholder.markdown(result.raw)
+
+            # Where the time and tokens went in this run
+            if summary is not None:
+                with st.expander(f"⏱️ Pipeline metrics ({summary['wall_seconds']:.1f}s total)"):
+                    st.table([{"stage": name, **stage} for name, stage in summary["stages"].items()])
+                    if summary["tools"]:
+                        st.table([{"tool": name, **tool} for name, tool in summary["tools"].items()])
+                    intake_stats = summary.get("intake_cache")
+                    if intake_stats is not None:
+                        st.caption(
+                            f"🗃️ Intake cache: {intake_stats['hit_rate']:.0%} hit rate this session, "
+                            f"{intake_stats['lifetime_seconds_saved']:.1f}s of intake time saved overall"
+                        )
 
 else:
     st.warning("Enter valid Groq and Tavily API keys in the sidebar to access the assistant.")
@@ -0,0 +1,234 @@
+# batch_runner.py
+#
+# Run a backlog of incident reports through the legal crew without the Streamlit UI.
+#
+#   python batch_runner.py cases.jsonl results.jsonl --concurrency 4
+#
+# Each input record (JSON Lines or CSV) carries the same fields as the app's
+# `inputs_dict`. Results are appended to the output JSONL as each case finishes;
+# rerunning the same command skips every record already completed there.
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from pipeline.instrumentation import track_crew_run
+from pipeline.intake_cache import build_crew_for_case, get_intake_cache
+
+
+load_dotenv()
+
+INPUT_FIELDS = (
+    "user_name",
+    "incident_date",
+    "incident_time",
+    "user_address",
+    "police_station_name",
+    "police_station_address",
+    "phone_number",
+    "email",
+    "user_input",
+)
+
+
+def load_records(path: str) -> list[dict]:
+    """
+    Read incident records from a JSON Lines or CSV file.
+
+    Args:
+        path (str): `.jsonl` / `.json` (one object per line) or `.csv` (header row with the field names).
+
+    Returns:
+        list[dict]: Records in file order.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if path.lower().endswith(".csv"):
+            return [dict(row) for row in csv.DictReader(file)]
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def record_id(record: dict) -> str:
+    """
+    Stable identifier of a record, used to resume a batch.
+
+    Args:
+        record (dict): Incident record.
+
+    Returns:
+        str: The record's own `id` field, or a hash of its input fields.
+    """
+    if record.get("id"):
+        return str(record["id"])
+    payload = json.dumps([str(record.get(field, "")) for field in INPUT_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def build_inputs(record: dict) -> dict:
+    """
+    Map a record to crew inputs, filling API keys from the environment like the app's sidebar does.
+
+    Args:
+        record (dict): Incident record.
+
+    Returns:
+        dict: Crew inputs.
+    """
+    missing = [field for field in INPUT_FIELDS if not str(record.get(field, "")).strip()]
+    if missing:
+        raise ValueError(f"❌ Missing fields: {', '.join(missing)}")
+
+    inputs = {field: str(record[field]) for field in INPUT_FIELDS}
+    inputs["groq_api_key"] = record.get("groq_api_key") or os.getenv("GROQ_API_KEY", "")
+    inputs["tavily_api_key"] = record.get("tavily_api_key") or os.getenv("TAVILY_API_KEY", "")
+    return inputs
+
+
+def completed_ids(output_path: str, include_failed: bool = False) -> set[str]:
+    """
+    Ids of records that already have a result in the output file.
+
+    A partially written last line (e.g. after a crash) is ignored, so that record runs again.
+
+    Args:
+        output_path (str): Results JSONL.
+        include_failed (bool): Also count records whose result was an error.
+
+    Returns:
+        set[str]: Completed record ids.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if include_failed or result.get("status") == "ok":
+                done.add(result["id"])
+    return done
+
+
+def run_record(record: dict) -> dict:
+    """
+    Run one incident record through a fresh copy of the crew.
+
+    Args:
+        record (dict): Incident record.
+
+    Returns:
+        dict: Result line with status, per-stage outputs, final complaint, pipeline metrics and wall time.
+    """
+    start = time.perf_counter()
+    result = {"id": record_id(record)}
+    try:
+        inputs = build_inputs(record)
+    except ValueError as error:
+        result.update({"status": "error", "error": f"{type(error).__name__}: {error}", "seconds": 0.0})
+        return result
+
+    run_metrics = None
+    try:
+        # Inside the try: an intake cache or crew setup failure only fails this record
+        crew, cached_intake = build_crew_for_case(inputs)
+        with track_crew_run(crew, run_id=result["id"]) as run_metrics:
+            crew_output = crew.kickoff(inputs=inputs)
+        task_outputs = ([cached_intake] if cached_intake is not None else []) + crew_output.tasks_output
+        result.update({
+            "status": "ok",
+            "stages": {task_output.agent: task_output.raw for task_output in task_outputs},
+            "complaint": crew_output.raw,
+            "intake_cached": cached_intake is not None,
+        })
+    except Exception as error:
+        result.update({"status": "error", "error": f"{type(error).__name__}: {error}"})
+    if run_metrics is not None:
+        result["metrics"] = run_metrics.summary()
+
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def run_batch(input_path: str, output_path: str, concurrency: int = 2, retry_failed: bool = True) -> dict:
+    """
+    Process every pending record with at most `concurrency` crews running at once.
+
+    Results are appended and flushed to `output_path` in completion order, so a
+    crash loses at most the cases still in flight.
+
+    Args:
+        input_path (str): Incident records (JSONL or CSV).
+        output_path (str): Results JSONL, appended to.
+        concurrency (int): Maximum number of concurrent crew runs.
+        retry_failed (bool): Rerun records whose previous result was an error.
+
+    Returns:
+        dict: Counts of processed, skipped, succeeded and failed records and total wall time.
+    """
+    records = load_records(input_path)
+    done = completed_ids(output_path, include_failed=not retry_failed)
+
+    pending, seen = [], set(done)
+    for record in records:
+        rid = record_id(record)
+        if rid not in seen:
+            seen.add(rid)
+            pending.append(record)
+
+    summary = {"records": len(records), "skipped": len(records) - len(pending), "ok": 0, "error": 0}
+    print(f"📂 {len(records)} records, {summary['skipped']} already done, {len(pending)} to run (concurrency {concurrency})")
+
+    start = time.perf_counter()
+    with open(output_path, "a+", encoding="utf-8") as output, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Terminate a line left half-written by a crash so new results start on their own line
+        if output.tell() > 0:
+            output.seek(output.tell() - 1)
+            if output.read(1) != "\n":
+                output.write("\n")
+
+        futures = [pool.submit(run_record, record) for record in pending]
+        # Only this thread writes, in completion order; workers just return their result
+        for finished, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            os.fsync(output.fileno())
+
+            summary[result["status"]] += 1
+            icon = "✅" if result["status"] == "ok" else "❌"
+            print(f"{icon} [{finished}/{len(pending)}] {result['id']} in {result['seconds']:.1f}s")
+
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    intake_cache = get_intake_cache()
+    if intake_cache is not None:
+        summary["intake_cache"] = intake_cache.stats()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run incident records through the legal assistant crew.")
+    parser.add_argument("input", help="Incident records (.jsonl or .csv).")
+    parser.add_argument("output", help="Results file (.jsonl), appended to and used to resume.")
+    parser.add_argument(
+        "--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "2")),
+        help="Maximum concurrent crew runs (default: BATCH_CONCURRENCY or 2)."
+    )
+    parser.add_argument(
+        "--skip-failed", action="store_true",
+        help="On resume, do not rerun records whose previous result was an error."
+    )
+    args = parser.parse_args()
+
+    summary = run_batch(args.input, args.output, concurrency=args.concurrency, retry_failed=not args.skip_failed)
+    print(f"\n🏁 {summary['ok']} succeeded, {summary['error']} failed, {summary['skipped']} skipped in {summary['seconds']:.1f}s")
+    if "intake_cache" in summary:
+        intake_stats = summary["intake_cache"]
+        print(f"🗃️ Intake cache: {intake_stats['hits']} hits ({intake_stats['hit_rate']:.0%}), {intake_stats['seconds_saved']:.1f}s saved")
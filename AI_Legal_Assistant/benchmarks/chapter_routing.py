@@ -0,0 +1,79 @@
+# chapter_routing.py
+#
+# Speed and accuracy of chapter-routed IPC search vs flat search over the numpy index.
+# Run from the AI_Legal_Assistant directory:  python -m benchmarks.chapter_routing [--chapters 1,2,3,5]
+#
+# Needs the numpy index and chapter centroids:  python -m retrieval.ipc_numpy_store && python -m retrieval.ipc_routed_store
+#
+# Queries are embedded once up front, so the timings cover the index alone.
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("IPC_QUERY_CACHE", "0")
+
+import numpy as np
+
+from benchmarks.ipc_search_modes import load_labeled_queries, recall_at_k
+from retrieval.embedding_backends import create_embeddings
+from retrieval.ipc_numpy_store import NumpyIndex, normalize_rows, numpy_index_dir
+from retrieval.ipc_routed_store import ChapterRoutedIndex
+from retrieval.ipc_store import doc_to_result
+
+
+def run(k: int, chapter_counts: list[int], min_similarity: float):
+    labeled_queries = load_labeled_queries()
+    index_dir = numpy_index_dir()
+
+    query_matrix = normalize_rows(np.asarray(
+        create_embeddings().embed_documents([item["query"] for item in labeled_queries]), dtype=np.float32
+    ))
+
+    flat = NumpyIndex(index_dir)
+    flat_rows = [flat.top_k(flat.matrix @ query_vector, k) for query_vector in query_matrix]
+
+    def measure(search) -> tuple[list[float], float, float]:
+        timings, overlaps, recalls = [], [], []
+        for query_vector, truth, item in zip(query_matrix, flat_rows, labeled_queries):
+            start = time.perf_counter()
+            rows = search(query_vector)
+            timings.append((time.perf_counter() - start) * 1000)
+            overlaps.append(len(set(rows) & set(truth)) / len(truth))
+            results = [doc_to_result(flat.documents[row]) for row in rows]
+            recalls.append(recall_at_k(results, item["expected_sections"], k))
+        return timings, statistics.mean(overlaps), statistics.mean(recalls)
+
+    print(f"📐 {len(flat.matrix)} sections, {len(labeled_queries)} labeled queries, min centroid similarity {min_similarity}\n")
+    print(f"{'search':<12} {'mean ms':>8} {'p95 ms':>8} {'rows scored':>12} {'fallbacks':>10} {f'overlap@{k}':>10} {f'recall@{k}':>9}")
+
+    timings, overlap, recall = measure(lambda query_vector: flat.top_k(flat.matrix @ query_vector, k))
+    print(
+        f"{'flat':<12} {statistics.mean(timings):>8.3f} {statistics.quantiles(timings, n=20)[-1]:>8.3f} "
+        f"{1:>12.1%} {'-':>10} {overlap:>10.3f} {recall:>9.3f}"
+    )
+
+    for chapters in chapter_counts:
+        index = ChapterRoutedIndex(index_dir, route_chapters=chapters, min_similarity=min_similarity)
+        timings, overlap, recall = measure(lambda query_vector: index.search(query_vector, k))
+        stats = index.routing_stats()
+        print(
+            f"{f'top {chapters} ch.':<12} {statistics.mean(timings):>8.3f} {statistics.quantiles(timings, n=20)[-1]:>8.3f} "
+            f"{stats['rows_scored_fraction']:>12.1%} {stats['fallback_rate']:>10.1%} {overlap:>10.3f} {recall:>9.3f}"
+        )
+
+    print(f"\n`overlap@{k}` is agreement with the flat top-{k}; `recall@{k}` is against the labeled sections.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare chapter-routed IPC search with flat search.")
+    parser.add_argument("--k", type=int, default=3, help="Results per query.")
+    parser.add_argument("--chapters", default="1,2,3,5", help="Comma-separated numbers of chapters to route to.")
+    parser.add_argument(
+        "--min-similarity", type=float, default=float(os.getenv("IPC_ROUTE_MIN_SIMILARITY", "0.2")),
+        help="Centroid similarity below which the whole index is searched."
+    )
+    args = parser.parse_args()
+
+    run(args.k, [int(count) for count in args.chapters.split(",")], args.min_similarity)
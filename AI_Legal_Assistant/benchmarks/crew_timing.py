@@ -0,0 +1,74 @@
+# crew_timing.py
+#
+# Compare end-to-end wall time of legal crew variants.
+# Run from the AI_Legal_Assistant directory:  python -m benchmarks.crew_timing [--runs N] [--compare parallel|compression]
+#
+#   parallel:     sequential vs parallel IPC / precedent stages
+#   compression:  drafter context as-is vs compressed (also reports drafter prompt tokens)
+#
+# Needs GROQ_API_KEY and TAVILY_API_KEY (or PRECEDENT_SEARCH_MODE=replay with a recording).
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from crew import build_legal_assistant_crew
+from pipeline.instrumentation import track_crew_run
+
+
+SAMPLE_CASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_case.json")
+DRAFTER_STAGE = "Legal Document Drafting Agent"
+
+# Variant name -> build_legal_assistant_crew keyword arguments, baseline first
+COMPARISONS = {
+    "parallel": {"sequential": {"parallel": False}, "parallel": {"parallel": True}},
+    "compression": {"full context": {"compress": False}, "compressed": {"compress": True}},
+}
+
+
+def run(runs: int, case_path: str, compare: str):
+    with open(case_path, "r", encoding="utf-8") as file:
+        inputs = json.load(file)
+
+    variants = COMPARISONS[compare]
+    timings = {name: [] for name in variants}
+    drafter_seconds = {name: [] for name in variants}
+    drafter_tokens = {name: [] for name in variants}
+    for _ in range(runs):
+        # Alternate variants so provider-side latency drift affects both equally
+        for name, options in variants.items():
+            crew = build_legal_assistant_crew(**options)
+            start = time.perf_counter()
+            with track_crew_run(crew) as run_metrics:
+                crew.kickoff(inputs=inputs)
+            timings[name].append(time.perf_counter() - start)
+
+            drafter = run_metrics.summary()["stages"].get(DRAFTER_STAGE, {})
+            drafter_seconds[name].append(drafter.get("wall_seconds", 0.0))
+            drafter_tokens[name].append(drafter.get("prompt_tokens", 0))
+
+    print(f"\n{'variant':<13} {'runs':>5} {'mean s':>8} {'min s':>8} {'max s':>8} {'drafter s':>10} {'drafter prompt tok':>19}")
+    for name, values in timings.items():
+        print(
+            f"{name:<13} {len(values):>5} {statistics.mean(values):>8.1f} {min(values):>8.1f} {max(values):>8.1f} "
+            f"{statistics.mean(drafter_seconds[name]):>10.1f} {statistics.mean(drafter_tokens[name]):>19.0f}"
+        )
+
+    baseline, candidate = variants
+    saved = statistics.mean(timings[baseline]) - statistics.mean(timings[candidate])
+    print(f"\n⚡ {candidate} saves {saved:.1f}s per complaint ({saved / statistics.mean(timings[baseline]):.0%})")
+    if compare == "compression" and statistics.mean(drafter_tokens[baseline]):
+        token_cut = 1 - statistics.mean(drafter_tokens[candidate]) / statistics.mean(drafter_tokens[baseline])
+        print(f"✂️ Drafter prompt tokens cut by {token_cut:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time legal crew variants.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per variant.")
+    parser.add_argument("--case", default=SAMPLE_CASE_PATH, help="JSON file with the crew inputs.")
+    parser.add_argument("--compare", choices=COMPARISONS, default="parallel", help="Which variants to compare.")
+    args = parser.parse_args()
+
+    run(args.runs, args.case, args.compare)
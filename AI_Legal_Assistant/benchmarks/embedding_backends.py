@@ -0,0 +1,127 @@
+# embedding_backends.py
+#
+# Memory, load time, encode throughput and recall of embedding models and backends.
+# Run from the AI_Legal_Assistant directory:
+#
+#   python -m benchmarks.embedding_backends \
+#       --configs sentence-transformers/all-mpnet-base-v2:torch,sentence-transformers/all-MiniLM-L6-v2:onnx-int8
+#
+# Each config is measured in a fresh subprocess so resident memory is not shared
+# between models. Every IPC section is encoded and searched by brute force, so
+# recall does not depend on which vector backend the app is configured with.
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("IPC_QUERY_CACHE", "0")
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarks.ipc_search_modes import load_labeled_queries, recall_at_k
+from ipc_vectordb_builder import load_ipc_data, prepare_documents
+from retrieval.embedding_backends import create_embeddings
+from retrieval.ipc_numpy_store import normalize_rows
+from retrieval.ipc_store import doc_to_result
+
+
+def resident_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(model: str, backend: str, k: int) -> dict:
+    """Load one model/backend and measure it on the IPC corpus and labeled queries."""
+    load_dotenv()
+    documents = prepare_documents(load_ipc_data(os.getenv("IPC_JSON_PATH")))
+    labeled_queries = load_labeled_queries()
+    baseline_mb = resident_mb()
+
+    start = time.perf_counter()
+    embeddings = create_embeddings({"embedding_model": model, "embedding_backend": backend})
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = normalize_rows(np.asarray(
+        embeddings.embed_documents([doc.page_content for doc in documents]), dtype=np.float32
+    ))
+    encode_seconds = time.perf_counter() - start
+
+    query_ms, recalls = [], []
+    for item in labeled_queries:
+        start = time.perf_counter()
+        query_vector = normalize_rows(np.asarray(embeddings.embed_query(item["query"]), dtype=np.float32))
+        query_ms.append((time.perf_counter() - start) * 1000)
+        rows = np.argsort(-(matrix @ query_vector))[:k]
+        recalls.append(recall_at_k([doc_to_result(documents[row]) for row in rows], item["expected_sections"], k))
+
+    return {
+        "model": model,
+        "backend": backend,
+        "rss_mb": resident_mb() - baseline_mb,
+        "load_seconds": load_seconds,
+        "docs_per_second": len(documents) / encode_seconds,
+        "query_ms": statistics.median(query_ms),
+        "recall": statistics.mean(recalls),
+        "dimension": int(matrix.shape[1]),
+    }
+
+
+def run(configs: list[str], k: int):
+    print(
+        f"{'model':<42} {'backend':<10} {'dim':>5} {'RSS MB':>8} {'load s':>7} "
+        f"{'docs/s':>8} {'query ms':>9} {f'recall@{k}':>9}"
+    )
+    for config in configs:
+        model, _, backend = config.rpartition(":")
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.embedding_backends", "--measure", config, "--k", str(k)],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            print(f"{model:<42} {backend:<10} failed: {completed.stderr.strip().splitlines()[-1:]}")
+            continue
+
+        row = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(
+            f"{row['model']:<42} {row['backend']:<10} {row['dimension']:>5} {row['rss_mb']:>8.0f} "
+            f"{row['load_seconds']:>7.2f} {row['docs_per_second']:>8.1f} {row['query_ms']:>9.2f} {row['recall']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare embedding models and inference backends.")
+    parser.add_argument(
+        "--configs",
+        default=(
+            "sentence-transformers/all-mpnet-base-v2:torch,"
+            "sentence-transformers/all-mpnet-base-v2:torch-int8,"
+            "sentence-transformers/all-MiniLM-L6-v2:torch,"
+            "sentence-transformers/all-MiniLM-L6-v2:onnx,"
+            "sentence-transformers/all-MiniLM-L6-v2:onnx-int8"
+        ),
+        help="Comma-separated model:backend pairs."
+    )
+    parser.add_argument("--k", type=int, default=3, help="Recall cut-off.")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        model, _, backend = args.measure.rpartition(":")
+        print(json.dumps(measure(model, backend, args.k)))
+    else:
+        run(args.configs.split(","), args.k)
@@ -0,0 +1,87 @@
+# embedding_server.py
+#
+# Dense IPC search throughput and worker memory, in-process vs through the shared embedding server.
+# Start the server first (`python embedding_server.py`), then run from the AI_Legal_Assistant directory:
+#
+#   python -m benchmarks.embedding_server [--concurrency 1,8,32] [--rounds 5]
+#
+# Each mode runs in a fresh subprocess, standing in for one app worker. Queries
+# are made unique per run and round so neither side answers from the query cache.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("IPC_QUERY_CACHE", "0")
+
+from benchmarks.embedding_backends import resident_mb
+from benchmarks.ipc_search_modes import load_labeled_queries
+from retrieval.embedding_client import embedding_server_available
+from retrieval.ipc_search import search_ipc
+
+
+def measure(concurrency: int, rounds: int) -> dict:
+    """Run dense searches from `concurrency` threads in this process and time them."""
+    queries = [
+        f"{item['query']} ({os.getpid()}-{round_number})"
+        for round_number in range(rounds)
+        for item in load_labeled_queries()
+    ]
+    search_ipc(queries[0], mode="dense")  # Load the model or connect before timing
+
+    def timed(query: str) -> float:
+        start = time.perf_counter()
+        search_ipc(query, mode="dense")
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        timings = list(pool.map(timed, queries))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "queries_per_second": len(queries) / elapsed,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": statistics.quantiles(timings, n=20)[-1],
+        "rss_mb": resident_mb(),
+    }
+
+
+def run(concurrency_levels: list[int], rounds: int):
+    if not embedding_server_available():
+        print("⚠️ No embedding server is running; start `python embedding_server.py` to compare against it.\n")
+
+    print(f"{'mode':<10} {'threads':>7} {'queries/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'worker RSS MB':>14}")
+    for mode, server in (("in-process", "0"), ("server", os.getenv("IPC_EMBEDDING_SERVER", ""))):
+        for concurrency in concurrency_levels:
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.embedding_server", "--measure", str(concurrency), "--rounds", str(rounds)],
+                capture_output=True, text=True, env={**os.environ, "IPC_EMBEDDING_SERVER": server}
+            )
+            if completed.returncode != 0:
+                print(f"{mode:<10} {concurrency:>7} failed: {completed.stderr.strip().splitlines()[-1:]}")
+                continue
+
+            row = json.loads(completed.stdout.strip().splitlines()[-1])
+            print(
+                f"{mode:<10} {concurrency:>7} {row['queries_per_second']:>10.1f} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['rss_mb']:>14.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare in-process dense search with the shared embedding server.")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated thread counts.")
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over the labeled queries.")
+    parser.add_argument("--measure", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.rounds)))
+    else:
+        run([int(value) for value in args.concurrency.split(",")], args.rounds)
@@ -0,0 +1,49 @@
+# hedging.py
+#
+# Tail latency with and without hedged requests on a simulated heavy-tailed call.
+# Run from the AI_Legal_Assistant directory:  python -m benchmarks.hedging [--slow-rate 0.03]
+#
+# Each call takes `--fast-ms` normally and `--slow-ms` with probability `--slow-rate`,
+# like a Groq or Tavily request that occasionally stalls. No network is used.
+
+import argparse
+import random
+import statistics
+import time
+
+from pipeline.hedging import hedge_stats, run_with_deadline
+
+
+def run(calls: int, fast_ms: float, slow_ms: float, slow_rate: float, seed: int):
+    def call():
+        time.sleep((slow_ms if random.random() < slow_rate else fast_ms) / 1000)
+
+    print(f"{calls} calls, {fast_ms:g} ms normally, {slow_ms:g} ms {slow_rate:.0%} of the time\n")
+    print(f"{'mode':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'extra calls':>12}")
+    for hedge in (False, True):
+        random.seed(seed)
+        kind = "hedged" if hedge else "single"
+        timings = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            run_with_deadline(kind, call, hedge=hedge)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        percentiles = statistics.quantiles(timings, n=100)
+        extra = hedge_stats()[kind]["hedges_fired"] / calls
+        print(
+            f"{kind:<8} {statistics.median(timings):>8.1f} {percentiles[94]:>8.1f} "
+            f"{percentiles[98]:>8.1f} {max(timings):>8.1f} {extra:>12.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure tail latency with hedged requests.")
+    parser.add_argument("--calls", type=int, default=500, help="Calls per mode.")
+    parser.add_argument("--fast-ms", type=float, default=20, help="Normal call latency.")
+    parser.add_argument("--slow-ms", type=float, default=500, help="Stalled call latency.")
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="Share of stalled calls.")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed.")
+    args = parser.parse_args()
+
+    run(args.calls, args.fast_ms, args.slow_ms, args.slow_rate, args.seed)
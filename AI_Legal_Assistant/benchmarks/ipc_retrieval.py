@@ -0,0 +1,224 @@
+# ipc_retrieval.py
+#
+# IPC retrieval benchmark: cold start, latency percentiles, concurrent throughput,
+# recall@k and MRR for every built vector backend and search mode on the labeled query set.
+# Run from the AI_Legal_Assistant directory:
+#
+#   python -m benchmarks.ipc_retrieval [--backends chroma,numpy] [--modes dense,hybrid]
+#                                      [--repeat 5] [--concurrency 8] [--json out.json]
+#                                      [--min-recall 0.8] [--max-p95-ms 50]
+#
+# Exits with status 1 when a threshold is missed, so it can gate changes.
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Measure retrieval itself, not the query embedding cache or the precomputed offence table
+os.environ.setdefault("IPC_QUERY_CACHE", "0")
+os.environ.setdefault("IPC_OFFENCE_CACHE", "0")
+
+from benchmarks.ipc_search_modes import QUERIES_PATH, load_labeled_queries, recall_at_k
+from retrieval.ipc_numpy_store import EMBEDDINGS_FILE, METADATA_FILE, current_index_dir, numpy_index_dir
+from retrieval.ipc_quantized_store import BINARY_CODES_FILE, INT8_CODES_FILE, INT8_SCALES_FILE
+from retrieval.ipc_routed_store import CENTROIDS_FILE, CHAPTERS_FILE
+from retrieval.ipc_search import SEARCH_MODES, get_lexical_index, search_ipc
+from retrieval.ipc_store import VECTOR_BACKENDS, get_ipc_store
+
+
+# Artifacts each backend needs in the numpy index directory, and the command that exports them
+_BACKEND_ARTIFACTS = {
+    "numpy": ([EMBEDDINGS_FILE, METADATA_FILE], "python -m retrieval.ipc_numpy_store"),
+    "quantized": (
+        [EMBEDDINGS_FILE, METADATA_FILE, INT8_CODES_FILE, INT8_SCALES_FILE, BINARY_CODES_FILE],
+        "python -m retrieval.ipc_quantized_store",
+    ),
+    "routed": ([EMBEDDINGS_FILE, METADATA_FILE, CENTROIDS_FILE, CHAPTERS_FILE], "python -m retrieval.ipc_routed_store"),
+}
+
+
+def reciprocal_rank(results: list[dict], expected_sections: list[str]) -> float:
+    """
+    1 / rank of the first correct section in the results (0 when none is retrieved).
+
+    Args:
+        results (list[dict]): Search results, best first.
+        expected_sections (list[str]): Section numbers considered correct.
+
+    Returns:
+        float: Reciprocal rank in [0, 1].
+    """
+    for rank, result in enumerate(results, start=1):
+        if str(result["section"]) in expected_sections:
+            return 1.0 / rank
+    return 0.0
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of `values`."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def available_backends() -> tuple[list[str], dict[str, str]]:
+    """
+    Vector backends whose index artifacts exist.
+
+    Returns:
+        tuple[list[str], dict[str, str]]: Backends ready to benchmark, and the export command for each missing one.
+    """
+    persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH", "")
+    available = []
+    missing = {}
+    if os.path.exists(os.path.join(persist_dir_path, "chroma.sqlite3")):
+        available.append("chroma")
+    else:
+        missing["chroma"] = "python ipc_vectordb_builder.py"
+
+    index_dir = current_index_dir(numpy_index_dir())
+    for backend, (files, command) in _BACKEND_ARTIFACTS.items():
+        if all(os.path.exists(os.path.join(index_dir, file_name)) for file_name in files):
+            available.append(backend)
+        else:
+            missing[backend] = command
+    return [backend for backend in VECTOR_BACKENDS if backend in available], missing
+
+
+def benchmark(backend: str, mode: str, labeled_queries: list[dict], k: int, repeat: int, concurrency: int) -> dict:
+    """
+    Measure one backend / search mode combination.
+
+    Args:
+        backend (str): One of `VECTOR_BACKENDS`.
+        mode (str): One of `SEARCH_MODES`.
+        labeled_queries (list[dict]): `{"query", "expected_sections"}` items.
+        k (int): Results per query.
+        repeat (int): Passes over the query set for the latency and throughput runs.
+        concurrency (int): Threads issuing queries in the throughput run.
+
+    Returns:
+        dict: Cold start, latency percentiles, throughput, recall@k and MRR.
+    """
+    os.environ["IPC_VECTOR_BACKEND"] = backend
+    store = get_ipc_store(backend)
+    store.close()
+
+    # Cold start: open the embedding model and index and answer the first query
+    start = time.perf_counter()
+    search_ipc(labeled_queries[0]["query"], k=k, mode=mode)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    recalls, reciprocal_ranks = [], []
+    for item in labeled_queries:
+        results = search_ipc(item["query"], k=k, mode=mode)
+        recalls.append(recall_at_k(results, item["expected_sections"], k))
+        reciprocal_ranks.append(reciprocal_rank(results, item["expected_sections"]))
+
+    queries = [item["query"] for item in labeled_queries] * repeat
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search_ipc(query, k=k, mode=mode)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda query: search_ipc(query, k=k, mode=mode), queries))
+    throughput = len(queries) / (time.perf_counter() - start)
+
+    store.close()
+    return {
+        "backend": backend,
+        "mode": mode,
+        "cold_start_ms": round(cold_ms, 2),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "throughput_qps": round(throughput, 1),
+        f"recall@{k}": round(statistics.mean(recalls), 4),
+        "mrr": round(statistics.mean(reciprocal_ranks), 4),
+    }
+
+
+def run(backends: list[str], modes: list[str], k: int, repeat: int, concurrency: int, queries_path: str) -> list[dict]:
+    labeled_queries = load_labeled_queries(queries_path)
+
+    start = time.perf_counter()
+    get_lexical_index()
+    print(f"📚 {len(labeled_queries)} labeled queries; BM25 index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"🔁 {repeat} passes for latency, {concurrency} threads for throughput\n")
+
+    header = f"{'backend':<8} {'mode':<7} {'cold ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'qps':>8} {f'recall@{k}':>9} {'MRR':>6}"
+    print(header)
+    reports = []
+    for backend in backends:
+        for mode in modes:
+            # BM25 never touches the vector store, so measure it once
+            if mode == "bm25" and backend != backends[0]:
+                continue
+            report = benchmark(backend, mode, labeled_queries, k, repeat, concurrency)
+            reports.append(report)
+            print(
+                f"{backend if mode != 'bm25' else '-':<8} {mode:<7} {report['cold_start_ms']:>9.1f} {report['p50_ms']:>8.2f} "
+                f"{report['p95_ms']:>8.2f} {report['p99_ms']:>8.2f} {report['throughput_qps']:>8.1f} "
+                f"{report[f'recall@{k}']:>9.3f} {report['mrr']:>6.3f}"
+            )
+    return reports
+
+
+def check_thresholds(reports: list[dict], k: int, min_recall: float = None, max_p95_ms: float = None) -> list[str]:
+    """
+    List every report that misses a recall or latency threshold.
+
+    Returns:
+        list[str]: Human-readable failures (empty when all pass).
+    """
+    failures = []
+    for report in reports:
+        name = f"{report['backend']}/{report['mode']}"
+        if min_recall is not None and report[f"recall@{k}"] < min_recall:
+            failures.append(f"{name}: recall@{k} {report[f'recall@{k}']:.3f} < {min_recall}")
+        if max_p95_ms is not None and report["p95_ms"] > max_p95_ms:
+            failures.append(f"{name}: p95 {report['p95_ms']:.2f} ms > {max_p95_ms} ms")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark IPC retrieval speed and accuracy.")
+    parser.add_argument(
+        "--backends", help="Comma-separated vector backends (default: every backend whose index is exported)."
+    )
+    parser.add_argument("--modes", default=",".join(SEARCH_MODES), help="Comma-separated search modes.")
+    parser.add_argument("--k", type=int, default=3, help="Results per query.")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the query set for latency/throughput.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads for the throughput run.")
+    parser.add_argument("--queries", default=QUERIES_PATH, help="Labeled query set (JSON).")
+    parser.add_argument("--json", help="Also write the reports to this JSON file.")
+    parser.add_argument("--min-recall", type=float, help="Fail if any recall@k is below this.")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if any p95 latency exceeds this.")
+    args = parser.parse_args()
+
+    if args.backends:
+        backends = args.backends.split(",")
+    else:
+        backends, missing = available_backends()
+        for backend, command in missing.items():
+            print(f"⏭️ Skipping {backend}: its index is not built (run `{command}`)")
+        if not backends:
+            sys.exit("❌ No vector index found. Build one with `python ipc_vectordb_builder.py`.")
+
+    reports = run(backends, args.modes.split(","), args.k, args.repeat, args.concurrency, args.queries)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(reports, file, indent=2)
+
+    failures = check_thresholds(reports, args.k, args.min_recall, args.max_p95_ms)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
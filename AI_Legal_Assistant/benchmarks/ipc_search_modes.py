@@ -0,0 +1,83 @@
+# ipc_search_modes.py
+#
+# Compare IPC search modes on the labeled query set.
+# Run from the AI_Legal_Assistant directory:  python -m benchmarks.ipc_search_modes
+
+import json
+import os
+import statistics
+import time
+
+# Compare the search modes themselves, not precomputed offence results
+os.environ.setdefault("IPC_OFFENCE_CACHE", "0")
+
+from retrieval.ipc_search import SEARCH_MODES, get_lexical_index, search_ipc
+from retrieval.ipc_store import get_ipc_store
+
+
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ipc_queries.json")
+
+
+def load_labeled_queries(file_path: str = QUERIES_PATH) -> list[dict]:
+    """
+    Load the labeled benchmark queries.
+
+    Args:
+        file_path (str): Path to a JSON list of `{"query", "expected_sections"}` objects.
+
+    Returns:
+        list[dict]: Labeled queries.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def recall_at_k(results: list[dict], expected_sections: list[str], k: int) -> float:
+    """
+    Fraction of the expected sections found in the top-k results (capped at k expected).
+
+    Args:
+        results (list[dict]): Search results, best first.
+        expected_sections (list[str]): Section numbers considered correct.
+        k (int): Cut-off.
+
+    Returns:
+        float: Recall in [0, 1].
+    """
+    retrieved = {str(result["section"]) for result in results[:k]}
+    return len(retrieved & set(expected_sections)) / min(len(expected_sections), k)
+
+
+def run(k: int = 3):
+    labeled_queries = load_labeled_queries()
+
+    # Load both indexes up front so every mode is measured warm
+    start = time.perf_counter()
+    lexical_index = get_lexical_index()
+    print(f"📚 BM25 index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    get_ipc_store().load()
+    print(f"🧠 Embedding model + vectordb loaded in {get_ipc_store().load_seconds * 1000:.1f} ms\n")
+
+    min_coverage = float(os.getenv("IPC_BM25_MIN_COVERAGE", "0.6"))
+    lexical_only = sum(
+        lexical_index.bm25.is_confident(item["query"], lexical_index.bm25.search(item["query"], k=k), k, min_coverage)
+        for item in labeled_queries
+    )
+
+    print(f"{'mode':<8} {'mean ms':>9} {'p95 ms':>9} {f'recall@{k}':>10}")
+    for mode in SEARCH_MODES:
+        timings, recalls = [], []
+        for item in labeled_queries:
+            start = time.perf_counter()
+            results = search_ipc(item["query"], k=k, mode=mode)
+            timings.append((time.perf_counter() - start) * 1000)
+            recalls.append(recall_at_k(results, item["expected_sections"], k))
+
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        print(f"{mode:<8} {statistics.mean(timings):>9.2f} {p95:>9.2f} {statistics.mean(recalls):>10.3f}")
+
+    print(f"\n⚡ auto mode answered {lexical_only}/{len(labeled_queries)} queries from BM25 alone (no embedding)")
+
+
+if __name__ == "__main__":
+    run()
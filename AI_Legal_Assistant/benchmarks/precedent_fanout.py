@@ -0,0 +1,55 @@
+# precedent_fanout.py
+#
+# Wall time and coverage of multi-query precedent search vs a single query.
+# Run from the AI_Legal_Assistant directory:  python -m benchmarks.precedent_fanout [--fanout 1,3,5]
+#
+# Needs TAVILY_API_KEY, or PRECEDENT_SEARCH_MODE=replay with a recording made by a
+# PRECEDENT_SEARCH_MODE=record run. In live mode the response cache is bypassed
+# (record mode) so every query really goes to Tavily.
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("PRECEDENT_SEARCH_MODE", "record")
+
+from retrieval.ipc_search import get_lexical_index
+from retrieval.precedent_fanout import expand_precedent_queries
+from tools.legal_precedent_search_tool import search_precedent_variants
+
+
+ISSUES = [
+    "Home trespassing and theft - precedent cases in India",
+    "Cheating under Section 420 IPC and criminal breach of trust",
+    "Dowry harassment and cruelty by husband u/s 498A",
+    "Criminal intimidation and threat to kill",
+    "Murder and causing disappearance of evidence",
+]
+
+
+def run(fanouts: list[int], show_queries: bool):
+    get_lexical_index()  # Section matching for the variants, loaded once outside the timings
+
+    print(f"{'fanout':>6} {'mean s':>8} {'max s':>8} {'unique links':>13}")
+    for fanout in fanouts:
+        os.environ["PRECEDENT_FANOUT"] = str(fanout)
+        timings, links = [], []
+        for issue in ISSUES:
+            start = time.perf_counter()
+            results = search_precedent_variants(issue)
+            timings.append(time.perf_counter() - start)
+            links.append(len({item["link"] for item in results if item.get("link")}))
+            if show_queries:
+                print(json.dumps(expand_precedent_queries(issue, fanout), ensure_ascii=False))
+        print(f"{fanout:>6} {statistics.mean(timings):>8.2f} {max(timings):>8.2f} {statistics.mean(links):>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare single-query and fan-out precedent search.")
+    parser.add_argument("--fanout", default="1,3,5", help="Comma-separated PRECEDENT_FANOUT values to compare.")
+    parser.add_argument("--show-queries", action="store_true", help="Print the query variants of each issue.")
+    args = parser.parse_args()
+
+    run([int(value) for value in args.fanout.split(",")], args.show_queries)
@@ -0,0 +1,78 @@
+# quantized_index.py
+#
+# Memory, latency and recall of the int8 / binary quantized IPC index vs the float32 numpy index.
+# Run from the AI_Legal_Assistant directory:  python -m benchmarks.quantized_index [--factors 2,4,8]
+#
+# Needs the numpy index and quantized codes:  python -m retrieval.ipc_numpy_store && python -m retrieval.ipc_quantized_store
+#
+# Queries are embedded once up front, so the timings cover the index alone.
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("IPC_QUERY_CACHE", "0")
+
+import numpy as np
+
+from benchmarks.ipc_search_modes import load_labeled_queries, recall_at_k
+from retrieval.embedding_backends import create_embeddings
+from retrieval.ipc_numpy_store import NumpyIndex, normalize_rows, numpy_index_dir
+from retrieval.ipc_quantized_store import QUANTIZATION_SCHEMES, QuantizedIndex
+from retrieval.ipc_store import doc_to_result
+
+
+def run(k: int, factors: list[int]):
+    labeled_queries = load_labeled_queries()
+    index_dir = numpy_index_dir()
+
+    query_matrix = normalize_rows(np.asarray(
+        create_embeddings().embed_documents([item["query"] for item in labeled_queries]), dtype=np.float32
+    ))
+
+    exact = NumpyIndex(index_dir)
+    exact_rows = [exact.top_k(exact.matrix @ query_vector, k) for query_vector in query_matrix]
+
+    def measure(search) -> tuple[list[float], float, float]:
+        timings, overlaps, recalls = [], [], []
+        for query_vector, truth, item in zip(query_matrix, exact_rows, labeled_queries):
+            start = time.perf_counter()
+            rows = search(query_vector)
+            timings.append((time.perf_counter() - start) * 1000)
+            overlaps.append(len(set(rows) & set(truth)) / len(truth))
+            results = [doc_to_result(exact.documents[row]) for row in rows]
+            recalls.append(recall_at_k(results, item["expected_sections"], k))
+        return timings, statistics.mean(overlaps), statistics.mean(recalls)
+
+    float_bytes = exact.matrix.nbytes
+    print(f"📐 {exact.matrix.shape[0]} sections x {exact.matrix.shape[1]} dims, {len(labeled_queries)} labeled queries\n")
+    print(f"{'index':<14} {'resident KiB':>13} {'mean ms':>8} {'p95 ms':>8} {f'overlap@{k}':>10} {f'recall@{k}':>9}")
+
+    timings, overlap, recall = measure(lambda query_vector: exact.top_k(exact.matrix @ query_vector, k))
+    print(
+        f"{'float32':<14} {float_bytes / 1024:>13.1f} {statistics.mean(timings):>8.3f} "
+        f"{statistics.quantiles(timings, n=20)[-1]:>8.3f} {overlap:>10.3f} {recall:>9.3f}"
+    )
+
+    for scheme in QUANTIZATION_SCHEMES:
+        for factor in factors:
+            index = QuantizedIndex(index_dir, scheme, rescore_factor=factor)
+            timings, overlap, recall = measure(lambda query_vector: index.search(query_vector, k))
+            # Resident: codes plus the float rows touched for rescoring
+            resident = index.code_bytes + k * factor * exact.matrix.shape[1] * 4
+            print(
+                f"{f'{scheme} x{factor}':<14} {resident / 1024:>13.1f} {statistics.mean(timings):>8.3f} "
+                f"{statistics.quantiles(timings, n=20)[-1]:>8.3f} {overlap:>10.3f} {recall:>9.3f}"
+            )
+
+    print(f"\n`overlap@{k}` is agreement with the exact float32 top-{k}; `recall@{k}` is against the labeled sections.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare quantized IPC indexes with the float32 index.")
+    parser.add_argument("--k", type=int, default=3, help="Results per query.")
+    parser.add_argument("--factors", default="2,4,8", help="Comma-separated rescore factors.")
+    args = parser.parse_args()
+
+    run(args.k, [int(factor) for factor in args.factors.split(",")])
@@ -0,0 +1,67 @@
+# startup_time.py
+#
+# Profile import time of the app's startup path vs the modules it now defers.
+# Run from the AI_Legal_Assistant directory:  python -m benchmarks.startup_time [--top 15]
+#
+# Each module is imported in a fresh interpreter with `python -X importtime`, so
+# nothing is shared between measurements.
+
+import argparse
+import subprocess
+import sys
+import time
+
+
+# What the page needs before it can render vs what the background warmup loads
+MODULES = {
+    "startup path": "streamlit, dotenv, pipeline.startup",
+    "crew": "crew",
+    "ipc search": "retrieval.ipc_search",
+}
+
+
+def profile_import(modules: str) -> tuple[float, list[tuple[int, str]]]:
+    """
+    Import `modules` in a fresh interpreter under `-X importtime`.
+
+    Args:
+        modules (str): Comma-separated module names.
+
+    Returns:
+        tuple[float, list[tuple[int, str]]]: Wall seconds, and `(cumulative_us, module)` for every import.
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modules}"],
+        capture_output=True, text=True, check=True
+    )
+    wall_seconds = time.perf_counter() - start
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), name.strip()))
+    return wall_seconds, imports
+
+
+def run(top: int):
+    for label, modules in MODULES.items():
+        wall_seconds, imports = profile_import(modules)
+        # A package can show up more than once (e.g. re-entered during a circular import)
+        slowest = {}
+        for cumulative, name in imports:
+            slowest[name] = max(cumulative, slowest.get(name, 0))
+
+        print(f"\n📦 {label} ({modules}): {wall_seconds:.2f}s wall, {len(imports)} modules")
+        for name, cumulative in sorted(slowest.items(), key=lambda item: item[1], reverse=True)[:top]:
+            print(f"   {cumulative / 1e6:>7.3f}s  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile import time of the app's startup path.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list per module.")
+    args = parser.parse_args()
+
+    run(args.top)
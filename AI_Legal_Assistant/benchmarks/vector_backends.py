@@ -0,0 +1,52 @@
+# vector_backends.py
+#
+# Compare the Chroma and numpy flat-matrix IPC vector backends.
+# Run from the AI_Legal_Assistant directory:  python -m benchmarks.vector_backends
+#
+# The numpy index must be exported first:  python -m retrieval.ipc_numpy_store
+
+import os
+import statistics
+import time
+
+# Measure the forward pass and the index, not the query embedding cache
+os.environ.setdefault("IPC_QUERY_CACHE", "0")
+
+from benchmarks.ipc_search_modes import load_labeled_queries
+from retrieval.ipc_numpy_store import NumpyVectorStore
+from retrieval.ipc_store import ChromaVectorStore
+
+
+def run(k: int = 3):
+    queries = [item["query"] for item in load_labeled_queries()]
+
+    print(f"{'backend':<8} {'model ms':>9} {'index ms':>9} {'1st query ms':>13} {'mean ms':>9} {'p95 ms':>9}")
+    for name, store in (("chroma", ChromaVectorStore()), ("numpy", NumpyVectorStore())):
+        # Cold start: load the model, open the index and answer the first query
+        start = time.perf_counter()
+        store.load()
+        store.similarity_search(queries[0], k=k)
+        first_query_ms = (time.perf_counter() - start - store.load_seconds) * 1000
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            store.similarity_search(query, k=k)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        print(
+            f"{name:<8} {(store.load_seconds - store.index_seconds) * 1000:>9.1f} {store.index_seconds * 1000:>9.1f} "
+            f"{first_query_ms:>13.2f} {statistics.mean(timings):>9.2f} {statistics.quantiles(timings, n=20)[-1]:>9.2f}"
+        )
+
+        if name == "numpy":
+            start = time.perf_counter()
+            store.batch_similarity_search(queries, k=k)
+            batch_ms = (time.perf_counter() - start) * 1000
+            print(f"\n⚡ numpy batched: {len(queries)} queries in {batch_ms:.1f} ms ({batch_ms / len(queries):.2f} ms/query)")
+
+        store.close()
+
+
+if __name__ == "__main__":
+    run()
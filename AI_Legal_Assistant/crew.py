@@ -1,7 +1,10 @@
 # crew.py
 
+import os
+
 from crewai import Crew
 
+from pipeline.context_compression import apply_context_compression
 from agents.case_intake_agent import case_intake_agent
 from agents.ipc_section_agent import ipc_section_agent
 from agents.legal_precedent_agent import legal_precedent_agent
@@ -16,4 +19,60 @@ legal_assistant_crew = Crew(
     agents=[case_intake_agent, ipc_section_agent, legal_precedent_agent, legal_drafter_agent],
     tasks=[case_intake_task, ipc_section_task, legal_precedent_task, legal_drafter_task],
     verbose=True
-)
\ No newline at end of file
+)
+
+
+def build_legal_assistant_crew(parallel: bool = None, stream: bool = False, cached_intake=None, compress: bool = None) -> Crew:
+    """
+    Build an independent copy of the legal assistant crew for one run.
+
+    In parallel mode the IPC section and legal precedent stages both start as
+    soon as case intake finishes and run concurrently (the precedent search then
+    works from the intake summary alone); the drafter waits for both before it
+    starts. Sequential mode keeps the original intake -> IPC -> precedent -> drafter chain.
+
+    Args:
+        parallel (bool): Run the IPC and precedent stages concurrently
+            (default: `LEGAL_CREW_PARALLEL`, enabled unless set to `0`).
+        stream (bool): Stream the drafter's tokens (see `pipeline.crew_stream.stream_crew`).
+        cached_intake (TaskOutput): Previously produced case intake output. The intake
+            task is then left out of the crew and downstream tasks read this output
+            as their context (see `pipeline.intake_cache.build_crew_for_case`).
+        compress (bool): Compress the IPC and precedent outputs the drafter receives
+            (default: `LEGAL_DRAFTER_COMPRESSION`, enabled unless set to `0`; see
+            `pipeline.context_compression`).
+
+    Returns:
+        Crew: A copy with its own agents and tasks, safe to kick off alongside other runs.
+    """
+    if parallel is None:
+        parallel = os.getenv("LEGAL_CREW_PARALLEL", "1") != "0"
+    if compress is None:
+        compress = os.getenv("LEGAL_DRAFTER_COMPRESSION", "1") != "0"
+
+    crew = legal_assistant_crew.copy()
+    if stream:
+        # Each copied agent holds its own LLM copy, so this does not affect other runs
+        crew.tasks[-1].agent.llm.stream = True
+
+    case_intake, ipc_section, legal_precedent, legal_drafter = crew.tasks
+    if compress:
+        apply_context_compression(case_intake, ipc_section, legal_precedent, legal_drafter)
+
+    if not parallel and cached_intake is None:
+        return crew
+
+    agents, tasks = crew.agents, [case_intake, ipc_section, legal_precedent, legal_drafter]
+
+    if parallel:
+        ipc_section.async_execution = True
+        legal_precedent.async_execution = True
+        legal_precedent.context = [case_intake]
+
+    if cached_intake is not None:
+        # crewAI reads context from `task.output`, so a task outside the crew can still feed it
+        case_intake.output = cached_intake
+        agents = [agent for agent in agents if agent is not case_intake.agent]
+        tasks = tasks[1:]
+
+    return Crew(agents=agents, tasks=tasks, verbose=crew.verbose)
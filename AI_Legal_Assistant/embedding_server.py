@@ -0,0 +1,203 @@
+# embedding_server.py
+#
+# Shared embedding and retrieval daemon for several app / job-service workers.
+#
+#   python embedding_server.py [--socket PATH | --host 127.0.0.1 --port 8503] [--batch-wait-ms 5]
+#
+# Loads the embedding model and the IPC vector index (IPC_VECTOR_BACKEND) once,
+# instead of once per worker process. Concurrent queries from every connected
+# worker are micro-batched into one forward pass of the model. Workers find the
+# daemon on `<PERSIST_DIRECTORY_PATH>/embedding_server.sock` by default, or at
+# IPC_EMBEDDING_SERVER, and fall back to in-process search when it is down.
+#
+# Protocol: one JSON object per line in each direction, over persistent connections.
+#
+#   {"op": "search", "query": "...", "k": 3, "vector_backend": "chroma", "embedding": "<model>|<backend>"}
+#                                              -> {"documents": [{"page_content", "metadata"}, ...]}
+#   {"op": "embed", "query": "...", "embedding": "<model>|<backend>"}
+#                                              -> {"vector": [...]}
+#   {"op": "health"}                           -> model, backend, load time, query and batching counters
+#
+# A search or embed request for another vector backend or embedding model than the
+# server's is answered with {"error": ...} rather than results from the wrong index.
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from retrieval.embedding_backends import embedding_fingerprint, embedding_spec
+from retrieval.embedding_client import default_socket_path
+from retrieval.ipc_store import get_ipc_store
+
+
+load_dotenv()
+
+
+class EmbeddingRequestHandler(socketserver.StreamRequestHandler):
+    """Serves JSON-line requests on one worker connection until it closes."""
+
+    def handle(self):
+        self.server.count_connection(1)
+        try:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    response = self.server.dispatch(json.loads(line))
+                except Exception as error:
+                    response = {"error": f"{type(error).__name__}: {error}"}
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Worker went away mid-request
+        finally:
+            self.server.count_connection(-1)
+
+
+class EmbeddingServerMixin:
+    """Request dispatch and counters shared by the Unix socket and TCP servers."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def setup_store(self):
+        self.vector_backend = os.getenv("IPC_VECTOR_BACKEND", "chroma")
+        self.store = get_ipc_store(self.vector_backend)
+        self.spec = embedding_spec()
+        self.started = time.time()
+        self.connections = 0
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+
+    def count_connection(self, delta: int):
+        with self._counter_lock:
+            self.connections += delta
+
+    def check_compatible(self, request: dict):
+        """Reject requests from workers configured for another index or embedding model."""
+        backend = request.get("vector_backend")
+        if backend and backend != self.vector_backend:
+            raise ValueError(f"server searches the '{self.vector_backend}' index, request is for '{backend}'")
+        embedding = request.get("embedding")
+        if embedding and embedding != embedding_fingerprint(self.spec):
+            raise ValueError(f"server embeds with '{embedding_fingerprint(self.spec)}', request is for '{embedding}'")
+
+    def dispatch(self, request: dict) -> dict:
+        with self._counter_lock:
+            self.requests += 1
+
+        op = request.get("op")
+        if op in ("search", "embed"):
+            self.check_compatible(request)
+        if op == "search":
+            docs = self.store.similarity_search(request["query"], k=int(request.get("k", 3)))
+            return {"documents": [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs]}
+        if op == "embed":
+            return {"vector": self.store.embed_query(request["query"])}
+        if op == "health":
+            return self.health()
+        raise ValueError(f"unknown op '{op}'")
+
+    def health(self) -> dict:
+        return {
+            **self.spec,
+            "vector_backend": self.vector_backend,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "load_seconds": self.store.load_seconds,
+            "connections": self.connections,
+            "requests": self.requests,
+            "micro_batching": self.store.batch_stats(),
+            "query_cache": self.store.cache_stats(),
+        }
+
+
+class TCPEmbeddingServer(EmbeddingServerMixin, socketserver.ThreadingTCPServer):
+    pass
+
+
+if hasattr(socket, "AF_UNIX"):
+    class UnixEmbeddingServer(EmbeddingServerMixin, socketserver.ThreadingUnixStreamServer):
+        pass
+
+
+def _socket_in_use(path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def serve(socket_path: str = None, host: str = None, port: int = None):
+    """
+    Load the model and index, then serve workers until interrupted.
+
+    Args:
+        socket_path (str): Unix socket to listen on (default when no `port` is given).
+        host (str): TCP host, with `port`.
+        port (int): TCP port; listens on TCP instead of a Unix socket.
+    """
+    if port is None and not hasattr(socket, "AF_UNIX"):
+        host, port = host or "127.0.0.1", 8503  # No Unix sockets on this platform
+
+    if port is not None:
+        server = TCPEmbeddingServer((host or "127.0.0.1", port), EmbeddingRequestHandler)
+        address = f"{host or '127.0.0.1'}:{port}"
+    else:
+        socket_path = socket_path or default_socket_path()
+        if os.path.exists(socket_path):
+            if _socket_in_use(socket_path):
+                raise RuntimeError(f"❌ An embedding server is already listening on '{socket_path}'")
+            os.remove(socket_path)  # Left behind by a server that did not shut down cleanly
+        server = UnixEmbeddingServer(socket_path, EmbeddingRequestHandler)
+        address = socket_path
+
+    server.setup_store()
+    try:
+        start = time.perf_counter()
+        server.store.load()
+        print(
+            f"🧠 Loaded '{server.spec['embedding_model']}' ({server.spec['embedding_backend']}) and the "
+            f"{server.vector_backend} index in {time.perf_counter() - start:.1f}s"
+        )
+        print(f"🔌 Embedding server listening on {address} (set IPC_EMBEDDING_SERVER={address} in the workers)")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.store.close()
+        if port is None:
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve IPC query embedding and dense search to app workers.")
+    parser.add_argument("--socket", help="Unix socket path (default: <PERSIST_DIRECTORY_PATH>/embedding_server.sock).")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host, used with --port.")
+    parser.add_argument("--port", type=int, help="Listen on TCP instead of a Unix socket.")
+    parser.add_argument(
+        "--batch-wait-ms",
+        type=float,
+        default=float(os.getenv("IPC_EMBED_MICRO_BATCH_MS", "5")),
+        help="How long to collect concurrent queries into one forward pass (default: IPC_EMBED_MICRO_BATCH_MS or 5)."
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=int(os.getenv("IPC_EMBED_MICRO_BATCH_SIZE", "32")),
+        help="Most queries per forward pass (default: IPC_EMBED_MICRO_BATCH_SIZE or 32)."
+    )
+    args = parser.parse_args()
+
+    os.environ["IPC_EMBED_MICRO_BATCH_MS"] = str(args.batch_wait_ms)
+    os.environ["IPC_EMBED_MICRO_BATCH_SIZE"] = str(args.max_batch)
+    serve(socket_path=args.socket, host=args.host, port=args.port)
@@ -1,12 +1,24 @@
 # ipc_vectordb_builder.py
 
+import argparse
+import hashlib
 import json
+import multiprocessing
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Iterable, Iterator
 
+import chromadb
 from dotenv import load_dotenv
 from langchain_community.docstore.document import Document
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+
+from retrieval.embedding_backends import DEFAULT_EMBEDDING_MODEL, create_embeddings, embedding_spec
+
+
+# Vectors are unit-normalized, and the numpy backends score by cosine as well
+DISTANCE_SPACE = "cosine"
 
 
 def load_ipc_data(file_path: str) -> list[dict]:
@@ -23,6 +35,45 @@ def load_ipc_data(file_path: str) -> list[dict]:
         return json.load(file)
 
 
+def iter_ipc_data(file_path: str) -> Iterator[dict]:
+    """
+    Stream IPC entries from a JSON array file or a JSON Lines (`.jsonl`) file.
+
+    JSON Lines corpora are read one line at a time, so arbitrarily large
+    statute or judgment collections never have to fit in memory at once.
+
+    Args:
+        file_path (str): Path to the IPC JSON or JSONL file.
+
+    Yields:
+        dict: One IPC section per entry.
+    """
+    if not file_path.endswith(".jsonl"):
+        yield from load_ipc_data(file_path)
+        return
+
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """
+    Group an iterable into lists of at most `batch_size` items.
+
+    Args:
+        items (Iterable): Items to group.
+        batch_size (int): Maximum items per batch.
+
+    Yields:
+        list: The next batch.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
 def prepare_documents(ipc_data: list[dict]) -> list[Document]:
     """
     Convert IPC JSON entries to LangChain Document objects.
@@ -47,9 +98,188 @@ def prepare_documents(ipc_data: list[dict]) -> list[Document]:
     ]
 
 
-def build_ipc_vectordb():
+def document_id(document: Document) -> str:
+    """
+    Stable vectorstore ID for an IPC document, keyed by its section number.
+
+    Args:
+        document (Document): Document produced by `prepare_documents`.
+
+    Returns:
+        str: ID such as `ipc-379` or `ipc-52A`.
+    """
+    return f"ipc-{document.metadata['section']}"
+
+
+def content_hash(document: Document) -> str:
+    """
+    Hash the text and metadata of a document so edits to either are detected.
+
+    Args:
+        document (Document): Document produced by `prepare_documents`.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    metadata = {key: value for key, value in document.metadata.items() if key != "content_hash"}
+    payload = json.dumps(
+        {"page_content": document.page_content, "metadata": metadata},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def plan_incremental_update(documents: list[Document], existing_hashes: dict[str, str], seen_ids: set[str]) -> dict:
+    """
+    Diff a batch of freshly prepared documents against what is already stored.
+
+    Args:
+        documents (list[Document]): Documents produced by `prepare_documents`.
+        existing_hashes (dict[str, str]): Stored ID -> content hash.
+        seen_ids (set[str]): IDs seen in earlier batches; updated in place.
+
+    Returns:
+        dict: `added` and `updated` documents and `unchanged` IDs.
+    """
+    plan = {"added": [], "updated": [], "unchanged": []}
+
+    for document in documents:
+        doc_id = document_id(document)
+        if doc_id in seen_ids:
+            raise ValueError(f"❌ Duplicate IPC section '{document.metadata['section']}' in source data.")
+        seen_ids.add(doc_id)
+
+        doc_hash = content_hash(document)
+        document.metadata["content_hash"] = doc_hash
+
+        if doc_id not in existing_hashes:
+            plan["added"].append(document)
+        elif existing_hashes[doc_id] != doc_hash:
+            plan["updated"].append(document)
+        else:
+            plan["unchanged"].append(doc_id)
+
+    return plan
+
+
+_worker_embeddings = None
+
+
+def _init_embedding_worker(torch_threads: int):
+    """Load the embedding model once in each pool process."""
+    global _worker_embeddings
+
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    _worker_embeddings = create_embeddings()
+
+
+def _embed_batch(documents: list[Document]) -> tuple[list[Document], list[list[float]]]:
+    """Encode one batch of documents in a pool process."""
+    return documents, _worker_embeddings.embed_documents([doc.page_content for doc in documents])
+
+
+def distance_space(collection) -> str:
+    """Distance function of a Chroma collection (`l2` for collections created without one)."""
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    return hnsw.get("space") or (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def _upsert_batch(collection, documents: list[Document], vectors: list[list[float]]):
+    """Write one embedded batch to the Chroma collection."""
+    collection.upsert(
+        ids=[document_id(doc) for doc in documents],
+        embeddings=vectors,
+        metadatas=[doc.metadata for doc in documents],
+        documents=[doc.page_content for doc in documents]
+    )
+
+
+def embed_and_store(batches: Iterable[list[Document]], collection, workers: int) -> int:
+    """
+    Encode document batches across a CPU process pool and write each batch as it completes.
+
+    At most two batches per worker are in flight, so memory stays bounded no
+    matter how large the source corpus is. With a single worker the model is
+    loaded in-process and no pool is started.
+
+    Args:
+        batches (Iterable[list[Document]]): Batches of documents to embed.
+        collection: Chroma collection to upsert into.
+        workers (int): Number of encoder processes.
+
+    Returns:
+        int: Number of documents embedded.
+    """
+    embedded = 0
+    start = time.perf_counter()
+
+    def report(count: int):
+        elapsed = time.perf_counter() - start
+        print(f"📦 Embedded {embedded + count} documents ({(embedded + count) / elapsed:.1f} docs/sec)")
+
+    if workers <= 1:
+        embeddings = None
+        for batch in batches:
+            # Only load the model once there is something to embed
+            embeddings = embeddings or create_embeddings()
+            _upsert_batch(collection, batch, embeddings.embed_documents([doc.page_content for doc in batch]))
+            report(len(batch))
+            embedded += len(batch)
+        return embedded
+
+    torch_threads = max(1, (os.cpu_count() or workers) // workers)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_embedding_worker,
+        initargs=(torch_threads,)
+    ) as pool:
+        pending = set()
+        for batch in batches:
+            pending.add(pool.submit(_embed_batch, batch))
+            if len(pending) < workers * 2:
+                continue
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                documents, vectors = future.result()
+                _upsert_batch(collection, documents, vectors)
+                report(len(documents))
+                embedded += len(documents)
+
+        for future in wait(pending).done:
+            documents, vectors = future.result()
+            _upsert_batch(collection, documents, vectors)
+            report(len(documents))
+            embedded += len(documents)
+
+    return embedded
+
+
+def build_ipc_vectordb(incremental: bool = True, batch_size: int = None, workers: int = None) -> dict:
     """
     Build and persist a Chroma vectorstore for IPC sections.
+
+    Entries are streamed from the source file in batches. In incremental mode
+    only new or changed sections are embedded and sections no longer present
+    in the source are deleted. Otherwise the collection is dropped and every
+    section is re-embedded. The embedding model (`IPC_EMBEDDING_MODEL`) is
+    recorded in the collection metadata; changing it forces a full rebuild, as
+    does a collection created before cosine distance (`DISTANCE_SPACE`) was set.
+
+    Args:
+        incremental (bool): Embed only the diff against the stored collection.
+        batch_size (int): Documents per embedding batch (default: `EMBED_BATCH_SIZE` or 64).
+        workers (int): Encoder processes (default: `EMBED_WORKERS` or half the CPU cores).
+
+    Returns:
+        dict: Counts of added, updated, removed and unchanged sections.
     """
     # Load environment variables
     load_dotenv()
@@ -60,21 +290,97 @@ def build_ipc_vectordb():
     if not all([ipc_json_path, persist_dir_path, collection_name]):
         raise EnvironmentError("❌ Missing one or more required environment variables.")
 
-    # Load and process data
-    ipc_data = load_ipc_data(ipc_json_path)
-    documents = prepare_documents(ipc_data)
-
-    # Initialize embeddings and vectorstore
-    embeddings = HuggingFaceEmbeddings()
-    Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        persist_directory=persist_dir_path,
-        collection_name=collection_name
+    batch_size = batch_size or int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    workers = workers or int(os.getenv("EMBED_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+    # Open the collection directly - embeddings are computed by the pipeline below
+    client = chromadb.PersistentClient(path=persist_dir_path)
+    spec = embedding_spec()
+    if incremental:
+        # Vectors from another model cannot be diffed against, so a model change forces a full rebuild
+        try:
+            existing = client.get_collection(collection_name)
+        except Exception:
+            existing = None  # collection does not exist yet
+        built_with = ((existing.metadata if existing else None) or {}).get("embedding_model") or DEFAULT_EMBEDDING_MODEL
+        if existing is not None and built_with != spec["embedding_model"]:
+            print(f"♻️ Collection was built with '{built_with}'; re-embedding every section with '{spec['embedding_model']}'")
+            incremental = False
+        elif existing is not None and distance_space(existing) != DISTANCE_SPACE:
+            # Chroma cannot change the distance function of an existing collection
+            print(f"♻️ Collection uses '{distance_space(existing)}' distance; recreating it with '{DISTANCE_SPACE}'")
+            incremental = False
+    if not incremental:
+        try:
+            client.delete_collection(collection_name)
+        except Exception:
+            pass  # collection does not exist yet
+    collection = client.get_or_create_collection(
+        name=collection_name, embedding_function=None, metadata={"hnsw:space": DISTANCE_SPACE, **spec}
     )
+    # modify() replaces the metadata and rejects `hnsw:space`; the space stays in the collection configuration
+    collection.modify(metadata=spec)
+
+    stored = collection.get(include=["metadatas"])
+    existing_hashes = {
+        doc_id: (metadata or {}).get("content_hash")
+        for doc_id, metadata in zip(stored["ids"], stored["metadatas"])
+    }
+
+    summary = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    seen_ids = set()
+
+    def changed_documents():
+        # Stream, prepare and diff the source one batch at a time
+        for entries in iter_batches(iter_ipc_data(ipc_json_path), batch_size):
+            plan = plan_incremental_update(prepare_documents(entries), existing_hashes, seen_ids)
+            for key, value in plan.items():
+                summary[key] += len(value)
+            yield from plan["added"] + plan["updated"]
+
+    # Re-pack changed documents into full batches so sparse diffs still embed efficiently
+    start = time.perf_counter()
+    embedded = embed_and_store(iter_batches(changed_documents(), batch_size), collection, workers)
+    elapsed = time.perf_counter() - start
+
+    # Anything stored that is no longer in the source (including legacy random-ID duplicates)
+    removed = [doc_id for doc_id in existing_hashes if doc_id not in seen_ids]
+    if removed:
+        collection.delete(ids=removed)
+    summary["removed"] = len(removed)
 
-    print(f"✅ Vectorstore successfully created in collection '{collection_name}' at '{persist_dir_path}'")
+    # Keep the flat-matrix index (and its codes or chapter centroids) in sync when it backs search
+    if os.getenv("IPC_VECTOR_BACKEND") in ("numpy", "quantized", "routed"):
+        from retrieval.ipc_numpy_store import export_numpy_index, numpy_index_dir
+        print(f"🧮 Exported {export_numpy_index()} sections to numpy index at '{numpy_index_dir()}'")
+
+    # Precomputed offence results are only valid for the index they were searched on;
+    # an unchanged index with a current table is left alone so the model is not loaded
+    if os.getenv("IPC_OFFENCE_CACHE", "1") != "0":
+        from retrieval.offence_cache import build_offence_cache, offence_cache_current, offence_cache_path
+        if embedded or removed or not offence_cache_current():
+            counts = build_offence_cache()
+            print(f"🔥 Precomputed {counts['entries']} offence queries to '{offence_cache_path()}'")
+
+    if embedded:
+        print(f"⚡ Embedded {embedded} documents in {elapsed:.1f}s ({embedded / elapsed:.1f} docs/sec, {workers} worker(s), batch size {batch_size})")
+    print(
+        f"✅ Vectorstore '{collection_name}' at '{persist_dir_path}' is up to date: "
+        f"{summary['added']} added, {summary['updated']} updated, "
+        f"{summary['removed']} removed, {summary['unchanged']} unchanged"
+    )
+    return summary
 
 
 if __name__ == "__main__":
-    build_ipc_vectordb()
+    parser = argparse.ArgumentParser(description="Build or update the IPC sections vectorstore.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Drop the collection and re-embed every section instead of embedding only the diff."
+    )
+    parser.add_argument("--batch-size", type=int, help="Documents per embedding batch (default: EMBED_BATCH_SIZE or 64).")
+    parser.add_argument("--workers", type=int, help="Encoder processes (default: EMBED_WORKERS or half the CPU cores).")
+    args = parser.parse_args()
+
+    build_ipc_vectordb(incremental=not args.full, batch_size=args.batch_size, workers=args.workers)
@@ -0,0 +1,304 @@
+# job_service.py
+#
+# Local HTTP job service for the legal assistant.
+#
+#   python job_service.py [--host 127.0.0.1] [--port 8502] [--workers 4]
+#
+# Cases are queued and run by a bounded pool of worker threads that share one
+# process-wide embedding model, vector index, BM25 index and caches. Endpoints:
+#
+#   POST /jobs                 submit crew inputs (JSON), returns {"id", "status"} (503 when the queue is full)
+#   GET  /jobs/<id>            poll status, finished stages, complaint text so far, result and metrics
+#   GET  /jobs/<id>/stream     stream events as JSON lines until the job ends (?after=N resumes)
+#   GET  /health               queue and worker counts, warmup readiness (503 with the error if it failed)
+#   GET  /metrics              Prometheus text metrics of every run served
+#
+# Point the Streamlit app at it with LEGAL_JOB_SERVICE_URL=http://127.0.0.1:8502.
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+
+from pipeline.instrumentation import registry
+from pipeline.jobs import run_case
+from pipeline.startup import raise_warmup_error, start_warmup, warmup_status
+
+
+load_dotenv()
+
+
+def serialize_event(kind: str, payload) -> dict:
+    """
+    Convert a `run_case` event into JSON-friendly form.
+
+    Args:
+        kind (str): Event kind.
+        payload: TaskOutput, CrewOutput, str or dict depending on the kind.
+
+    Returns:
+        dict: `{"kind", "data"}`.
+    """
+    if kind in ("cached_intake", "task"):
+        data = {"agent": payload.agent, "raw": payload.raw}
+    elif kind == "result":
+        data = {"raw": payload.raw}
+    else:
+        data = payload
+    return {"kind": kind, "data": data}
+
+
+class Job:
+    """One submitted case and the events it has produced so far."""
+
+    def __init__(self, inputs: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.inputs = inputs
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.events = []
+
+    def snapshot(self) -> dict:
+        """Aggregated view of the job for polling clients."""
+        stages, complaint, result, metrics, error = [], "", None, None, None
+        for event in self.events:
+            kind, data = event["kind"], event["data"]
+            if kind in ("cached_intake", "task"):
+                stages.append({**data, "cached": kind == "cached_intake"})
+            elif kind == "token":
+                complaint += data
+            elif kind == "result":
+                result = data["raw"]
+            elif kind == "metrics":
+                metrics = data
+            elif kind == "error":
+                error = data["error"]
+
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "stages": stages,
+            "complaint": result if result is not None else complaint,
+            "metrics": metrics,
+            "error": error,
+            "events": len(self.events),
+        }
+
+
+class JobQueue:
+    """
+    Bounded queue of jobs run by a fixed pool of worker threads.
+
+    All workers run in this process, so they share the warm retrieval
+    resources and caches; each job gets its own crew copy.
+    """
+
+    def __init__(self, workers: int, max_pending: int, ttl_seconds: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.jobs = {}
+
+        self._changed = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="legal-job")
+
+    def submit(self, inputs: dict) -> Job | None:
+        """
+        Enqueue a case.
+
+        Args:
+            inputs (dict): Crew inputs.
+
+        Returns:
+            Job | None: The queued job, or None when `max_pending` jobs are already waiting or running.
+        """
+        with self._changed:
+            self._prune()
+            pending = sum(job.status in ("queued", "running") for job in self.jobs.values())
+            if pending >= self.max_pending:
+                return None
+            job = Job(inputs)
+            self.jobs[job.id] = job
+
+        self._pool.submit(self._run, job)
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished and job.finished < cutoff]:
+            del self.jobs[job_id]
+
+    def _append(self, job: Job, kind: str, data):
+        with self._changed:
+            job.events.append({"kind": kind, "data": data})
+            self._changed.notify_all()
+
+    def _run(self, job: Job):
+        with self._changed:
+            job.status = "running"
+            job.started = time.time()
+            self._changed.notify_all()
+
+        try:
+            raise_warmup_error()
+            for kind, payload in run_case(job.inputs, run_id=job.id):
+                event = serialize_event(kind, payload)
+                self._append(job, event["kind"], event["data"])
+            final_status = "done"
+        except Exception as error:
+            self._append(job, "error", {"error": f"{type(error).__name__}: {error}"})
+            final_status = "error"
+
+        with self._changed:
+            job.status = final_status
+            job.finished = time.time()
+            self._changed.notify_all()
+
+    def wait_for_events(self, job: Job, after: int, timeout: float = 15.0) -> tuple[list[dict], bool]:
+        """
+        Block until the job has events beyond `after` or has ended.
+
+        Args:
+            job (Job): The job to watch.
+            after (int): Number of events the caller has already seen.
+            timeout (float): Longest wait in seconds.
+
+        Returns:
+            tuple[list[dict], bool]: New events, and whether the job has ended.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(job.events) > after or job.finished is not None, timeout=timeout)
+            return job.events[after:], job.finished is not None
+
+    def health(self) -> dict:
+        """Queue and worker counts, and whether the pipeline warmed up."""
+        with self._changed:
+            statuses = [job.status for job in self.jobs.values()]
+        return {
+            "workers": self.workers,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "finished": statuses.count("done") + statuses.count("error"),
+            **warmup_status(),
+        }
+
+
+class JobServiceHandler(BaseHTTPRequestHandler):
+    queue: JobQueue = None
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            inputs = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))))
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "body must be a JSON object of crew inputs"})
+            return
+        if not isinstance(inputs, dict) or not str(inputs.get("user_input", "")).strip():
+            self._send_json(400, {"error": "'user_input' is required"})
+            return
+
+        job = self.queue.submit(inputs)
+        if job is None:
+            self._send_json(503, {"error": "job queue is full, retry later"})
+            return
+        self._send_json(202, {"id": job.id, "status": job.status})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+
+        if url.path == "/health":
+            health = self.queue.health()
+            self._send_json(503 if "error" in health else 200, health)
+        elif url.path == "/metrics":
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif len(parts) in (2, 3) and parts[0] == "jobs" and parts[1] in self.queue.jobs:
+            job = self.queue.jobs[parts[1]]
+            if len(parts) == 2:
+                self._send_json(200, job.snapshot())
+            elif parts[2] == "stream":
+                self._stream(job, int(parse_qs(url.query).get("after", ["0"])[0]))
+            else:
+                self._send_json(404, {"error": "not found"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _stream(self, job: Job, after: int):
+        # HTTP/1.0 response without Content-Length: the body ends when the connection closes
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+
+        finished = False
+        try:
+            while not finished:
+                events, finished = self.queue.wait_for_events(job, after)
+                # An empty line doubles as a keep-alive while a stage is still running
+                self.wfile.write("".join(json.dumps(event) + "\n" for event in events).encode("utf-8") or b"\n")
+                after += len(events)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client went away; the job keeps running and can be polled or re-streamed
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host: str, port: int, workers: int, max_pending: int):
+    JobServiceHandler.queue = JobQueue(
+        workers=workers,
+        max_pending=max_pending,
+        ttl_seconds=float(os.getenv("LEGAL_JOB_TTL_SECONDS", "3600"))
+    )
+    # Load crewAI, the embedding model and the indexes before the first job arrives
+    start_warmup()
+
+    server = ThreadingHTTPServer((host, port), JobServiceHandler)
+    server.daemon_threads = True
+    print(f"⚖️ Legal assistant job service on http://{host}:{port} ({workers} workers, up to {max_pending} pending jobs)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the legal assistant crew as a local job queue.")
+    parser.add_argument("--host", default=os.getenv("LEGAL_JOB_HOST", "127.0.0.1"), help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=int(os.getenv("LEGAL_JOB_PORT", "8502")), help="Port to bind.")
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("LEGAL_JOB_WORKERS", "4")),
+        help="Concurrent crew runs (default: LEGAL_JOB_WORKERS or 4)."
+    )
+    parser.add_argument(
+        "--max-pending", type=int, default=int(os.getenv("LEGAL_JOB_MAX_PENDING", "100")),
+        help="Queued plus running jobs accepted before returning 503."
+    )
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, args.max_pending)
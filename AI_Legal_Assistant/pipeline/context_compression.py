@@ -0,0 +1,225 @@
+# context_compression.py
+#
+# Shrink the IPC and precedent outputs the legal drafter receives as context.
+#
+# The drafter is the slowest stage and its prompt carries the full output of
+# every earlier stage. Before it runs, the IPC section output is reduced to the
+# clauses that overlap the case, the precedent paragraph loses near-duplicate
+# sentences, and both are cut to a share of a token budget at sentence
+# boundaries. Only the drafter's view is compressed: the stage outputs shown
+# in the UI and returned by the crew are untouched.
+
+import json
+import os
+import re
+
+from crewai import Task
+from crewai.events import crewai_event_bus
+from crewai.events.base_events import BaseEvent
+from crewai.tasks.task_output import TaskOutput
+
+from retrieval.ipc_bm25 import tokenize
+
+
+# Share of the budget given to each compressed context part
+IPC_SHARE = 0.6
+PRECEDENT_SHARE = 0.4
+
+# Sentences whose term sets overlap at least this much with a kept sentence are dropped
+DUPLICATE_JACCARD = 0.6
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.;:!?])\s+(?=[A-Z(\"'])")
+_JSON_ARRAY = re.compile(r"\[.*\]", re.DOTALL)
+
+
+class ContextCompressedEvent(BaseEvent):
+    """Emitted for each context part compressed for the drafter; counted by `pipeline.instrumentation`."""
+
+    type: str = "context_compressed"
+    part: str
+    tokens_before: int
+    tokens_after: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), close enough for budgeting."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split prose into sentences and clauses ending in `.`, `;`, `:`, `!` or `?`."""
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT.split(text) if sentence.strip()]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to about `max_tokens` at a sentence boundary.
+
+    Args:
+        text (str): Text to cut.
+        max_tokens (int): Token budget.
+
+    Returns:
+        str: Leading sentences that fit (at least the first one, hard-cut if needed).
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    kept, used = [], 0
+    for sentence in split_sentences(text):
+        cost = estimate_tokens(sentence)
+        if kept and used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+
+    result = " ".join(kept)
+    return result if estimate_tokens(result) <= max_tokens else result[:max_tokens * 4].rstrip() + "…"
+
+
+def relevant_clauses(content: str, case_terms: set[str], max_tokens: int) -> str:
+    """
+    Keep the defining first sentence of a section plus the clauses that share terms with the case.
+
+    Args:
+        content (str): Section text.
+        case_terms (set[str]): Tokenized terms of the case summary.
+        max_tokens (int): Token cap for the section.
+
+    Returns:
+        str: Selected clauses in their original order.
+    """
+    sentences = split_sentences(content)
+    if len(sentences) <= 1:
+        return truncate_to_tokens(content, max_tokens)
+
+    ranked = sorted(
+        range(1, len(sentences)),
+        key=lambda index: len(set(tokenize(sentences[index])) & case_terms),
+        reverse=True
+    )
+
+    keep, used = {0}, estimate_tokens(sentences[0])
+    for index in ranked:
+        cost = estimate_tokens(sentences[index])
+        if used + cost > max_tokens or not set(tokenize(sentences[index])) & case_terms:
+            continue
+        keep.add(index)
+        used += cost
+
+    return truncate_to_tokens(" ".join(sentences[index] for index in sorted(keep)), max_tokens)
+
+
+def compress_ipc_output(raw: str, case_text: str, max_tokens: int) -> str:
+    """
+    Reduce the IPC stage output to compact JSON with only the relevant clauses of each section.
+
+    Args:
+        raw (str): IPC agent output (a JSON list of sections, possibly fenced).
+        case_text (str): Case intake output used to judge relevance.
+        max_tokens (int): Token budget for the whole IPC part.
+
+    Returns:
+        str: Compressed output (plain truncation when the output is not JSON).
+    """
+    match = _JSON_ARRAY.search(raw)
+    try:
+        sections = json.loads(match.group(0)) if match else None
+    except json.JSONDecodeError:
+        sections = None
+    if not isinstance(sections, list) or not sections:
+        return truncate_to_tokens(raw, max_tokens)
+
+    case_terms = set(tokenize(case_text))
+    # Field names and section headers are kept whole; the remaining budget is split over section texts
+    per_section = max(32, max_tokens // len(sections) - 24)
+    compact = []
+    for section in sections:
+        if not isinstance(section, dict):
+            continue
+        section = dict(section)
+        if isinstance(section.get("content"), str):
+            section["content"] = relevant_clauses(section["content"], case_terms, per_section)
+        compact.append(section)
+
+    return json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
+
+
+def dedupe_sentences(text: str) -> str:
+    """
+    Drop sentences that repeat an earlier one (term-set Jaccard similarity of at least `DUPLICATE_JACCARD`).
+
+    Args:
+        text (str): Precedent summary paragraph(s).
+
+    Returns:
+        str: Text with near-duplicate sentences removed.
+    """
+    kept, kept_terms = [], []
+    for sentence in split_sentences(text):
+        terms = set(tokenize(sentence))
+        if terms and any(len(terms & other) / len(terms | other) >= DUPLICATE_JACCARD for other in kept_terms):
+            continue
+        kept.append(sentence)
+        kept_terms.append(terms)
+    return " ".join(kept)
+
+
+def compress_precedent_output(raw: str, max_tokens: int) -> str:
+    """
+    Deduplicate overlapping precedent summaries and cut them to `max_tokens`.
+
+    Args:
+        raw (str): Precedent agent output.
+        max_tokens (int): Token budget for the precedent part.
+
+    Returns:
+        str: Compressed output.
+    """
+    return truncate_to_tokens(dedupe_sentences(raw), max_tokens)
+
+
+def apply_context_compression(case_intake: Task, ipc_section: Task, legal_precedent: Task, legal_drafter: Task, budget: int = None):
+    """
+    Give the drafter compressed copies of the IPC and precedent outputs as context.
+
+    The drafter's context entries for the IPC and precedent tasks are replaced
+    by stand-in tasks (outside the crew, so they never execute) whose output is
+    filled in by a callback as each original task finishes. crewAI runs task
+    callbacks before the drafter starts, including for async tasks.
+
+    Args:
+        case_intake (Task): Intake task (its output is the relevance reference).
+        ipc_section (Task): IPC section task of the same crew.
+        legal_precedent (Task): Legal precedent task of the same crew.
+        legal_drafter (Task): Drafter task whose context is compressed.
+        budget (int): Token budget for the compressed parts (default: `LEGAL_DRAFTER_CONTEXT_TOKENS` or 1200).
+    """
+    budget = budget or int(os.getenv("LEGAL_DRAFTER_CONTEXT_TOKENS", "1200"))
+
+    def case_text() -> str:
+        return case_intake.output.raw if case_intake.output is not None else ""
+
+    parts = {
+        "ipc": (ipc_section, lambda raw: compress_ipc_output(raw, case_text(), int(budget * IPC_SHARE))),
+        "precedent": (legal_precedent, lambda raw: compress_precedent_output(raw, int(budget * PRECEDENT_SHARE))),
+    }
+
+    stand_ins = {}
+    for part, (task, compress) in parts.items():
+        stand_in = Task(description=task.description, expected_output=task.expected_output)
+        stand_ins[id(task)] = stand_in
+        task.callback = _compressing_callback(part, task, stand_in, legal_drafter, compress)
+
+    legal_drafter.context = [stand_ins.get(id(task), task) for task in legal_drafter.context]
+
+
+def _compressing_callback(part: str, task: Task, stand_in: Task, legal_drafter: Task, compress):
+    def callback(output: TaskOutput):
+        raw = compress(output.raw)
+        stand_in.output = output.model_copy(update={"raw": raw})
+
+        event = ContextCompressedEvent(part=part, tokens_before=estimate_tokens(output.raw), tokens_after=estimate_tokens(raw))
+        event.task_id = str(legal_drafter.id)
+        crewai_event_bus.emit(task, event)
+    return callback
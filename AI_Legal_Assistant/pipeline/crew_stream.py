@@ -0,0 +1,69 @@
+# crew_stream.py
+
+import queue
+import threading
+from typing import Iterator
+
+try:
+    from crewai.events import LLMStreamChunkEvent, crewai_event_bus
+except ImportError:  # older crewAI releases keep the event bus under utilities
+    try:
+        from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+    except ImportError:
+        LLMStreamChunkEvent = crewai_event_bus = None
+
+
+# Streaming LLM instance id -> queue of the run that owns it
+_token_queues = {}
+
+if crewai_event_bus is not None:
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _forward_chunk(source, event):
+        events = _token_queues.get(id(source))
+        if events is not None:
+            events.put(("token", event.chunk))
+
+
+def stream_crew(crew, inputs: dict) -> Iterator[tuple[str, object]]:
+    """
+    Kick off a crew in a background thread and yield its progress as it happens.
+
+    Every agent whose LLM has `stream` enabled forwards its chunks; the caller
+    stays on its own thread (e.g. the Streamlit script thread) and renders
+    events as they arrive.
+
+    Args:
+        crew (Crew): A crew built for this run (see `build_legal_assistant_crew`).
+        inputs (dict): Crew inputs.
+
+    Yields:
+        tuple[str, object]: `("task", TaskOutput)` when a stage completes,
+        `("token", str)` for each streamed chunk, and finally `("result", CrewOutput)`.
+        Exceptions raised by the crew are re-raised in the caller.
+    """
+    events = queue.Queue()
+    crew.task_callback = lambda output: events.put(("task", output))
+
+    streaming_llms = [agent.llm for agent in crew.agents if getattr(agent.llm, "stream", False)]
+    for llm in streaming_llms:
+        _token_queues[id(llm)] = events
+
+    def run():
+        try:
+            events.put(("result", crew.kickoff(inputs=inputs)))
+        except Exception as error:
+            events.put(("error", error))
+
+    threading.Thread(target=run, name="crew-stream", daemon=True).start()
+
+    try:
+        while True:
+            kind, payload = events.get()
+            if kind == "error":
+                raise payload
+            yield kind, payload
+            if kind == "result":
+                return
+    finally:
+        for llm in streaming_llms:
+            _token_queues.pop(id(llm), None)
@@ -0,0 +1,259 @@
+# hedging.py
+#
+# Deadlines and hedged requests for slow external calls (Groq LLM, Tavily search).
+#
+# `run_with_deadline` runs a call on a worker thread and stops waiting for it once
+# its deadline passes. In hedging mode, when the call is still running after the
+# p95 latency observed for that kind of call, an identical duplicate is fired and
+# whichever finishes first wins; the other is left to finish in the background and
+# its result discarded. Tail latency drops to roughly p95 + p50 at the cost of a
+# few percent extra requests. LLM calls are hedged at the provider request
+# (`pipeline.rate_limit`), below crewAI's events and token accounting.
+
+import contextvars
+import datetime
+import json
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from crewai.context import get_current_task_id
+
+
+# Hedge delay used until a call kind has enough latency samples
+DEFAULT_HEDGE_DELAYS = {"llm": 8.0, "llm_request": 8.0, "search": 2.0}
+
+# Latency samples needed before the observed quantile replaces the default delay
+MIN_SAMPLES = 20
+
+
+class DeadlineExceeded(TimeoutError):
+    """A stage or call ran past its deadline."""
+
+
+class LatencyTracker:
+    """Recent successful-call latencies of one call kind and the hedge delay derived from them."""
+
+    def __init__(self, default_delay: float, window: int = 500):
+        self.default_delay = default_delay
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """Latency at quantile `q` of the recent samples, or None with fewer than `MIN_SAMPLES`."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait before hedging (`LEGAL_HEDGE_QUANTILE` of recent latency, default p95)."""
+        observed = self.quantile(float(os.getenv("LEGAL_HEDGE_QUANTILE", "0.95")))
+        return observed if observed is not None else self.default_delay
+
+
+_lock = threading.Lock()
+_trackers = {}
+_counters = {}
+_pool = None
+
+# Task id -> running Task, for calls that are not handed their task (tools)
+_stage_tasks = weakref.WeakValueDictionary()
+
+
+def _tracker(kind: str) -> LatencyTracker:
+    with _lock:
+        if kind not in _trackers:
+            _trackers[kind] = LatencyTracker(DEFAULT_HEDGE_DELAYS.get(kind, 5.0))
+            _counters[kind] = {"calls": 0, "hedges_fired": 0, "hedges_won": 0, "deadlines_exceeded": 0, "hedge_tokens": 0}
+        return _trackers[kind]
+
+
+def _count(kind: str, counter: str, amount: int = 1):
+    with _lock:
+        _counters[kind][counter] += amount
+
+
+def record_hedge_tokens(kind: str, tokens: int):
+    """Count tokens spent by a hedged attempt whose result was discarded."""
+    _tracker(kind)
+    _count(kind, "hedge_tokens", tokens)
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    # Calls abandoned at their deadline keep a worker busy until they return, so the pool is generous
+    global _pool
+
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=int(os.getenv("LEGAL_HEDGE_WORKERS", "32")), thread_name_prefix="hedged-call"
+            )
+        return _pool
+
+
+def hedging_enabled(kind: str) -> bool:
+    """
+    Whether calls of a kind are hedged.
+
+    `LEGAL_HEDGING` is off by default; `1` / `all` hedges every kind, or list kinds, e.g. `llm,search`.
+    """
+    value = os.getenv("LEGAL_HEDGING", "0").strip().lower()
+    if value in ("1", "all"):
+        return True
+    return kind in {part.strip() for part in value.split(",")}
+
+
+def stage_deadline(task) -> float | None:
+    """
+    Deadline of the stage a task belongs to, as a `time.monotonic()` value.
+
+    Budgets come from `LEGAL_STAGE_DEADLINES` (JSON object of agent role -> seconds) with
+    `LEGAL_STAGE_DEADLINE_SECONDS` as the default for other stages (unset or 0: no deadline).
+    The budget counts from the task's start, across all its LLM calls, tool calls and retries.
+
+    Args:
+        task (Task): The running task (None outside a crew).
+
+    Returns:
+        float | None: Monotonic deadline, or None when the stage has no budget.
+    """
+    if task is None or task.start_time is None:
+        return None
+
+    budgets = json.loads(os.getenv("LEGAL_STAGE_DEADLINES") or "{}")
+    role = task.agent.role if task.agent is not None else None
+    budget = float(budgets.get(role, os.getenv("LEGAL_STAGE_DEADLINE_SECONDS", "0")))
+    if budget <= 0:
+        return None
+
+    elapsed = (datetime.datetime.now() - task.start_time).total_seconds()
+    return time.monotonic() + budget - elapsed
+
+
+def track_stage(task):
+    """Remember a running task so tool calls made for it can find its deadline (`current_stage_deadline`)."""
+    if task is not None:
+        with _lock:
+            _stage_tasks[str(task.id)] = task
+
+
+def current_stage_deadline() -> float | None:
+    """
+    Deadline of the stage running in this context, for calls that are not handed their task.
+
+    Tools run inside the task's context, where crewAI keeps the current task id;
+    the task itself was registered by its first LLM call (`track_stage`).
+
+    Returns:
+        float | None: Monotonic deadline, or None outside a crew or when the stage has no budget.
+    """
+    task_id = get_current_task_id()
+    with _lock:
+        task = _stage_tasks.get(task_id) if task_id else None
+    return stage_deadline(task)
+
+
+def _remaining(deadline: float | None, cap: float = None) -> float | None:
+    if deadline is None:
+        return cap
+    remaining = max(0.0, deadline - time.monotonic())
+    return remaining if cap is None else min(remaining, cap)
+
+
+def run_with_deadline(kind: str, operation, deadline: float = None, hedge: bool = False):
+    """
+    Run a call, giving up at `deadline` and optionally hedging it.
+
+    Without a deadline or hedging the call runs inline. Otherwise each attempt runs
+    on a worker thread with a copy of the caller's context variables.
+
+    Args:
+        kind (str): Call kind for latency tracking and counters (`llm`, `llm_request`, `search`).
+        operation (Callable[[], Any]): The call; with `hedge`, it must be safe to run twice concurrently.
+        deadline (float): `time.monotonic()` value after which `DeadlineExceeded` is raised.
+        hedge (bool): Fire a duplicate attempt once the call outlives the hedge delay.
+
+    Returns:
+        Any: Result of the first attempt to succeed.
+
+    Raises:
+        DeadlineExceeded: No attempt succeeded before the deadline.
+        Exception: The first attempt's error when every attempt failed.
+    """
+    tracker = _tracker(kind)
+    _count(kind, "calls")
+
+    if deadline is None and not hedge:
+        start = time.monotonic()
+        result = operation()
+        tracker.record(time.monotonic() - start)
+        return result
+
+    if _remaining(deadline) == 0:
+        _count(kind, "deadlines_exceeded")
+        raise DeadlineExceeded(f"❌ {kind} call not started: its stage deadline has passed")
+
+    def attempt():
+        start = time.monotonic()
+        result = operation()
+        tracker.record(time.monotonic() - start)
+        return result
+
+    def submit():
+        return _get_pool().submit(contextvars.copy_context().run, attempt)
+
+    primary = submit()
+    pending, hedged = {primary}, None
+
+    if hedge:
+        done, _ = wait(pending, timeout=_remaining(deadline, cap=tracker.hedge_delay()))
+        if not done and _remaining(deadline) != 0:
+            hedged = submit()
+            pending.add(hedged)
+            _count(kind, "hedges_fired")
+
+    errors = {}
+    while pending:
+        done, pending = wait(pending, timeout=_remaining(deadline), return_when=FIRST_COMPLETED)
+        if not done:
+            _count(kind, "deadlines_exceeded")
+            raise DeadlineExceeded(f"❌ {kind} call exceeded its deadline")
+        for future in done:
+            if future.exception() is None:
+                if future is hedged:
+                    _count(kind, "hedges_won")
+                return future.result()
+            errors[future] = future.exception()
+
+    # The duplicate's error (e.g. it could not get a rate-limit permit) never hides the call's own
+    raise errors.get(primary) or next(iter(errors.values()))
+
+
+def hedge_stats() -> dict:
+    """
+    Counters and current hedge delay per call kind.
+
+    Returns:
+        dict: Kind -> calls, hedges fired / won, deadlines exceeded, tokens of discarded attempts, hedge delay and observed p50/p99 seconds.
+    """
+    with _lock:
+        kinds = {kind: (tracker, dict(_counters[kind])) for kind, tracker in _trackers.items()}
+
+    stats = {}
+    for kind, (tracker, counters) in kinds.items():
+        stats[kind] = {
+            **counters,
+            "hedge_delay_seconds": round(tracker.hedge_delay(), 3),
+            "p50_seconds": round(tracker.quantile(0.5) or 0.0, 3),
+            "p99_seconds": round(tracker.quantile(0.99) or 0.0, 3),
+        }
+    return stats
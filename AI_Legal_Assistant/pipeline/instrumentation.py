@@ -0,0 +1,355 @@
+# instrumentation.py
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crewai.events import (
+    LLMCallCompletedEvent,
+    LLMCallFailedEvent,
+    LLMCallStartedEvent,
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    TaskStartedEvent,
+    ToolUsageErrorEvent,
+    ToolUsageFinishedEvent,
+    crewai_event_bus,
+)
+
+from pipeline.context_compression import ContextCompressedEvent
+from pipeline.hedging import hedge_stats
+from pipeline.rate_limit import LLMQueuedEvent, limiter_stats
+
+
+# Task id -> RunMetrics of the crew run that owns the task
+_runs_by_task = {}
+_runs_lock = threading.Lock()
+
+
+def _new_stage() -> dict:
+    return {
+        "wall_seconds": 0.0,
+        "llm_calls": 0,
+        "llm_seconds": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "retries": 0,
+        "queue_seconds": 0.0,
+        "rate_limited": 0,
+        "tool_calls": 0,
+        "context_tokens_before": 0,
+        "context_tokens_after": 0,
+    }
+
+
+def _new_tool() -> dict:
+    return {"calls": 0, "seconds": 0.0, "errors": 0}
+
+
+class RunMetrics:
+    """
+    Wall time, LLM calls, tokens and retries per stage and per tool for one crew run.
+
+    Stages are keyed by agent role. Figures are collected from crewAI events,
+    whose timestamps are taken when the event fires, so they stay accurate
+    even though the event bus runs handlers on a thread pool.
+    """
+
+    def __init__(self, crew, run_id: str = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.wall_seconds = None
+        self.stages = {}
+        self.tools = {}
+
+        self._lock = threading.Lock()
+        self._task_stages = {str(task.id): task.agent.role for task in crew.tasks}
+        self._started_at = {}
+
+    def _stage(self, event) -> dict:
+        name = self._task_stages.get(event.task_id) or event.agent_role or "unknown"
+        return self.stages.setdefault(name, _new_stage())
+
+    def record(self, event):
+        """Fold one crewAI event into the counters."""
+        with self._lock:
+            if isinstance(event, (TaskStartedEvent, LLMCallStartedEvent)):
+                key = event.call_id if isinstance(event, LLMCallStartedEvent) else event.task_id
+                self._started_at[key] = event.timestamp
+                self._stage(event)
+
+            elif isinstance(event, (TaskCompletedEvent, TaskFailedEvent)):
+                started = self._started_at.pop(event.task_id, None)
+                if started is not None:
+                    self._stage(event)["wall_seconds"] += (event.timestamp - started).total_seconds()
+
+            elif isinstance(event, LLMCallCompletedEvent):
+                stage = self._stage(event)
+                stage["llm_calls"] += 1
+                started = self._started_at.pop(event.call_id, None)
+                if started is not None:
+                    stage["llm_seconds"] += (event.timestamp - started).total_seconds()
+                usage = event.usage or {}
+                stage["prompt_tokens"] += usage.get("prompt_tokens") or 0
+                stage["completion_tokens"] += usage.get("completion_tokens") or 0
+
+            elif isinstance(event, LLMCallFailedEvent):
+                # The agent executor retries failed calls, so every failure costs one more call
+                self._started_at.pop(event.call_id, None)
+                self._stage(event)["retries"] += 1
+
+            elif isinstance(event, LLMQueuedEvent):
+                stage = self._stage(event)
+                stage["queue_seconds"] += event.wait_seconds
+                stage["rate_limited"] += int(event.throttled)
+
+            elif isinstance(event, ToolUsageFinishedEvent):
+                tool = self.tools.setdefault(event.tool_name, _new_tool())
+                tool["calls"] += 1
+                tool["seconds"] += (event.finished_at - event.started_at).total_seconds()
+                self._stage(event)["tool_calls"] += 1
+
+            elif isinstance(event, ToolUsageErrorEvent):
+                self.tools.setdefault(event.tool_name, _new_tool())["errors"] += 1
+                self._stage(event)["retries"] += 1
+
+            elif isinstance(event, ContextCompressedEvent):
+                stage = self._stage(event)
+                stage["context_tokens_before"] += event.tokens_before
+                stage["context_tokens_after"] += event.tokens_after
+
+    def summary(self) -> dict:
+        """
+        Snapshot of the run's counters.
+
+        Returns:
+            dict: Run id, start time, total wall time and per-stage / per-tool figures.
+        """
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "started": self.started,
+                "wall_seconds": self.wall_seconds,
+                "stages": {name: {key: round(value, 3) for key, value in stage.items()} for name, stage in self.stages.items()},
+                "tools": {name: {key: round(value, 3) for key, value in tool.items()} for name, tool in self.tools.items()},
+            }
+
+
+def _route(source, event):
+    with _runs_lock:
+        run = _runs_by_task.get(event.task_id)
+    if run is not None:
+        run.record(event)
+
+
+for _event_type in (
+    TaskStartedEvent, TaskCompletedEvent, TaskFailedEvent,
+    LLMCallStartedEvent, LLMCallCompletedEvent, LLMCallFailedEvent,
+    ToolUsageFinishedEvent, ToolUsageErrorEvent, ContextCompressedEvent, LLMQueuedEvent,
+):
+    crewai_event_bus.on(_event_type)(_route)
+
+
+class MetricsRegistry:
+    """Process-wide totals over every finished run, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.run_seconds = 0.0
+        self.stages = {}
+        self.tools = {}
+
+    def add(self, summary: dict):
+        """Accumulate a `RunMetrics.summary()`."""
+        with self._lock:
+            self.runs += 1
+            self.run_seconds += summary["wall_seconds"] or 0.0
+            for name, stage in summary["stages"].items():
+                totals = self.stages.setdefault(name, {**_new_stage(), "runs": 0})
+                totals["runs"] += 1
+                for key, value in stage.items():
+                    totals[key] += value
+            for name, tool in summary["tools"].items():
+                totals = self.tools.setdefault(name, _new_tool())
+                for key, value in tool.items():
+                    totals[key] += value
+
+    def render(self) -> str:
+        """
+        Prometheus exposition text.
+
+        Returns:
+            str: Counters for runs, stages and tools, the LLM rate limiter state and hedging counters.
+        """
+        with self._lock:
+            lines = [
+                "# TYPE legal_crew_runs_total counter",
+                f"legal_crew_runs_total {self.runs}",
+                "# TYPE legal_crew_run_seconds_total counter",
+                f"legal_crew_run_seconds_total {self.run_seconds:.3f}",
+            ]
+            stage_metrics = [
+                ("legal_stage_runs_total", "runs"),
+                ("legal_stage_seconds_total", "wall_seconds"),
+                ("legal_stage_llm_calls_total", "llm_calls"),
+                ("legal_stage_llm_seconds_total", "llm_seconds"),
+                ("legal_stage_prompt_tokens_total", "prompt_tokens"),
+                ("legal_stage_completion_tokens_total", "completion_tokens"),
+                ("legal_stage_retries_total", "retries"),
+                ("legal_stage_llm_queue_seconds_total", "queue_seconds"),
+                ("legal_stage_llm_rate_limited_total", "rate_limited"),
+                ("legal_stage_tool_calls_total", "tool_calls"),
+                ("legal_stage_context_tokens_before_total", "context_tokens_before"),
+                ("legal_stage_context_tokens_after_total", "context_tokens_after"),
+            ]
+            for metric, key in stage_metrics:
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f'{metric}{{stage="{name}"}} {stage[key]:g}' for name, stage in self.stages.items())
+
+            tool_metrics = [
+                ("legal_tool_calls_total", "calls"),
+                ("legal_tool_seconds_total", "seconds"),
+                ("legal_tool_errors_total", "errors"),
+            ]
+            for metric, key in tool_metrics:
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f'{metric}{{tool="{name}"}} {tool[key]:g}' for name, tool in self.tools.items())
+
+        # Live state of the shared LLM rate limiters (pipeline/rate_limit.py)
+        limiters = limiter_stats()
+        limiter_metrics = [
+            ("legal_llm_limiter_calls_total", "counter", "calls"),
+            ("legal_llm_limiter_throttled_total", "counter", "throttled"),
+            ("legal_llm_limiter_queue_seconds_total", "counter", "queue_seconds"),
+            ("legal_llm_limiter_queue_p95_seconds", "gauge", "queue_p95_seconds"),
+            ("legal_llm_limiter_concurrency", "gauge", "concurrency"),
+            ("legal_llm_limiter_in_flight", "gauge", "in_flight"),
+        ]
+        for metric, kind, key in limiter_metrics:
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(f'{metric}{{model="{model}"}} {stats[key]:g}' for model, stats in limiters.items())
+
+        # Deadlines and hedged requests per call kind (pipeline/hedging.py)
+        hedges = hedge_stats()
+        hedge_metrics = [
+            ("legal_call_total", "counter", "calls"),
+            ("legal_call_hedges_fired_total", "counter", "hedges_fired"),
+            ("legal_call_hedges_won_total", "counter", "hedges_won"),
+            ("legal_call_deadlines_exceeded_total", "counter", "deadlines_exceeded"),
+            ("legal_call_hedge_tokens_total", "counter", "hedge_tokens"),
+            ("legal_call_hedge_delay_seconds", "gauge", "hedge_delay_seconds"),
+            ("legal_call_p99_seconds", "gauge", "p99_seconds"),
+        ]
+        for metric, kind, key in hedge_metrics:
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(f'{metric}{{kind="{name}"}} {stats[key]:g}' for name, stats in hedges.items())
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def metrics_log_path() -> str | None:
+    """
+    JSON lines file that receives one record per finished run.
+
+    Returns:
+        str | None: `LEGAL_METRICS_PATH`, `<PERSIST_DIRECTORY_PATH>/pipeline_metrics.jsonl` by default, or None when set to `0`.
+    """
+    path = os.getenv("LEGAL_METRICS_PATH")
+    if path == "0":
+        return None
+    return path or os.path.join(os.getenv("PERSIST_DIRECTORY_PATH", "."), "pipeline_metrics.jsonl")
+
+
+_log_lock = threading.Lock()
+
+
+@contextmanager
+def track_crew_run(crew, run_id: str = None):
+    """
+    Collect metrics for one kickoff of `crew`.
+
+    On exit the run is added to the process-wide `registry` and appended to
+    `metrics_log_path()` as one JSON line.
+
+    Args:
+        crew (Crew): The crew about to be kicked off (see `build_legal_assistant_crew`).
+        run_id (str): Identifier written with the metrics (default: random).
+
+    Yields:
+        RunMetrics: Live counters for the run.
+    """
+    run = RunMetrics(crew, run_id)
+    with _runs_lock:
+        for task_id in run._task_stages:
+            _runs_by_task[task_id] = run
+
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.wall_seconds = round(time.perf_counter() - start, 3)
+        crewai_event_bus.flush(timeout=5)
+        with _runs_lock:
+            for task_id in run._task_stages:
+                _runs_by_task.pop(task_id, None)
+
+        summary = run.summary()
+        registry.add(summary)
+        path = metrics_log_path()
+        if path:
+            with _log_lock, open(path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(summary) + "\n")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port: int = None) -> ThreadingHTTPServer | None:
+    """
+    Serve `registry` at `http://127.0.0.1:<port>/metrics` from a daemon thread (once per process).
+
+    Args:
+        port (int): Port to listen on (default: `LEGAL_METRICS_PORT`; disabled when unset).
+
+    Returns:
+        ThreadingHTTPServer | None: The running server, or None when disabled.
+    """
+    global _server
+
+    port = port or int(os.getenv("LEGAL_METRICS_PORT", "0"))
+    if not port:
+        return None
+
+    with _runs_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+            except OSError:
+                # Another process (e.g. a second Streamlit worker) already serves this port
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,261 @@
+# intake_cache.py
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from crewai.tasks.task_output import TaskOutput
+
+from crew import build_legal_assistant_crew, legal_assistant_crew
+
+
+def normalize_incident(text: str) -> str:
+    """Lowercase and reduce punctuation and whitespace runs to one space so resubmits and retries share a key."""
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+
+class IntakeCache:
+    """
+    SQLite cache of case intake outputs keyed by normalized incident text and intake model.
+
+    The intake LLM runs at temperature 0, so its structured JSON is a pure
+    function of the incident text, the model and the task prompt. Entries
+    expire after `ttl_seconds`; beyond `max_entries` the least recently used
+    are evicted. Each entry keeps how long the intake originally took and how
+    often it was reused, so time saved can be reported across restarts.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS intake_outputs ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, output TEXT NOT NULL, seconds REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(incident_text: str, model_id: str) -> str:
+        """
+        Cache key for an incident.
+
+        Args:
+            incident_text (str): The user's incident description.
+            model_id (str): Intake model and prompt fingerprint (see `intake_model_id`).
+
+        Returns:
+            str: SHA-256 hex digest.
+        """
+        payload = json.dumps([normalize_incident(incident_text), model_id])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        """
+        Look up a cached intake output.
+
+        Args:
+            key (str): Key from `IntakeCache.key`.
+
+        Returns:
+            tuple[str, float] | None: Raw intake output and the seconds it originally took, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT output, seconds, created FROM intake_outputs WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[2] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE intake_outputs SET hits = hits + 1, last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            self.seconds_saved += row[1]
+            return row[0], row[1]
+
+    def put(self, key: str, model_id: str, output: str, seconds: float):
+        """
+        Store an intake output.
+
+        Args:
+            key (str): Key from `IntakeCache.key`.
+            model_id (str): Intake model and prompt fingerprint.
+            output (str): Raw intake output.
+            seconds (float): How long the intake stage took.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO intake_outputs (key, model, output, seconds, hits, created, last_used)"
+                " VALUES (?, ?, ?, ?, 0, ?, ?)",
+                (key, model_id, output, seconds, now, now)
+            )
+            (count,) = self._db.execute("SELECT COUNT(*) FROM intake_outputs").fetchone()
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM intake_outputs WHERE key IN"
+                    " (SELECT key FROM intake_outputs ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._db.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Delete entries older than the TTL.
+
+        Returns:
+            int: Number of deleted entries.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM intake_outputs WHERE created < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        """
+        Hit rate and time saved, since the cache was opened and over the lifetime of the file.
+
+        Returns:
+            dict: Process hits, misses, hit rate and seconds saved; stored entries, lifetime hits and seconds saved.
+        """
+        with self._lock:
+            entries, lifetime_hits, lifetime_saved = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(hits * seconds), 0) FROM intake_outputs"
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "seconds_saved": round(self.seconds_saved, 2),
+            "entries": entries,
+            "lifetime_hits": lifetime_hits,
+            "lifetime_seconds_saved": round(lifetime_saved, 2),
+        }
+
+    def close(self):
+        """Close the SQLite file."""
+        with self._lock:
+            self._db.close()
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def get_intake_cache() -> IntakeCache | None:
+    """
+    Return the process-wide intake cache.
+
+    Returns:
+        IntakeCache | None: The cache, or None when `LEGAL_INTAKE_CACHE=0`.
+    """
+    global _cache
+
+    if os.getenv("LEGAL_INTAKE_CACHE", "1") == "0":
+        return None
+
+    with _lock:
+        if _cache is None:
+            path = os.getenv("LEGAL_INTAKE_CACHE_PATH") or os.path.join(
+                os.getenv("PERSIST_DIRECTORY_PATH", "."), "intake_cache.sqlite3"
+            )
+            _cache = IntakeCache(
+                path,
+                ttl_seconds=float(os.getenv("LEGAL_INTAKE_CACHE_TTL_SECONDS", "2592000")),
+                max_entries=int(os.getenv("LEGAL_INTAKE_CACHE_SIZE", "10000"))
+            )
+            _cache.purge_expired()
+        return _cache
+
+
+def intake_model_id() -> str:
+    """
+    Identify what the intake output depends on besides the incident text.
+
+    Returns:
+        str: Model name, temperature and a hash of the intake prompt template.
+    """
+    intake_task = legal_assistant_crew.tasks[0]
+    llm = intake_task.agent.llm
+    prompt = hashlib.sha256(f"{intake_task.description}\0{intake_task.expected_output}".encode("utf-8")).hexdigest()[:12]
+    return f"{llm.model}|t={llm.temperature}|{prompt}"
+
+
+def build_crew_for_case(inputs: dict, parallel: bool = None, stream: bool = False):
+    """
+    Build a crew for one case, skipping case intake when its output is cached.
+
+    On a miss the intake task stores its output in the cache as soon as it finishes.
+
+    Args:
+        inputs (dict): Crew inputs (`user_input` is the cached text).
+        parallel (bool): See `build_legal_assistant_crew`.
+        stream (bool): See `build_legal_assistant_crew`.
+
+    Returns:
+        tuple[Crew, TaskOutput | None]: The crew, and the cached intake output on a hit.
+    """
+    cache = get_intake_cache()
+    if cache is None:
+        return build_legal_assistant_crew(parallel=parallel, stream=stream), None
+
+    model_id = intake_model_id()
+    key = IntakeCache.key(inputs["user_input"], model_id)
+    cached = cache.get(key)
+
+    if cached is not None:
+        raw, _ = cached
+        intake_task = legal_assistant_crew.tasks[0]
+        intake_output = TaskOutput(
+            description=intake_task.description,
+            name=intake_task.name,
+            expected_output=intake_task.expected_output,
+            raw=raw,
+            agent=intake_task.agent.role,
+        )
+        crew = build_legal_assistant_crew(parallel=parallel, stream=stream, cached_intake=intake_output)
+        return crew, intake_output
+
+    crew = build_legal_assistant_crew(parallel=parallel, stream=stream)
+    intake_task = crew.tasks[0]
+
+    def store(output: TaskOutput):
+        seconds = (datetime.datetime.now() - intake_task.start_time).total_seconds() if intake_task.start_time else 0.0
+        cache.put(key, model_id, output.raw, seconds)
+
+    intake_task.callback = store
+    return crew, None
+
+
+if __name__ == "__main__":
+    cache = get_intake_cache()
+    if cache is None:
+        print("Intake cache is disabled (LEGAL_INTAKE_CACHE=0)")
+    else:
+        stats = cache.stats()
+        print(f"🗃️ Intake cache at '{cache.path}'")
+        print(
+            f"   {stats['entries']} entries, {stats['lifetime_hits']} hits, "
+            f"{stats['lifetime_seconds_saved']:.1f}s of intake LLM time saved"
+        )
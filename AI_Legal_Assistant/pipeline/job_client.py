@@ -0,0 +1,118 @@
+# job_client.py
+#
+# Client for `job_service.py`: submits a case and replays its event stream with
+# the same event kinds as `pipeline.jobs.run_case`, so callers do not care
+# whether the crew runs in-process or in the job service.
+
+import json
+import os
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+from typing import Iterator
+
+
+# Reconnects in a row (without a new event in between) before a lost stream is an error
+STREAM_RETRIES = 3
+
+
+class JobServiceError(RuntimeError):
+    """The job service rejected a case or the job failed."""
+
+
+def job_service_url() -> str | None:
+    """Base URL of the job service (`LEGAL_JOB_SERVICE_URL`), or None to run the crew in-process."""
+    url = os.getenv("LEGAL_JOB_SERVICE_URL", "").strip()
+    return url.rstrip("/") or None
+
+
+def submit_job(base_url: str, inputs: dict, timeout: float = 30.0) -> str:
+    """
+    Submit a case to the job service.
+
+    Args:
+        base_url (str): Service URL, e.g. `http://127.0.0.1:8502`.
+        inputs (dict): Crew inputs.
+        timeout (float): Request timeout in seconds.
+
+    Returns:
+        str: Job id.
+
+    Raises:
+        JobServiceError: The service refused the case or could not be reached.
+    """
+    request = urllib.request.Request(
+        f"{base_url}/jobs",
+        data=json.dumps(inputs).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())["id"]
+    except urllib.error.HTTPError as error:
+        raise JobServiceError(f"Job service returned {error.code}: {error.read().decode('utf-8', 'replace')}") from error
+    except OSError as error:  # URLError, refused connections, timeouts
+        raise JobServiceError(f"Cannot reach the job service at {base_url}: {error}") from error
+
+
+def _job_finished(base_url: str, job_id: str, timeout: float) -> bool:
+    try:
+        with urllib.request.urlopen(f"{base_url}/jobs/{job_id}", timeout=timeout) as response:
+            return json.loads(response.read())["status"] in ("done", "error")
+    except urllib.error.HTTPError as error:
+        raise JobServiceError(f"Job service returned {error.code} for job {job_id}") from error
+    except OSError as error:
+        raise JobServiceError(f"Lost the job service at {base_url}: {error}") from error
+
+
+def run_case_remote(base_url: str, inputs: dict, timeout: float = 60.0) -> Iterator[tuple[str, object]]:
+    """
+    Submit a case and stream its events from the job service.
+
+    Args:
+        base_url (str): Service URL.
+        inputs (dict): Crew inputs.
+        timeout (float): Socket timeout between events in seconds (the service sends
+            at least every 15 seconds while a job runs).
+
+    Yields:
+        tuple[str, object]: Same kinds as `run_case`; stage and result payloads are
+        namespaces with `agent`/`raw` and `raw` attributes, metrics a dict.
+
+    Raises:
+        JobServiceError: The job failed, or the service was unreachable or dropped the
+            stream more than `STREAM_RETRIES` times in a row.
+    """
+    job_id = submit_job(base_url, inputs)
+    seen = 0
+    failures = 0
+
+    while True:
+        # Reconnect with ?after= if the stream drops before the job ends
+        try:
+            with urllib.request.urlopen(f"{base_url}/jobs/{job_id}/stream?after={seen}", timeout=timeout) as response:
+                for line in response:
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    seen += 1
+                    failures = 0
+                    kind, data = event["kind"], event["data"]
+                    if kind == "error":
+                        raise JobServiceError(data["error"])
+                    if kind in ("cached_intake", "task", "result"):
+                        data = SimpleNamespace(**data)
+                    yield kind, data
+                    if kind == "metrics":
+                        return
+        except urllib.error.HTTPError as error:
+            raise JobServiceError(f"Job service returned {error.code} for job {job_id}") from error
+        except OSError as error:  # URLError, connection resets, timeouts
+            failures += 1
+            if failures > STREAM_RETRIES:
+                raise JobServiceError(f"Lost the job service at {base_url}: {error}") from error
+            continue
+
+        if _job_finished(base_url, job_id, timeout):
+            return
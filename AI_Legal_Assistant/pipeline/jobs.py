@@ -0,0 +1,38 @@
+# jobs.py
+
+from typing import Iterator
+
+from pipeline.crew_stream import stream_crew
+from pipeline.instrumentation import track_crew_run
+from pipeline.intake_cache import build_crew_for_case, get_intake_cache
+
+
+def run_case(inputs: dict, run_id: str = None) -> Iterator[tuple[str, object]]:
+    """
+    Run one case through the legal crew and yield its progress.
+
+    This is the single entry point shared by the Streamlit app (in-process) and
+    the job service workers, so both produce the same events.
+
+    Args:
+        inputs (dict): Crew inputs (the app's `inputs_dict`).
+        run_id (str): Identifier written with the run metrics (default: random).
+
+    Yields:
+        tuple[str, object]: `("cached_intake", TaskOutput)` when intake is served from
+        cache, `("task", TaskOutput)` per finished stage, `("token", str)` per drafter
+        chunk, `("result", CrewOutput)`, and finally `("metrics", dict)` with the
+        run metrics (plus intake cache stats when enabled).
+    """
+    crew, cached_intake = build_crew_for_case(inputs, stream=True)
+    if cached_intake is not None:
+        yield "cached_intake", cached_intake
+
+    with track_crew_run(crew, run_id=run_id) as run_metrics:
+        yield from stream_crew(crew, inputs)
+
+    summary = run_metrics.summary()
+    intake_cache = get_intake_cache()
+    if intake_cache is not None:
+        summary["intake_cache"] = intake_cache.stats()
+    yield "metrics", summary
@@ -0,0 +1,592 @@
+# rate_limit.py
+#
+# Client-side rate control for the agents' Groq LLM calls.
+#
+# Every agent LLM is a `RateLimitedLLM`, and all LLMs of the same model share one
+# `AdaptiveRateLimiter` per process: a request bucket (RPM), a token bucket (TPM)
+# and a concurrency window that grows additively after successes and halves on
+# every 429 (AIMD). Rate-limit response headers clamp the buckets to what the
+# provider reports as remaining, and `retry-after` pauses all callers. Time spent
+# waiting for a permit is reported as an `LLMQueuedEvent` per call.
+#
+# Hedged LLM calls duplicate the provider request (`HedgedCompletion`), not the
+# crewAI call, so events and token usage are recorded once per call.
+
+import contextvars
+import functools
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from crewai import LLM
+from crewai.events import crewai_event_bus
+from crewai.events.base_events import BaseEvent
+from crewai.types.usage_metrics import UsageMetrics
+
+from pipeline.hedging import hedging_enabled, record_hedge_tokens, run_with_deadline, stage_deadline, track_stage
+
+
+# Completion tokens reserved for a call when the LLM sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+
+# Multiplicative decrease of the concurrency window on a 429
+BACKOFF_FACTOR = 0.5
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+# (limiter, estimated tokens, deadline) of the running LLM call when its provider request is hedged
+_hedged_call = contextvars.ContextVar("legal_hedged_call", default=None)
+
+# Total tokens of each provider response the running LLM call kept, for settling its reservation
+_call_tokens = contextvars.ContextVar("legal_call_tokens", default=None)
+
+
+class LLMQueuedEvent(BaseEvent):
+    """Emitted once per rate-limited LLM call; counted by `pipeline.instrumentation`."""
+
+    type: str = "llm_queued"
+    wait_seconds: float
+    throttled: bool
+
+
+def parse_duration(value) -> float | None:
+    """
+    Parse a rate-limit reset / retry-after value into seconds.
+
+    Args:
+        value: Seconds as a number or string, or a duration such as `"2m59.56s"`, `"7.66s"` or `"120ms"`.
+
+    Returns:
+        float | None: Seconds, or None when the value is missing or unparseable.
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+
+    parts = _DURATION_PART.findall(str(value))
+    if not parts:
+        return None
+    scale = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def _header(headers: dict, name: str):
+    # LiteLLM re-exposes provider headers with an `llm_provider-` prefix
+    for key in (name, f"llm_provider-{name}"):
+        if key in headers:
+            return headers[key]
+    return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Requests/min and tokens/min token buckets plus an AIMD concurrency window for one model.
+
+    Callers reserve an estimated token cost with `acquire`, which blocks until
+    both buckets hold enough and a concurrency slot is free, then settle the
+    real cost with `release`. `throttled` (a 429) halves the window and pauses
+    new calls for the provider's retry-after; each success grows the window by
+    `1 / window`, i.e. about one slot per window's worth of successful calls.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int, initial_concurrency: float = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(initial_concurrency or max_concurrency)
+
+        self._condition = threading.Condition()
+        self._request_level = float(requests_per_minute)
+        self._token_level = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+
+        self.calls = 0
+        self.throttled_calls = 0
+        self.queue_seconds = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+    def _refill(self, now: float):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._request_level = min(self.requests_per_minute, self._request_level + elapsed * self.requests_per_minute / 60)
+        self._token_level = min(self.tokens_per_minute, self._token_level + elapsed * self.tokens_per_minute / 60)
+
+    def _wait_time(self, now: float, tokens: float) -> float | None:
+        """Seconds until a call costing `tokens` may start, 0 when it may start now, None while waiting on a slot."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= max(1, int(self.concurrency)):
+            return None
+        # A call larger than the whole bucket waits for a full bucket instead of forever
+        tokens = min(tokens, self.tokens_per_minute)
+        shortfall = max(
+            (1 - self._request_level) * 60 / self.requests_per_minute,
+            (tokens - self._token_level) * 60 / self.tokens_per_minute,
+        )
+        return max(0.0, shortfall)
+
+    def acquire(self, tokens: float) -> float:
+        """
+        Block until a call costing about `tokens` may start, and reserve it.
+
+        Args:
+            tokens (float): Estimated prompt plus completion tokens.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait == 0:
+                    break
+                self._condition.wait(timeout=wait)
+
+            self._reserve(tokens)
+            waited = time.monotonic() - start
+            self.queue_seconds += waited
+            self._recent_waits.append(waited)
+            return waited
+
+    def try_acquire(self, tokens: float) -> bool:
+        """
+        Reserve a call costing about `tokens` only if it may start right away (hedged duplicates).
+
+        Args:
+            tokens (float): Estimated prompt plus completion tokens.
+
+        Returns:
+            bool: Whether the call was reserved; settle it with `release` as after `acquire`.
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            if self._wait_time(now, tokens) != 0:
+                return False
+            self._reserve(tokens)
+            return True
+
+    def _reserve(self, tokens: float):
+        self._request_level -= 1
+        self._token_level -= min(tokens, self.tokens_per_minute)
+        self._in_flight += 1
+        self.calls += 1
+
+    def release(self, reserved_tokens: float, used_tokens: float = None, succeeded: bool = True, slot: bool = True):
+        """
+        Finish a call started with `acquire`.
+
+        Args:
+            reserved_tokens (float): Tokens passed to `acquire`.
+            used_tokens (float): Tokens the call really used, when known; the difference is returned to the bucket.
+            succeeded (bool): Whether the call succeeded (grows the concurrency window).
+            slot (bool): False when the call's concurrency slot was already given back with `free_slot`.
+        """
+        with self._condition:
+            if slot:
+                self._in_flight -= 1
+            if used_tokens is not None:
+                self._token_level = min(
+                    self.tokens_per_minute, self._token_level + min(reserved_tokens, self.tokens_per_minute) - used_tokens
+                )
+            if succeeded:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / max(1.0, self.concurrency))
+            self._condition.notify_all()
+
+    def free_slot(self):
+        """Give back the concurrency slot of a call that was abandoned but is still running."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def charge(self, tokens: float):
+        """Take tokens from the bucket that no reservation covered (a discarded hedged request)."""
+        with self._condition:
+            self._refill(time.monotonic())
+            self._token_level -= tokens
+
+    def throttled(self, retry_after: float = None):
+        """
+        Record a 429: halve the concurrency window and pause new calls.
+
+        Args:
+            retry_after (float): Seconds the provider asked to wait (default: time to refill one request).
+        """
+        with self._condition:
+            self.throttled_calls += 1
+            self.concurrency = max(1.0, self.concurrency * BACKOFF_FACTOR)
+            pause = retry_after if retry_after is not None else 60 / self.requests_per_minute
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._condition.notify_all()
+
+    def observe_headers(self, headers: dict):
+        """
+        Align the buckets with the provider's `x-ratelimit-*` response headers.
+
+        Args:
+            headers (dict): Response headers (plain or with LiteLLM's `llm_provider-` prefix).
+        """
+        if not headers:
+            return
+
+        with self._condition:
+            self._refill(time.monotonic())
+
+            limit_tokens = _header(headers, "x-ratelimit-limit-tokens")
+            if limit_tokens is not None:
+                self.tokens_per_minute = float(limit_tokens)
+
+            remaining_tokens = _header(headers, "x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None:
+                self._token_level = min(self._token_level, float(remaining_tokens))
+
+            remaining_requests = _header(headers, "x-ratelimit-remaining-requests")
+            if remaining_requests is not None and float(remaining_requests) < 1:
+                reset = parse_duration(_header(headers, "x-ratelimit-reset-requests"))
+                if reset:
+                    self._paused_until = max(self._paused_until, time.monotonic() + reset)
+
+            retry_after = parse_duration(_header(headers, "retry-after"))
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """
+        Limiter state and queueing delay.
+
+        Returns:
+            dict: Calls, 429s, current window, in-flight calls, total / p50 / p95 queue seconds, bucket levels.
+        """
+        with self._condition:
+            waits = sorted(self._recent_waits)
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled_calls,
+                "concurrency": round(self.concurrency, 2),
+                "in_flight": self._in_flight,
+                "queue_seconds": round(self.queue_seconds, 3),
+                "queue_p50_seconds": round(waits[len(waits) // 2], 3) if waits else 0.0,
+                "queue_p95_seconds": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                "requests_available": round(self._request_level, 2),
+                "tokens_available": round(self._token_level),
+            }
+
+
+_limiters_lock = threading.Lock()
+_limiters = {}
+
+
+def rate_limiting_enabled() -> bool:
+    """Whether agent LLM calls go through the limiter (`LEGAL_LLM_RATE_LIMIT`, default on)."""
+    return os.getenv("LEGAL_LLM_RATE_LIMIT", "1") != "0"
+
+
+def get_rate_limiter(model: str) -> AdaptiveRateLimiter:
+    """
+    Return the process-wide limiter for a model, created from the environment on first use.
+
+    `LEGAL_LLM_RPM` (default 30) and `LEGAL_LLM_TPM` (default 15000) should match the
+    account's quota; `LEGAL_LLM_MAX_CONCURRENCY` (default 4) caps the AIMD window.
+
+    Args:
+        model (str): Model name, e.g. `groq/gemma2-9b-it`.
+
+    Returns:
+        AdaptiveRateLimiter: Shared limiter.
+    """
+    with _limiters_lock:
+        if model not in _limiters:
+            _limiters[model] = AdaptiveRateLimiter(
+                requests_per_minute=float(os.getenv("LEGAL_LLM_RPM", "30")),
+                tokens_per_minute=float(os.getenv("LEGAL_LLM_TPM", "15000")),
+                max_concurrency=int(os.getenv("LEGAL_LLM_MAX_CONCURRENCY", "4")),
+            )
+        return _limiters[model]
+
+
+def limiter_stats() -> dict:
+    """Stats of every limiter created in this process, keyed by model."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {model: limiter.stats() for model, limiter in limiters.items()}
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an LLM exception is a 429 / rate-limit response."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _error_headers(error: Exception) -> dict:
+    headers = getattr(error, "litellm_response_headers", None)
+    if headers is None and getattr(error, "response", None) is not None:
+        headers = getattr(error.response, "headers", None)
+    return dict(headers or {})
+
+
+def _observe_throttle(limiter: AdaptiveRateLimiter, error: Exception):
+    headers = _error_headers(error)
+    limiter.observe_headers(headers)
+    limiter.throttled(parse_duration(_header(headers, "retry-after")))
+
+
+def _estimate_tokens(messages, max_tokens: int | None) -> int:
+    if isinstance(messages, str):
+        text = messages
+    else:
+        text = "".join(str(message.get("content") or "") for message in messages)
+    return len(text) // 4 + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def _response_tokens(response) -> int:
+    usage = getattr(response, "usage", None)
+    return int(getattr(usage, "total_tokens", 0) or 0)
+
+
+class HedgeSkipped(RuntimeError):
+    """A hedged duplicate request that was not sent."""
+
+
+class HedgedCompletion:
+    """
+    One provider request of a hedged LLM call and its duplicate.
+
+    Both attempts run under `run_with_deadline("llm_request", ...)` inside crewAI's
+    `LLM.call`, which then emits its events and records token usage once, for the
+    response that wins. The first attempt runs under the call's own reservation;
+    the duplicate is only sent when `try_acquire` grants it a permit right away,
+    and gives its concurrency slot back as soon as the other attempt wins. Tokens
+    of the discarded attempt are charged to the limiter and counted as
+    `hedge_tokens` instead of the run's usage.
+    """
+
+    def __init__(self, limiter: AdaptiveRateLimiter | None, estimate: int, deadline: float | None):
+        self.limiter = limiter
+        self.estimate = estimate
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._attempts = 0
+        self._winner = None  # Attempt number that won, -1 when the request failed or ran out of time
+        self._finished = {}  # Attempt number -> tokens, for attempts that returned before the winner was known
+        self._slots = set()  # Duplicate attempts still holding a concurrency slot
+
+    def send(self, request):
+        """
+        Send a request, hedging it once it outlives the hedge delay.
+
+        Args:
+            request (Callable[[], Any]): The unwrapped `litellm.completion` call.
+
+        Returns:
+            Any: Response of the first attempt to succeed.
+        """
+        try:
+            winner, response = run_with_deadline(
+                "llm_request", lambda: self._attempt(request), deadline=self.deadline, hedge=True
+            )
+        except Exception:
+            self._settle(-1)
+            raise
+        self._settle(winner)
+        return response
+
+    def _attempt(self, request):
+        with self._lock:
+            number = self._attempts
+            self._attempts += 1
+            if number > 0 and self._winner is not None:
+                raise HedgeSkipped("❌ hedged request not sent: the call already finished")
+
+        if number > 0 and self.limiter is not None:
+            if not self.limiter.try_acquire(self.estimate):
+                raise HedgeSkipped("❌ hedged request not sent: no rate-limit permit free")
+            with self._lock:
+                self._slots.add(number)
+
+        tokens, error = 0, None
+        try:
+            response = request()
+            tokens = _response_tokens(response)
+            return number, response
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            self._finish(number, tokens, error)
+
+    def _finish(self, number: int, tokens: int, error: Exception | None):
+        with self._lock:
+            slot = number in self._slots
+            self._slots.discard(number)
+            winner = self._winner
+            if winner is None:
+                self._finished[number] = tokens
+
+        if number > 0 and self.limiter is not None:
+            # The call that keeps the response settles its tokens; a discarded one is charged in `_discard`
+            self.limiter.release(self.estimate, used_tokens=None if error else 0, succeeded=error is None, slot=slot)
+            if error is not None and is_rate_limit_error(error):
+                _observe_throttle(self.limiter, error)
+
+        if winner is not None and number != winner:
+            self._discard(number, tokens, winner)
+
+    def _settle(self, winner: int):
+        with self._lock:
+            self._winner = winner
+            finished, self._finished = self._finished, {}
+            abandoned = self._slots - {winner}
+            self._slots -= abandoned
+
+        for _ in abandoned:
+            self.limiter.free_slot()
+        for number, tokens in finished.items():
+            if number != winner:
+                self._discard(number, tokens, winner)
+
+    def _discard(self, number: int, tokens: int, winner: int):
+        if not tokens:
+            return
+        # A failed call keeps its whole reservation, which already covers the first attempt
+        if self.limiter is not None and (winner >= 0 or number > 0):
+            self.limiter.charge(tokens)
+        if winner >= 0:
+            record_hedge_tokens("llm_request", tokens)
+
+
+class RateLimitedLLM(LLM):
+    """
+    crewAI `LLM` whose calls go through the shared limiter of its model, bounded
+    by the stage deadline and optionally hedged (see `pipeline.hedging`).
+
+    crewAI already retries a 429 a few times around `call`; each attempt comes
+    back through `acquire`, so after a 429 the retry waits out the limiter's
+    pause and the halved concurrency window instead of its own fixed backoff.
+
+    Hedging duplicates only the provider request (`HedgedCompletion`), so the
+    call's events, its token usage and its limiter reservation are not doubled.
+    """
+
+    def __copy__(self):
+        # `LLM.__copy__` / `__deepcopy__` rebuild a plain `LLM`; agent and crew copies must keep the limiter
+        copied = super().__copy__()
+        object.__setattr__(copied, "__class__", type(self))
+        return copied
+
+    def __deepcopy__(self, memo=None):
+        copied = super().__deepcopy__(memo)
+        object.__setattr__(copied, "__class__", type(self))
+        return copied
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None, response_model=None):
+        def limited_call():
+            return self._limited_call(messages, tools, callbacks, available_functions, from_task, from_agent, response_model)
+
+        track_stage(from_task)  # Tool calls of this task look its deadline up by task id
+        deadline = stage_deadline(from_task)
+
+        # Streamed calls are never hedged: a duplicate would stream a second copy of the tokens
+        hedged = None
+        if hedging_enabled("llm") and not self.stream:
+            limiter = get_rate_limiter(self.model) if rate_limiting_enabled() else None
+            hedged = (limiter, _estimate_tokens(messages, self.max_tokens), deadline)
+
+        hedging = _hedged_call.set(hedged)
+        try:
+            return run_with_deadline("llm", limited_call, deadline=deadline)
+        finally:
+            _hedged_call.reset(hedging)
+
+    def _limited_call(self, messages, tools, callbacks, available_functions, from_task, from_agent, response_model):
+        if not rate_limiting_enabled():
+            return super().call(messages, tools, callbacks, available_functions, from_task, from_agent, response_model)
+
+        limiter = get_rate_limiter(self.model)
+        estimate = _estimate_tokens(messages, self.max_tokens)
+        waited = limiter.acquire(estimate)
+        # Counted per call rather than as a delta of `_token_usage`, which concurrent calls share
+        used = []
+        counting = _call_tokens.set(used)
+        try:
+            result = super().call(messages, tools, callbacks, available_functions, from_task, from_agent, response_model)
+        except Exception as error:
+            limiter.release(estimate, succeeded=False)
+            throttled = is_rate_limit_error(error)
+            if throttled:
+                _observe_throttle(limiter, error)
+            self._emit_queued(waited, throttled, from_task)
+            raise
+        finally:
+            _call_tokens.reset(counting)
+
+        limiter.release(estimate, used_tokens=sum(used) or None)
+        self._emit_queued(waited, False, from_task)
+        return result
+
+    def _track_token_usage_internal(self, usage_data):
+        super()._track_token_usage_internal(usage_data)
+        used = _call_tokens.get()
+        metrics = UsageMetrics.from_provider_dict(usage_data)
+        if used is not None and metrics is not None:
+            used.append(metrics.total_tokens)
+
+    def _emit_queued(self, waited: float, throttled: bool, from_task):
+        event = LLMQueuedEvent(wait_seconds=waited, throttled=throttled)
+        if from_task is not None:
+            event.task_id = str(from_task.id)
+        crewai_event_bus.emit(self, event)
+
+
+def _observe_response_headers(kwargs, response, start_time, end_time):
+    """LiteLLM success callback: feed provider rate-limit headers to the model's limiter."""
+    model = kwargs.get("model")
+    provider = (kwargs.get("litellm_params") or {}).get("custom_llm_provider")
+    hidden = getattr(response, "_hidden_params", None) or {}
+    with _limiters_lock:
+        limiter = _limiters.get(model) or _limiters.get(f"{provider}/{model}")
+    if limiter is not None:
+        limiter.observe_headers(hidden.get("additional_headers") or {})
+
+
+def _register_header_callback():
+    import litellm
+
+    if _observe_response_headers not in litellm.success_callback:
+        litellm.success_callback.append(_observe_response_headers)
+
+
+def _hedged_completion(completion):
+    """Wrap `litellm.completion` so non-streamed requests of hedged `RateLimitedLLM` calls go through `HedgedCompletion`."""
+
+    @functools.wraps(completion)
+    def hedged_completion(*args, **kwargs):
+        hedged = _hedged_call.get()
+        if hedged is None or kwargs.get("stream"):
+            return completion(*args, **kwargs)
+        return HedgedCompletion(*hedged).send(lambda: completion(*args, **kwargs))
+
+    hedged_completion.legal_hedged = True
+    return hedged_completion
+
+
+def _register_hedged_completion():
+    # crewAI looks `litellm.completion` up on the module at every call
+    import litellm
+
+    if not getattr(litellm.completion, "legal_hedged", False):
+        litellm.completion = _hedged_completion(litellm.completion)
+
+
+_register_header_callback()
+_register_hedged_completion()
@@ -0,0 +1,124 @@
+# startup.py
+#
+# Deferred loading of the crew and retrieval stack for the Streamlit app.
+#
+# Importing `crew` pulls in crewAI, LiteLLM, every agent and its LLM object, and
+# the IPC search stack pulls in Chroma, LangChain and sentence-transformers. None
+# of that is needed to render the page and the API key form, so the app imports
+# only this module at startup and warms everything else in a background thread.
+
+import threading
+import time
+from types import SimpleNamespace
+
+
+_lock = threading.Lock()
+_warmup_thread = None
+_warmup_error = None
+
+# Seconds spent in each warmup step, filled in by the warmup thread
+timings = {}
+
+
+def _warmup():
+    global _warmup_error
+
+    try:
+        _load()
+    except Exception as error:
+        # Kept for the health helpers and re-raised on the first real use
+        _warmup_error = error
+
+
+def _load():
+    start = time.perf_counter()
+    import crew  # noqa: F401 - crewAI, agents, tasks, LLM objects
+    timings["import_crew"] = time.perf_counter() - start
+
+    from pipeline.instrumentation import start_metrics_server
+    start_metrics_server()
+
+    start = time.perf_counter()
+    from retrieval.ipc_search import warmup_ipc_search
+    warmup_ipc_search()  # BM25 index, embedding model, vector index
+    timings["ipc_search"] = time.perf_counter() - start
+
+
+def start_warmup() -> threading.Thread:
+    """
+    Start loading the pipeline in a daemon thread (once per process).
+
+    Returns:
+        threading.Thread: The warmup thread.
+    """
+    global _warmup_thread
+
+    with _lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warmup, name="app-warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
+
+
+def is_ready() -> bool:
+    """Whether the background warmup has finished without an error."""
+    return _warmup_thread is not None and not _warmup_thread.is_alive() and _warmup_error is None
+
+
+def warmup_error() -> Exception | None:
+    """The exception that stopped the background warmup, if any."""
+    return _warmup_error
+
+
+def warmup_status() -> dict:
+    """
+    Readiness of the background warmup, for health endpoints.
+
+    Returns:
+        dict: `ready`, and `error` (`"Type: message"`) when the warmup failed.
+    """
+    status = {"ready": is_ready()}
+    if _warmup_error is not None:
+        status["error"] = f"{type(_warmup_error).__name__}: {_warmup_error}"
+    return status
+
+
+def raise_warmup_error():
+    """
+    Re-raise the warmup failure in the caller's thread.
+
+    Raises:
+        Exception: Whatever stopped the warmup (missing index, unknown `IPC_VECTOR_BACKEND`, ...).
+    """
+    if _warmup_error is not None:
+        raise _warmup_error
+
+
+def load_pipeline() -> SimpleNamespace:
+    """
+    Import the crew entry points, waiting for the warmup if it is still running.
+
+    Imports are serialized by Python's import lock, so calling this while the
+    warmup thread is mid-import simply waits for it instead of loading twice.
+
+    When `LEGAL_JOB_SERVICE_URL` is set, nothing is loaded locally and cases
+    are sent to the job service instead (see `job_service.py`).
+
+    Returns:
+        SimpleNamespace: `run_case(inputs)`, yielding the events of `pipeline.jobs.run_case`.
+
+    Raises:
+        Exception: The error that stopped the background warmup, if it failed.
+    """
+    from pipeline.job_client import job_service_url, run_case_remote
+
+    service_url = job_service_url()
+    if service_url:
+        return SimpleNamespace(run_case=lambda inputs: run_case_remote(service_url, inputs))
+
+    start_warmup()
+    raise_warmup_error()
+
+    from pipeline.jobs import run_case
+
+    return SimpleNamespace(run_case=run_case)
@@ -1,44 +1,38 @@
 # query_vectordb.py
 
-import os
+import time
 
-from dotenv import load_dotenv
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-
-
-load_dotenv()
-
-persist_directory_name = os.getenv("PERSIST_DIRECTORY_NAME")
-
-base_path = os.path.dirname(os.path.abspath(__file__))
-persist_directory_path = os.path.join(base_path, persist_directory_name)
+from retrieval.ipc_store import doc_to_result, get_ipc_store
 
 
 query = "What is the IPC section for Theft?"
+warm_runs = 5
+
+vector_store = get_ipc_store()
 
-db = Chroma(
-    collection_name="ipc_collection",
-    persist_directory=persist_directory_path,
-    embedding_function=HuggingFaceEmbeddings()
-)
+# Cold query - includes loading the embedding model and opening the vectordb
+start = time.perf_counter()
+docs = vector_store.similarity_search(query, k=3)
+cold_seconds = time.perf_counter() - start
 
-docs = db.similarity_search(query, k=3)
+# Warm queries - reuse the process-wide embedding model and vectordb
+warm_timings = []
+for _ in range(warm_runs):
+    start = time.perf_counter()
+    vector_store.similarity_search(query, k=3)
+    warm_timings.append(time.perf_counter() - start)
 
 # print(docs[0].page_content)
 # print(docs)
 
 
 
-result = []
+result = [doc_to_result(doc) for doc in docs]
 
-for doc in docs:
-    result.append({
-        "section": doc.metadata.get("section"),
-        "section_title": doc.metadata.get("section_title"),
-        "chapter": doc.metadata.get("chapter"),
-        "chapter_title": doc.metadata.get("chapter_title"),
-        "content": doc.page_content
-    })
+print(result)
 
-print(result)
\ No newline at end of file
+warm_seconds = sum(warm_timings) / len(warm_timings)
+print(f"⏱️ Cold query: {cold_seconds * 1000:.1f} ms (model + vectordb load: {vector_store.load_seconds * 1000:.1f} ms)")
+print(f"⏱️ Warm query: {warm_seconds * 1000:.1f} ms (mean of {warm_runs} runs)")
+print(f"🚀 Speed-up: {cold_seconds / warm_seconds:.1f}x")
+print(f"🗃️ Query embedding cache: {vector_store.cache_stats()}")
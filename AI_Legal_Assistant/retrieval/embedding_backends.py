@@ -0,0 +1,221 @@
+# embedding_backends.py
+#
+# Configurable embedding model and inference backend for the IPC index.
+#
+#   IPC_EMBEDDING_MODEL    sentence-transformers model (default: all-mpnet-base-v2, as before);
+#                          smaller models such as `sentence-transformers/all-MiniLM-L6-v2`
+#                          load faster and use a fraction of the RAM
+#   IPC_EMBEDDING_BACKEND  `torch` (default), `torch-int8` (dynamic int8 quantization of the
+#                          linear layers), `onnx` (ONNX Runtime) or `onnx-int8` (a quantized
+#                          ONNX export, `IPC_EMBEDDING_ONNX_FILE`)
+#
+# The ONNX backends need `pip install "sentence-transformers[onnx]"`.
+#
+# The builder records the model in the Chroma collection metadata and the numpy
+# index; stores refuse to answer queries embedded with a different model, since
+# vectors from two models are not comparable. Backends of the same model share
+# one vector space, so switching backend does not require a rebuild.
+#
+#   IPC_EMBED_MICRO_BATCH_MS  when > 0, concurrent query embeddings are collected for
+#                             up to this many milliseconds and encoded in one forward
+#                             pass (on by default in `embedding_server.py`)
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# The model `HuggingFaceEmbeddings()` loads by default; indexes built before the model was recorded used it
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
+
+# Quantized export published in most sentence-transformers model repositories
+DEFAULT_ONNX_INT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+
+class EmbeddingModelMismatch(ValueError):
+    """The configured embedding model is not the one the index was built with."""
+
+
+def embedding_spec() -> dict:
+    """
+    The configured embedding model and backend.
+
+    Returns:
+        dict: `embedding_model` and `embedding_backend`, the keys recorded with an index.
+    """
+    backend = os.getenv("IPC_EMBEDDING_BACKEND", "torch")
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"❌ Unknown embedding backend '{backend}'. Expected one of {EMBEDDING_BACKENDS}.")
+    return {
+        "embedding_model": os.getenv("IPC_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+        "embedding_backend": backend,
+    }
+
+
+def embedding_fingerprint(spec: dict = None) -> str:
+    """Model and backend as one string, e.g. for keying cached query vectors."""
+    spec = spec or embedding_spec()
+    return f"{spec['embedding_model']}|{spec['embedding_backend']}"
+
+
+def create_embeddings(spec: dict = None) -> HuggingFaceEmbeddings:
+    """
+    Load the embedding model on the configured backend.
+
+    Args:
+        spec (dict): Model and backend (default: `embedding_spec()`).
+
+    Returns:
+        HuggingFaceEmbeddings: LangChain embeddings backed by a sentence-transformer.
+    """
+    spec = spec or embedding_spec()
+    backend = spec["embedding_backend"]
+
+    model_kwargs = {}
+    if backend.startswith("onnx"):
+        model_kwargs["backend"] = "onnx"
+        if backend == "onnx-int8":
+            model_kwargs["model_kwargs"] = {"file_name": os.getenv("IPC_EMBEDDING_ONNX_FILE", DEFAULT_ONNX_INT8_FILE)}
+
+    embeddings = HuggingFaceEmbeddings(model_name=spec["embedding_model"], model_kwargs=model_kwargs)
+
+    if backend == "torch-int8":
+        import torch
+        torch.quantization.quantize_dynamic(embeddings._client, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+    return embeddings
+
+
+def check_index_embedding(recorded: dict | None, spec: dict = None, index_name: str = "IPC index"):
+    """
+    Reject queries embedded with a different model than the index.
+
+    Args:
+        recorded (dict | None): Metadata stored with the index (None or no `embedding_model`: built with the default model).
+        spec (dict): Query-side model and backend (default: `embedding_spec()`).
+        index_name (str): Name used in the error message.
+
+    Raises:
+        EmbeddingModelMismatch: The models differ.
+    """
+    spec = spec or embedding_spec()
+    built_with = (recorded or {}).get("embedding_model") or DEFAULT_EMBEDDING_MODEL
+    if built_with != spec["embedding_model"]:
+        raise EmbeddingModelMismatch(
+            f"❌ The {index_name} was built with '{built_with}' but IPC_EMBEDDING_MODEL is "
+            f"'{spec['embedding_model']}'. Rebuild it with `python ipc_vectordb_builder.py --full` "
+            f"or set IPC_EMBEDDING_MODEL to match."
+        )
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """
+    LangChain embeddings wrapper that encodes concurrent `embed_query` calls together.
+
+    Callers block on a future while a single batching thread collects queries for
+    up to `max_wait_ms` after the first arrives (or until `max_batch` are queued)
+    and encodes them with one `embed_documents` call. Queries and documents are
+    encoded identically by `create_embeddings` models, so the vectors are the same
+    as unbatched ones.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_wait_ms: float, max_batch: int = 32):
+        self.embeddings = embeddings
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.queries = 0
+        self.batches = 0
+
+        self._closed = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-micro-batch", daemon=True)
+        self._thread.start()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        if self._closed:
+            raise RuntimeError("❌ The embedding model was closed")
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # Finish this batch, then stop
+                    break
+                batch.append(item)
+
+            try:
+                vectors = self.embeddings.embed_documents([text for text, _ in batch])
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+
+            self.queries += len(batch)
+            self.batches += 1
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+        # Queries that raced with `close`
+        while not self._queue.empty():
+            item = self._queue.get()
+            if item is not None:
+                item[1].set_exception(RuntimeError("❌ The embedding model was closed"))
+
+    def stats(self) -> dict:
+        """
+        Batching counters since the wrapper was created.
+
+        Returns:
+            dict: Queries encoded, forward passes and mean batch size.
+        """
+        return {
+            "queries": self.queries,
+            "batches": self.batches,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        """Stop the batching thread once queued queries are encoded."""
+        self._closed = True
+        self._queue.put(None)
+
+
+def with_micro_batching(embeddings: Embeddings) -> Embeddings:
+    """
+    Wrap an embedding model in `MicroBatchingEmbeddings` when `IPC_EMBED_MICRO_BATCH_MS` > 0.
+
+    Args:
+        embeddings (Embeddings): The underlying embedding model.
+
+    Returns:
+        Embeddings: The batching wrapper, or `embeddings` unchanged when batching is off.
+    """
+    max_wait_ms = float(os.getenv("IPC_EMBED_MICRO_BATCH_MS", "0"))
+    if max_wait_ms <= 0:
+        return embeddings
+    return MicroBatchingEmbeddings(
+        embeddings, max_wait_ms=max_wait_ms, max_batch=int(os.getenv("IPC_EMBED_MICRO_BATCH_SIZE", "32"))
+    )
@@ -0,0 +1,235 @@
+# embedding_cache.py
+
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different spellings share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache of query embeddings keyed by normalized query text and model name.
+
+    An in-memory LRU answers repeated queries within a process; a SQLite file
+    keeps them across restarts. Both tiers are size-bounded and evict the least
+    recently used entries. Hit counts per query are kept on disk so frequent
+    queries can be identified later; they are written back every
+    `_FLUSH_EVERY` hits or `_FLUSH_SECONDS`, and on interpreter exit.
+    """
+
+    _FLUSH_EVERY = 32
+    _FLUSH_SECONDS = 30.0
+
+    def __init__(self, path: str, model_name: str, memory_size: int = 1024, disk_size: int = 100_000):
+        self.path = path
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._pending_hits = {}
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+        self._closed = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, query TEXT NOT NULL,"
+            " vector BLOB NOT NULL, hits INTEGER NOT NULL DEFAULT 0, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS query_embeddings_last_used ON query_embeddings (last_used)")
+        self._db.commit()
+
+        # Apps and workers are usually stopped without closing the cache; keep their hit counts
+        atexit.register(self.close)
+
+    def _key(self, normalized_query: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{normalized_query}".encode("utf-8")).hexdigest()
+
+    def get(self, query: str) -> list[float] | None:
+        """
+        Look up a query embedding, memory tier first.
+
+        Args:
+            query (str): Query text (normalized internally).
+
+        Returns:
+            list[float] | None: Cached embedding, or None on a miss.
+        """
+        key = self._key(normalize_query(query))
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self._record_hit(key)
+                return vector
+
+            row = self._db.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            vector = array("f", row[0]).tolist()
+            self.disk_hits += 1
+            self._remember(key, vector)
+            self._record_hit(key)
+            return vector
+
+    def put(self, query: str, vector: list[float]):
+        """
+        Store a query embedding in both tiers.
+
+        Args:
+            query (str): Query text (normalized internally).
+            vector (list[float]): Embedding produced by the model.
+        """
+        normalized_query = normalize_query(query)
+        key = self._key(normalized_query)
+        with self._lock:
+            self._remember(key, list(vector))
+            self._db.execute(
+                "INSERT OR REPLACE INTO query_embeddings (key, model, query, vector, hits, last_used)"
+                " VALUES (?, ?, ?, ?, COALESCE((SELECT hits FROM query_embeddings WHERE key = ?), 0), ?)",
+                (key, self.model_name, normalized_query, array("f", vector).tobytes(), key, time.time())
+            )
+            self._evict_disk()
+            self._db.commit()
+
+    def _remember(self, key: str, vector: list[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _record_hit(self, key: str):
+        # Hit counts and recency are written back in batches to keep hits off the disk path.
+        # Counting all hits (not distinct keys) keeps a few hot queries from never being flushed.
+        self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+        self._pending_total += 1
+        if self._pending_total >= self._FLUSH_EVERY or time.monotonic() - self._last_flush >= self._FLUSH_SECONDS:
+            self._flush_hits()
+
+    def _flush_hits(self):
+        now = time.time()
+        self._db.executemany(
+            "UPDATE query_embeddings SET hits = hits + ?, last_used = ? WHERE key = ?",
+            [(hits, now, key) for key, hits in self._pending_hits.items()]
+        )
+        self._db.commit()
+        self._pending_hits.clear()
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+
+    def _evict_disk(self):
+        (count,) = self._db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()
+        if count > self.disk_size:
+            self._db.execute(
+                "DELETE FROM query_embeddings WHERE key IN"
+                " (SELECT key FROM query_embeddings ORDER BY last_used ASC LIMIT ?)",
+                (count - self.disk_size,)
+            )
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters since the cache was opened.
+
+        Returns:
+            dict: Memory hits, disk hits, misses, hit rate and entries held in memory.
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self):
+        """Write back pending hit counts and close the SQLite file."""
+        with self._lock:
+            if self._closed:
+                return
+            if self._pending_hits:
+                self._flush_hits()
+            self._db.close()
+            self._closed = True
+        atexit.unregister(self.close)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain embeddings wrapper that serves `embed_query` from a `QueryEmbeddingCache`.
+
+    Document embedding is passed straight through; only query traffic repeats.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: QueryEmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        vector = self.cache.get(text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(text, vector)
+        return vector
+
+
+def query_cache_path() -> str:
+    """
+    Location of the on-disk query embedding cache.
+
+    Returns:
+        str: `IPC_QUERY_CACHE_PATH`, or `<PERSIST_DIRECTORY_PATH>/query_embedding_cache.sqlite3` by default.
+    """
+    path = os.getenv("IPC_QUERY_CACHE_PATH")
+    if path:
+        return path
+    return os.path.join(os.getenv("PERSIST_DIRECTORY_PATH", "."), "query_embedding_cache.sqlite3")
+
+
+def with_query_cache(embeddings: Embeddings, model_name: str = None) -> Embeddings:
+    """
+    Wrap an embedding model with the persistent query cache unless `IPC_QUERY_CACHE=0`.
+
+    Args:
+        embeddings (Embeddings): The underlying embedding model.
+        model_name (str): Cache namespace (default: the model's `model_name`).
+
+    Returns:
+        Embeddings: The cached wrapper, or `embeddings` unchanged when caching is disabled.
+    """
+    if os.getenv("IPC_QUERY_CACHE", "1") == "0":
+        return embeddings
+
+    cache = QueryEmbeddingCache(
+        query_cache_path(),
+        model_name=model_name or getattr(embeddings, "model_name", type(embeddings).__name__),
+        memory_size=int(os.getenv("IPC_QUERY_CACHE_MEMORY_SIZE", "1024")),
+        disk_size=int(os.getenv("IPC_QUERY_CACHE_DISK_SIZE", "100000"))
+    )
+    return CachedEmbeddings(embeddings, cache)
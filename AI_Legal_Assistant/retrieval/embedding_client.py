@@ -0,0 +1,248 @@
+# embedding_client.py
+#
+# Client for `embedding_server.py`, the shared embedding and retrieval daemon.
+#
+# When the daemon is reachable, dense IPC search is sent to it instead of loading
+# the embedding model and vector index in this process. When it is not (never
+# started, stopped, or a request fails), callers fall back to the local store and
+# the daemon is retried after `IPC_EMBEDDING_SERVER_RETRY_SECONDS`. An error the
+# daemon answers with (e.g. it serves another vector backend or embedding model
+# than this worker is configured for) is raised instead of hidden by the fallback.
+#
+#   IPC_EMBEDDING_SERVER  unset: use `<PERSIST_DIRECTORY_PATH>/embedding_server.sock` if it exists;
+#                         a socket path, `host:port` for TCP, or `0` to never use the daemon
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+
+from langchain_community.docstore.document import Document
+
+from retrieval.embedding_backends import embedding_fingerprint
+
+
+logger = logging.getLogger(__name__)
+
+SOCKET_FILE = "embedding_server.sock"
+
+
+class EmbeddingServerError(ConnectionError):
+    """The embedding server could not be reached or dropped the connection."""
+
+
+class EmbeddingServerReplyError(RuntimeError):
+    """The embedding server answered a request with an error."""
+
+
+def default_socket_path() -> str:
+    """Unix socket the daemon listens on by default."""
+    return os.path.join(os.getenv("PERSIST_DIRECTORY_PATH", "."), SOCKET_FILE)
+
+
+def embedding_server_address() -> str | tuple | None:
+    """
+    Address of the embedding server from `IPC_EMBEDDING_SERVER`.
+
+    Returns:
+        str | tuple | None: Unix socket path, `(host, port)`, or None when no daemon is configured or running.
+    """
+    value = os.getenv("IPC_EMBEDDING_SERVER", "").strip()
+    if value == "0":
+        return None
+    if not value:
+        path = default_socket_path()
+        return path if hasattr(socket, "AF_UNIX") and os.path.exists(path) else None
+
+    host, _, port = value.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return value
+
+
+class EmbeddingServerClient:
+    """
+    Pool of persistent connections to the embedding server.
+
+    Requests and responses are single JSON lines; each request borrows an idle
+    connection, so concurrent callers in one process never interleave messages.
+    """
+
+    def __init__(self, address: str | tuple, timeout: float = 10.0, pool_size: int = 16):
+        self.address = address
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        try:
+            if isinstance(self.address, tuple):
+                sock = socket.create_connection(self.address, timeout=self.timeout)
+            else:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(self.address)
+        except OSError as error:
+            raise EmbeddingServerError(f"❌ Cannot connect to the embedding server at {self.address}: {error}") from error
+        return sock, sock.makefile("rb")
+
+    def _exchange(self, connection, payload: dict) -> dict:
+        sock, reader = connection
+        try:
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            line = reader.readline()
+            if not line:
+                raise EmbeddingServerError("❌ Embedding server closed the connection")
+            return json.loads(line)
+        except (OSError, ValueError, EmbeddingServerError) as error:
+            reader.close()
+            sock.close()
+            if isinstance(error, EmbeddingServerError):
+                raise
+            raise EmbeddingServerError(f"❌ Embedding server request failed: {error}") from error
+
+    def request(self, payload: dict) -> dict:
+        """
+        Send one request and wait for its response.
+
+        Args:
+            payload (dict): Request with an `op` key.
+
+        Returns:
+            dict: Response body.
+
+        Raises:
+            EmbeddingServerError: The server could not be reached or dropped the connection.
+            EmbeddingServerReplyError: The server answered with an `error`.
+        """
+        try:
+            connection = self._idle.get_nowait()
+            try:
+                response = self._exchange(connection, payload)
+            except EmbeddingServerError:
+                # The pooled connection may predate a server restart; retry once on a fresh one
+                connection = self._connect()
+                response = self._exchange(connection, payload)
+        except queue.Empty:
+            connection = self._connect()
+            response = self._exchange(connection, payload)
+
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection[1].close()
+            connection[0].close()
+
+        if "error" in response:
+            raise EmbeddingServerReplyError(f"❌ Embedding server error: {response['error']}")
+        return response
+
+    def similarity_search(self, query: str, k: int = 3, vector_backend: str = None) -> list[Document]:
+        """
+        Dense search on the server's shared index, as `ManagedVectorStore.similarity_search`.
+
+        The server rejects the request unless it serves `vector_backend` (default:
+        `IPC_VECTOR_BACKEND` or `chroma`) with this worker's embedding model.
+        """
+        response = self.request({
+            "op": "search",
+            "query": query,
+            "k": k,
+            "vector_backend": vector_backend or os.getenv("IPC_VECTOR_BACKEND", "chroma"),
+            "embedding": embedding_fingerprint(),
+        })
+        return [Document(page_content=doc["page_content"], metadata=doc["metadata"]) for doc in response["documents"]]
+
+    def embed_query(self, query: str) -> list[float]:
+        """Embed a query with the server's model (rejected when it is not this worker's model)."""
+        return self.request({"op": "embed", "query": query, "embedding": embedding_fingerprint()})["vector"]
+
+    def health(self) -> dict:
+        """Model, backend, load time and query / batching counters of the server."""
+        return self.request({"op": "health"})
+
+    def close(self):
+        """Close the idle connections."""
+        while True:
+            try:
+                sock, reader = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            reader.close()
+            sock.close()
+
+
+_lock = threading.Lock()
+_client = None
+_retry_at = 0.0
+
+
+def get_embedding_client() -> EmbeddingServerClient | None:
+    """
+    Return the process-wide embedding server client, or None when no daemon is available.
+
+    Returns:
+        EmbeddingServerClient | None: Client for the configured address, unless a recent request failed.
+    """
+    global _client
+
+    address = embedding_server_address()
+    if address is None or time.monotonic() < _retry_at:
+        return None
+
+    with _lock:
+        if _client is None or _client.address != address:
+            if _client is not None:
+                _client.close()
+            _client = EmbeddingServerClient(
+                address, timeout=float(os.getenv("IPC_EMBEDDING_SERVER_TIMEOUT", "10"))
+            )
+        return _client
+
+
+def _mark_unavailable():
+    global _retry_at
+    _retry_at = time.monotonic() + float(os.getenv("IPC_EMBEDDING_SERVER_RETRY_SECONDS", "30"))
+
+
+def remote_similarity_search(query: str, k: int = 3) -> list[Document] | None:
+    """
+    Dense search through the embedding server if it is available.
+
+    Args:
+        query (str): User query in natural language.
+        k (int): Number of documents to return.
+
+    Returns:
+        list[Document] | None: Matching IPC documents, or None to search locally instead
+        (no daemon, or it could not be reached).
+
+    Raises:
+        EmbeddingServerReplyError: The daemon answered with an error, e.g. it serves
+            another vector backend or embedding model.
+    """
+    client = get_embedding_client()
+    if client is None:
+        return None
+    try:
+        return client.similarity_search(query, k=k)
+    except EmbeddingServerError as error:
+        logger.warning("%s; searching in-process", error)
+        _mark_unavailable()
+        return None
+
+
+def embedding_server_available() -> bool:
+    """Whether an embedding server answers a health check right now."""
+    client = get_embedding_client()
+    if client is None:
+        return False
+    try:
+        client.health()
+        return True
+    except (EmbeddingServerError, EmbeddingServerReplyError) as error:
+        logger.warning("%s; searching in-process", error)
+        _mark_unavailable()
+        return False
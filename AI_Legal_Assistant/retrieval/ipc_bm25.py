@@ -0,0 +1,147 @@
+# ipc_bm25.py
+
+import math
+import re
+from collections import Counter, defaultdict
+
+
+STOPWORDS = {
+    "a", "an", "and", "any", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "he", "her", "his", "i", "in", "is", "it", "its", "me", "my", "of", "on", "or", "she",
+    "shall", "so", "that", "the", "their", "them", "there", "these", "they", "this", "to",
+    "under", "was", "we", "what", "when", "which", "who", "whoever", "will", "with", "ipc",
+    "section", "sections", "code", "penal", "indian", "law", "case", "offence", "offences",
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def _stem(token: str) -> str:
+    """Strip a common English suffix so `thefts`/`cheating`/`threatened` match their roots."""
+    for suffix in _SUFFIXES:
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercase, split on non-alphanumerics, drop stopwords and stem.
+
+    Args:
+        text (str): Free text.
+
+    Returns:
+        list[str]: Index terms.
+    """
+    return [_stem(token) for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-memory inverted index over IPC `section_title` and `section_desc` with Okapi BM25 scoring.
+
+    Title terms are counted `title_weight` times so a query naming the offence
+    ranks its defining section above sections that only mention it in passing.
+    """
+
+    def __init__(self, entries: list[dict], k1: float = 1.2, b: float = 0.75, title_weight: int = 3):
+        self.entries = entries
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+        self.doc_terms = []
+
+        for doc_index, entry in enumerate(entries):
+            terms = tokenize(entry["section_title"]) * title_weight + tokenize(entry["section_desc"])
+            self.doc_lengths.append(len(terms))
+            self.doc_terms.append(set(terms))
+            for term, frequency in Counter(terms).items():
+                self.postings[term].append((doc_index, frequency))
+
+        doc_count = len(entries)
+        self.avg_doc_length = sum(self.doc_lengths) / doc_count if doc_count else 0.0
+        self.idf = {
+            term: math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = 3) -> list[tuple[int, float]]:
+        """
+        Score every document sharing a term with the query.
+
+        Args:
+            query (str): User query in natural language.
+            k (int): Number of results to return.
+
+        Returns:
+            list[tuple[int, float]]: `(entry index, score)` pairs, best first.
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_index, frequency in self.postings[term]:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / self.avg_doc_length
+                scores[doc_index] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def coverage(self, query: str, doc_index: int) -> float:
+        """
+        Fraction of the query's index terms that occur in a document.
+
+        Args:
+            query (str): User query in natural language.
+            doc_index (int): Entry index.
+
+        Returns:
+            float: Coverage in [0, 1]; 0 when the query has no index terms.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return 0.0
+        return len(terms & self.doc_terms[doc_index]) / len(terms)
+
+    def is_confident(self, query: str, hits: list[tuple[int, float]], k: int, min_coverage: float) -> bool:
+        """
+        Decide whether lexical results are strong enough to skip dense retrieval.
+
+        BM25 is trusted only when it returns a full top-k and every one of those
+        hits contains at least `min_coverage` of the query terms. Keyword queries
+        such as "theft of movable property" pass; long narrative descriptions
+        rarely do, so they fall through to the embedding model.
+
+        Args:
+            query (str): User query in natural language.
+            hits (list[tuple[int, float]]): Results of `search`, best first.
+            k (int): Number of results the caller needs.
+            min_coverage (float): Required query-term coverage of each hit.
+
+        Returns:
+            bool: True when BM25 alone should answer the query.
+        """
+        if len(hits) < k:
+            return False
+        return all(self.coverage(query, doc_index) >= min_coverage for doc_index, _ in hits[:k])
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[str]:
+    """
+    Merge several ranked ID lists with reciprocal rank fusion.
+
+    Args:
+        rankings (list[list[str]]): Ranked IDs from each retriever, best first.
+        k (int): RRF damping constant.
+
+    Returns:
+        list[str]: IDs ordered by fused score.
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
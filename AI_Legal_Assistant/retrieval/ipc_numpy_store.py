@@ -0,0 +1,245 @@
+# ipc_numpy_store.py
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import chromadb
+import numpy as np
+from dotenv import load_dotenv
+from langchain_community.docstore.document import Document
+
+from retrieval.ipc_store import ManagedVectorStore
+
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"
+# Embedding model the matrix was built with, copied from the Chroma collection metadata
+INFO_FILE = "index_info.json"
+# Names the version subdirectory holding the files of the current export
+CURRENT_FILE = "CURRENT"
+
+# Exports kept on disk: the current one plus the one processes opened before the last swap
+KEEP_VERSIONS = 2
+
+
+class StaleIndexError(ValueError):
+    """Files of an exported index do not belong to the same export."""
+
+
+def numpy_index_dir() -> str:
+    """
+    Directory holding the flat-matrix IPC index.
+
+    Returns:
+        str: `IPC_NUMPY_INDEX_DIR`, or `<PERSIST_DIRECTORY_PATH>/numpy_index` by default.
+    """
+    load_dotenv()
+    index_dir = os.getenv("IPC_NUMPY_INDEX_DIR")
+    if index_dir:
+        return index_dir
+
+    persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH")
+    if not persist_dir_path:
+        raise EnvironmentError("❌ Set 'IPC_NUMPY_INDEX_DIR' or 'PERSIST_DIRECTORY_PATH' in .env")
+    return os.path.join(persist_dir_path, "numpy_index")
+
+
+def current_index_dir(index_dir: str) -> str:
+    """
+    Directory holding the files of the current export.
+
+    Args:
+        index_dir (str): Numpy index directory (see `numpy_index_dir()`).
+
+    Returns:
+        str: The version subdirectory named by `CURRENT`, or `index_dir` itself for
+        indexes exported before versioning.
+    """
+    try:
+        with open(os.path.join(index_dir, CURRENT_FILE), "r", encoding="utf-8") as file:
+            version = file.read().strip()
+    except OSError:
+        return index_dir
+    return os.path.join(index_dir, version)
+
+
+def _prune_versions(index_dir: str, current: str):
+    versions = sorted(name for name in os.listdir(index_dir) if name.startswith("v") and name != current)
+    for name in versions[:max(0, len(versions) - (KEEP_VERSIONS - 1))]:
+        # Still memory-mapped on platforms that cannot delete open files; removed on a later export
+        shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+
+
+def matrix_fingerprint(matrix: np.ndarray) -> str:
+    """Short hash of an exported matrix, recorded by the files derived from it."""
+    return hashlib.sha256(np.ascontiguousarray(matrix).tobytes()).hexdigest()[:16]
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so a dot product is a cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def export_numpy_index(index_dir: str = None) -> int:
+    """
+    Export the Chroma IPC collection to a normalized `.npy` matrix plus JSON metadata and model info sidecars.
+
+    Embeddings are copied from Chroma, so nothing is re-encoded. Every export
+    is written to a fresh version subdirectory, and the `CURRENT` pointer is
+    switched to it in one atomic replace once all files are complete. Processes
+    opening the index see either the old export or the new one, never a mix,
+    and those with the old matrix memory-mapped keep reading it. The int8 and
+    binary codes of the quantized backend and the chapter centroids of the
+    routed backend are regenerated into the same version.
+
+    Args:
+        index_dir (str): Output directory (default: `numpy_index_dir()`).
+
+    Returns:
+        int: Number of exported sections.
+    """
+    load_dotenv()
+    persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH")
+    collection_name = os.getenv("IPC_COLLECTION_NAME")
+    if not all([persist_dir_path, collection_name]):
+        raise EnvironmentError("❌ Missing one or more required environment variables.")
+
+    index_dir = index_dir or numpy_index_dir()
+    os.makedirs(index_dir, exist_ok=True)
+
+    collection = chromadb.PersistentClient(path=persist_dir_path).get_collection(collection_name)
+    stored = collection.get(include=["embeddings", "metadatas", "documents"])
+
+    info = {key: value for key, value in (collection.metadata or {}).items() if key.startswith("embedding_")}
+    matrix = normalize_rows(np.asarray(stored["embeddings"], dtype=np.float32))
+    records = [
+        {"id": doc_id, "page_content": document, "metadata": metadata}
+        for doc_id, document, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+    ]
+
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(index_dir, version)
+    os.makedirs(version_dir)
+    with open(os.path.join(version_dir, EMBEDDINGS_FILE), "wb") as file:
+        np.save(file, matrix)
+    with open(os.path.join(version_dir, METADATA_FILE), "w", encoding="utf-8") as file:
+        json.dump(records, file, ensure_ascii=False)
+    with open(os.path.join(version_dir, INFO_FILE), "w", encoding="utf-8") as file:
+        json.dump({
+            **info,
+            "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "rows": len(records),
+            "fingerprint": matrix_fingerprint(matrix),
+        }, file)
+
+    # Imported here: the quantized and routed stores build on this module
+    from retrieval.ipc_quantized_store import export_quantized_index
+    from retrieval.ipc_routed_store import export_chapter_index
+    export_quantized_index(version_dir)
+    export_chapter_index(version_dir)
+
+    pointer_path = os.path.join(index_dir, CURRENT_FILE)
+    with open(pointer_path + ".tmp", "w", encoding="utf-8") as file:
+        file.write(version)
+    os.replace(pointer_path + ".tmp", pointer_path)
+    _prune_versions(index_dir, version)
+
+    return len(records)
+
+
+class NumpyIndex:
+    """Memory-mapped, L2-normalized embedding matrix with one document per row."""
+
+    def __init__(self, index_dir: str):
+        # Resolved once, so every file below comes from the same export
+        self.index_dir = current_index_dir(index_dir)
+        embeddings_path = os.path.join(self.index_dir, EMBEDDINGS_FILE)
+        metadata_path = os.path.join(self.index_dir, METADATA_FILE)
+        if not os.path.exists(embeddings_path):
+            raise FileNotFoundError(
+                f"❌ No numpy IPC index at '{index_dir}'. Run `python -m retrieval.ipc_numpy_store` to export it."
+            )
+
+        self.matrix = np.load(embeddings_path, mmap_mode="r")
+        with open(metadata_path, "r", encoding="utf-8") as file:
+            self.documents = [
+                Document(page_content=record["page_content"], metadata=record["metadata"])
+                for record in json.load(file)
+            ]
+
+        # Indexes exported before the model was recorded have no info file
+        info_path = os.path.join(self.index_dir, INFO_FILE)
+        self.info = None
+        if os.path.exists(info_path):
+            with open(info_path, "r", encoding="utf-8") as file:
+                self.info = json.load(file)
+
+        rows = (self.info or {}).get("rows", len(self.documents))
+        if not len(self.documents) == rows == self.matrix.shape[0]:
+            raise StaleIndexError(
+                f"❌ The numpy IPC index at '{self.index_dir}' is inconsistent ({self.matrix.shape[0]} embeddings, "
+                f"{len(self.documents)} documents, {rows} rows recorded). Re-export it with `python -m retrieval.ipc_numpy_store`."
+            )
+
+    def top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Indexes of the `k` highest scores along the last axis, best first.
+
+        Args:
+            scores (np.ndarray): Similarities of shape `(n_docs,)` or `(n_queries, n_docs)`.
+            k (int): Number of results.
+
+        Returns:
+            np.ndarray: Row indexes of shape `(k,)` or `(n_queries, k)`.
+        """
+        k = min(k, scores.shape[-1])
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1)
+        return np.take_along_axis(candidates, order, axis=-1)
+
+
+class NumpyVectorStore(ManagedVectorStore):
+    """
+    IPC sections served from a flat embedding matrix.
+
+    For a corpus the size of `ipc.json` a single matrix-vector product beats a
+    database round trip, and the memory-mapped matrix is shared through the OS
+    page cache by every process that opens it.
+    """
+
+    def _open_index(self, embeddings) -> NumpyIndex:
+        return NumpyIndex(numpy_index_dir())
+
+    def similarity_search(self, query: str, k: int = 3) -> list:
+        with self._in_use() as (embeddings, index):
+            query_vector = normalize_rows(np.asarray(embeddings.embed_query(query), dtype=np.float32))
+            rows = index.top_k(index.matrix @ query_vector, k)
+        self.query_count += 1
+        return [index.documents[row] for row in rows]
+
+    def batch_similarity_search(self, queries: list[str], k: int = 3) -> list[list]:
+        """
+        Search several queries with one batched encode and one matrix-matrix product.
+
+        Args:
+            queries (list[str]): Queries in natural language.
+            k (int): Number of documents per query.
+
+        Returns:
+            list[list[Document]]: Matching IPC documents for each query.
+        """
+        with self._in_use() as (embeddings, index):
+            query_matrix = normalize_rows(np.asarray(embeddings.embed_documents(queries), dtype=np.float32))
+            rows = index.top_k(query_matrix @ index.matrix.T, k)
+        self.query_count += len(queries)
+        return [[index.documents[row] for row in query_rows] for query_rows in rows]
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    exported = export_numpy_index()
+    print(f"✅ Exported {exported} IPC sections to '{numpy_index_dir()}' in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,208 @@
+# ipc_quantized_store.py
+
+import json
+import os
+import time
+
+import numpy as np
+
+from retrieval.ipc_numpy_store import (
+    EMBEDDINGS_FILE,
+    NumpyIndex,
+    StaleIndexError,
+    current_index_dir,
+    matrix_fingerprint,
+    normalize_rows,
+    numpy_index_dir,
+)
+from retrieval.ipc_store import ManagedVectorStore
+
+
+QUANTIZATION_SCHEMES = ("int8", "binary")
+INT8_CODES_FILE = "codes_int8.npy"
+INT8_SCALES_FILE = "scales_int8.npy"
+BINARY_CODES_FILE = "codes_binary.npy"
+# Row count and fingerprint of the float matrix the codes were computed from
+CODES_INFO_FILE = "codes_info.json"
+
+# Rows scanned per block in the first pass, bounding the float temporaries to a few MB
+_BLOCK_ROWS = 8192
+
+# Number of set bits in every byte value, for Hamming distance on packed codes
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-dimension int8 quantization.
+
+    Args:
+        matrix (np.ndarray): Float embeddings of shape `(n_docs, dim)`.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: int8 codes `(n_docs, dim)` and float32 scales `(dim,)`
+        such that `codes * scales` approximates `matrix`.
+    """
+    scales = np.maximum(np.abs(matrix).max(axis=0), 1e-12) / 127.0
+    codes = np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(matrix: np.ndarray) -> np.ndarray:
+    """
+    Sign-bit quantization packed 8 dimensions per byte.
+
+    Args:
+        matrix (np.ndarray): Float embeddings of shape `(n_docs, dim)` or `(dim,)`.
+
+    Returns:
+        np.ndarray: uint8 codes of shape `(..., ceil(dim / 8))`.
+    """
+    return np.packbits(matrix > 0, axis=-1)
+
+
+def export_quantized_index(index_dir: str = None) -> dict:
+    """
+    Write int8 and binary codes next to an exported numpy float index.
+
+    The float matrix stays on disk and is only memory-mapped for rescoring,
+    so the resident set of a quantized store is the codes plus the few
+    float rows it rescores. `export_numpy_index` calls this for every export.
+
+    Args:
+        index_dir (str): Numpy index directory (default: `numpy_index_dir()`).
+
+    Returns:
+        dict: Bytes on disk of the float matrix and of each code set.
+    """
+    index_dir = current_index_dir(index_dir or numpy_index_dir())
+    matrix = np.load(os.path.join(index_dir, EMBEDDINGS_FILE))
+
+    codes, scales = quantize_int8(matrix)
+    outputs = {
+        INT8_CODES_FILE: codes,
+        INT8_SCALES_FILE: scales,
+        BINARY_CODES_FILE: quantize_binary(matrix),
+    }
+    for file_name, array in outputs.items():
+        path = os.path.join(index_dir, file_name)
+        with open(path + ".tmp", "wb") as file:
+            np.save(file, array)
+        os.replace(path + ".tmp", path)
+
+    info_path = os.path.join(index_dir, CODES_INFO_FILE)
+    with open(info_path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump({"rows": int(matrix.shape[0]), "fingerprint": matrix_fingerprint(matrix)}, file)
+    os.replace(info_path + ".tmp", info_path)
+
+    return {
+        "float32": matrix.nbytes,
+        "int8": codes.nbytes + scales.nbytes,
+        "binary": outputs[BINARY_CODES_FILE].nbytes,
+    }
+
+
+class QuantizedIndex(NumpyIndex):
+    """
+    Numpy IPC index searched over compact codes, with exact float rescoring.
+
+    The first pass scores every row from int8 codes (asymmetric dot product
+    against the float query) or binary codes (Hamming distance), keeps the best
+    `k * rescore_factor` candidates and reorders them by exact cosine similarity
+    read from the memory-mapped float matrix.
+    """
+
+    def __init__(self, index_dir: str, scheme: str, rescore_factor: int):
+        if scheme not in QUANTIZATION_SCHEMES:
+            raise ValueError(f"❌ Unknown quantization scheme '{scheme}'. Expected one of {QUANTIZATION_SCHEMES}.")
+        super().__init__(index_dir)
+
+        codes_file = INT8_CODES_FILE if scheme == "int8" else BINARY_CODES_FILE
+        if not os.path.exists(os.path.join(self.index_dir, codes_file)):
+            raise FileNotFoundError(
+                f"❌ No {scheme} codes at '{self.index_dir}'. Run `python -m retrieval.ipc_quantized_store` to export them."
+            )
+
+        self.scheme = scheme
+        self.rescore_factor = rescore_factor
+        # Codes are small enough to keep resident; the float matrix stays memory-mapped
+        self.codes = np.load(os.path.join(self.index_dir, codes_file))
+        self.scales = np.load(os.path.join(self.index_dir, INT8_SCALES_FILE)) if scheme == "int8" else None
+
+        # Codes of another matrix would map first-pass rows to the wrong sections
+        codes_info_path = os.path.join(self.index_dir, CODES_INFO_FILE)
+        codes_info = {}
+        if os.path.exists(codes_info_path):
+            with open(codes_info_path, "r", encoding="utf-8") as file:
+                codes_info = json.load(file)
+        fingerprint, recorded = (self.info or {}).get("fingerprint"), codes_info.get("fingerprint")
+        if len(self.codes) != self.matrix.shape[0] or (fingerprint and recorded and recorded != fingerprint):
+            raise StaleIndexError(
+                f"❌ The {scheme} codes at '{self.index_dir}' were computed from another export of the numpy index. "
+                f"Run `python -m retrieval.ipc_quantized_store` to regenerate them."
+            )
+
+    @property
+    def code_bytes(self) -> int:
+        """Resident size of the first-pass codes."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _first_pass(self, query_vector: np.ndarray) -> np.ndarray:
+        if self.scheme == "int8":
+            weighted_query = query_vector * self.scales
+            return np.concatenate([
+                self.codes[start:start + _BLOCK_ROWS].astype(np.float32) @ weighted_query
+                for start in range(0, len(self.codes), _BLOCK_ROWS)
+            ])
+
+        query_code = quantize_binary(query_vector)
+        # Negated Hamming distance, so larger is better like a similarity
+        return -_POPCOUNT[np.bitwise_xor(self.codes, query_code)].sum(axis=1, dtype=np.int32)
+
+    def search(self, query_vector: np.ndarray, k: int) -> np.ndarray:
+        """
+        Rows of the `k` nearest documents to a normalized query vector, best first.
+
+        Args:
+            query_vector (np.ndarray): L2-normalized float32 query embedding.
+            k (int): Number of results.
+
+        Returns:
+            np.ndarray: Row indexes of shape `(k,)`.
+        """
+        candidates = self.top_k(self._first_pass(query_vector), k * self.rescore_factor)
+        candidates.sort()  # sequential reads from the memory-mapped float matrix
+        exact_scores = np.asarray(self.matrix[candidates]) @ query_vector
+        return candidates[self.top_k(exact_scores, k)]
+
+
+class QuantizedVectorStore(ManagedVectorStore):
+    """
+    IPC sections served from int8 or binary codes with float rescoring.
+
+    Configured with `IPC_QUANTIZATION` (`int8` or `binary`, default `int8`) and
+    `IPC_RESCORE_FACTOR` (candidates rescored per requested result, default 4).
+    """
+
+    def _open_index(self, embeddings) -> QuantizedIndex:
+        return QuantizedIndex(
+            numpy_index_dir(),
+            scheme=os.getenv("IPC_QUANTIZATION", "int8"),
+            rescore_factor=int(os.getenv("IPC_RESCORE_FACTOR", "4"))
+        )
+
+    def similarity_search(self, query: str, k: int = 3) -> list:
+        with self._in_use() as (embeddings, index):
+            query_vector = normalize_rows(np.asarray(embeddings.embed_query(query), dtype=np.float32))
+            rows = index.search(query_vector, k)
+        self.query_count += 1
+        return [index.documents[row] for row in rows]
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    sizes = export_quantized_index()
+    print(f"✅ Exported quantized codes to '{numpy_index_dir()}' in {time.perf_counter() - start:.2f}s")
+    print(f"   float32  {sizes['float32'] / 1024:>10.1f} KiB")
+    for scheme in QUANTIZATION_SCHEMES:
+        print(f"   {scheme:<8} {sizes[scheme] / 1024:>10.1f} KiB ({sizes['float32'] / sizes[scheme]:.1f}x smaller)")
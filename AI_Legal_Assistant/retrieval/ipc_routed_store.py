@@ -0,0 +1,180 @@
+# ipc_routed_store.py
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from retrieval.ipc_numpy_store import (
+    EMBEDDINGS_FILE,
+    METADATA_FILE,
+    NumpyIndex,
+    StaleIndexError,
+    current_index_dir,
+    matrix_fingerprint,
+    normalize_rows,
+    numpy_index_dir,
+)
+from retrieval.ipc_store import ManagedVectorStore
+
+
+CENTROIDS_FILE = "chapter_centroids.npy"
+CHAPTERS_FILE = "chapter_rows.json"
+
+
+def export_chapter_index(index_dir: str = None) -> int:
+    """
+    Precompute chapter centroids and per-chapter row lists for an exported numpy index.
+
+    `export_numpy_index` calls this for every export; the row lists record the
+    fingerprint of the matrix they index.
+
+    Args:
+        index_dir (str): Numpy index directory (default: `numpy_index_dir()`).
+
+    Returns:
+        int: Number of chapters.
+    """
+    index_dir = current_index_dir(index_dir or numpy_index_dir())
+    matrix = np.load(os.path.join(index_dir, EMBEDDINGS_FILE))
+    with open(os.path.join(index_dir, METADATA_FILE), "r", encoding="utf-8") as file:
+        records = json.load(file)
+
+    chapter_rows = {}
+    for row, record in enumerate(records):
+        chapter_rows.setdefault(str(record["metadata"].get("chapter")), []).append(row)
+
+    chapters = list(chapter_rows)
+    centroids = normalize_rows(np.stack([matrix[chapter_rows[chapter]].mean(axis=0) for chapter in chapters]))
+
+    centroids_path = os.path.join(index_dir, CENTROIDS_FILE)
+    chapters_path = os.path.join(index_dir, CHAPTERS_FILE)
+    with open(centroids_path + ".tmp", "wb") as file:
+        np.save(file, centroids.astype(np.float32))
+    with open(chapters_path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump({
+            "chapters": chapters,
+            "rows": [chapter_rows[chapter] for chapter in chapters],
+            "fingerprint": matrix_fingerprint(matrix),
+        }, file)
+    os.replace(centroids_path + ".tmp", centroids_path)
+    os.replace(chapters_path + ".tmp", chapters_path)
+
+    return len(chapters)
+
+
+class ChapterRoutedIndex(NumpyIndex):
+    """
+    Numpy IPC index searched in two stages: chapters first, then sections within them.
+
+    The query is compared with one centroid per chapter, and only the rows of
+    the `route_chapters` closest chapters are scored. When the best centroid is
+    less similar than `min_similarity` (the query does not clearly belong to any
+    chapter) or the routed chapters hold fewer than `k` sections, the whole
+    matrix is searched instead.
+    """
+
+    def __init__(self, index_dir: str, route_chapters: int, min_similarity: float):
+        super().__init__(index_dir)
+        centroids_path = os.path.join(self.index_dir, CENTROIDS_FILE)
+        if not os.path.exists(centroids_path):
+            raise FileNotFoundError(
+                f"❌ No chapter centroids at '{self.index_dir}'. Run `python -m retrieval.ipc_routed_store` to export them."
+            )
+
+        self.centroids = np.load(centroids_path)
+        with open(os.path.join(self.index_dir, CHAPTERS_FILE), "r", encoding="utf-8") as file:
+            chapter_index = json.load(file)
+        self.chapters = chapter_index["chapters"]
+        self.chapter_rows = [np.asarray(rows, dtype=np.int64) for rows in chapter_index["rows"]]
+
+        # Row lists of another export would score the wrong sections, or rows past the end of the matrix
+        fingerprint, recorded = (self.info or {}).get("fingerprint"), chapter_index.get("fingerprint")
+        max_row = max((int(rows.max()) for rows in self.chapter_rows if len(rows)), default=-1)
+        if max_row >= len(self.matrix) or len(self.centroids) != len(self.chapters) or (
+            fingerprint and recorded and recorded != fingerprint
+        ):
+            raise StaleIndexError(
+                f"❌ The chapter index at '{self.index_dir}' was computed from another export of the numpy index. "
+                f"Run `python -m retrieval.ipc_routed_store` to regenerate it."
+            )
+
+        self.route_chapters = route_chapters
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.fallbacks = 0
+        self.rows_scored = 0
+
+    def search(self, query_vector: np.ndarray, k: int) -> np.ndarray:
+        """
+        Rows of the `k` nearest documents to a normalized query vector, best first.
+
+        Args:
+            query_vector (np.ndarray): L2-normalized float32 query embedding.
+            k (int): Number of results.
+
+        Returns:
+            np.ndarray: Row indexes of shape `(k,)`.
+        """
+        centroid_scores = self.centroids @ query_vector
+        top_chapters = self.top_k(centroid_scores, self.route_chapters)
+        rows = np.sort(np.concatenate([self.chapter_rows[chapter] for chapter in top_chapters]))
+
+        if centroid_scores[top_chapters[0]] < self.min_similarity or len(rows) < k:
+            with self._lock:
+                self.fallbacks += 1
+                self.rows_scored += len(self.matrix)
+            return self.top_k(self.matrix @ query_vector, k)
+
+        with self._lock:
+            self.routed += 1
+            self.rows_scored += len(rows)
+        return rows[self.top_k(np.asarray(self.matrix[rows]) @ query_vector, k)]
+
+    def routing_stats(self) -> dict:
+        """
+        Routing counters since the index was opened.
+
+        Returns:
+            dict: Routed and fallback searches, fallback rate and mean fraction of rows scored.
+        """
+        searches = self.routed + self.fallbacks
+        return {
+            "routed": self.routed,
+            "fallbacks": self.fallbacks,
+            "fallback_rate": self.fallbacks / searches if searches else 0.0,
+            "rows_scored_fraction": self.rows_scored / (searches * len(self.matrix)) if searches else 0.0,
+        }
+
+
+class ChapterRoutedVectorStore(ManagedVectorStore):
+    """
+    IPC sections served by chapter-routed search over the numpy index.
+
+    Configured with `IPC_ROUTE_CHAPTERS` (chapters searched per query, default 3)
+    and `IPC_ROUTE_MIN_SIMILARITY` (centroid similarity below which the whole
+    index is searched, default 0.2).
+    """
+
+    def _open_index(self, embeddings) -> ChapterRoutedIndex:
+        return ChapterRoutedIndex(
+            numpy_index_dir(),
+            route_chapters=int(os.getenv("IPC_ROUTE_CHAPTERS", "3")),
+            min_similarity=float(os.getenv("IPC_ROUTE_MIN_SIMILARITY", "0.2"))
+        )
+
+    def similarity_search(self, query: str, k: int = 3) -> list:
+        with self._in_use() as (embeddings, index):
+            query_vector = normalize_rows(np.asarray(embeddings.embed_query(query), dtype=np.float32))
+            rows = index.search(query_vector, k)
+        self.query_count += 1
+        return [index.documents[row] for row in rows]
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    exported = export_chapter_index()
+    print(f"✅ Exported {exported} chapter centroids to '{numpy_index_dir()}' in {time.perf_counter() - start:.2f}s")
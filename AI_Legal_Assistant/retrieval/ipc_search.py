@@ -0,0 +1,160 @@
+# ipc_search.py
+
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from ipc_vectordb_builder import document_id, load_ipc_data, prepare_documents
+from retrieval.embedding_client import embedding_server_available, remote_similarity_search
+from retrieval.ipc_bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+from retrieval.ipc_section_index import SectionIndex, parse_citations
+from retrieval.ipc_store import doc_to_result, get_ipc_store
+from retrieval.offence_cache import get_offence_cache
+
+
+load_dotenv()
+
+SEARCH_MODES = ("dense", "bm25", "hybrid", "auto")
+
+_lexical_lock = threading.Lock()
+_lexical_index = None
+
+
+class LexicalIndex:
+    """BM25 and section-number indexes over `ipc.json` plus the prepared documents they point to."""
+
+    def __init__(self, ipc_json_path: str):
+        entries = load_ipc_data(ipc_json_path)
+        self.bm25 = BM25Index(entries)
+        self.sections = SectionIndex(entries)
+        self.documents = prepare_documents(entries)
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Return the process-wide lexical indexes, building them from `IPC_JSON_PATH` on first use."""
+    global _lexical_index
+
+    if _lexical_index is None:
+        with _lexical_lock:
+            if _lexical_index is None:
+                ipc_json_path = os.getenv("IPC_JSON_PATH")
+                if not ipc_json_path:
+                    raise EnvironmentError("❌ 'IPC_JSON_PATH' is not set in .env")
+                _lexical_index = LexicalIndex(ipc_json_path)
+    return _lexical_index
+
+
+def warmup_ipc_search(background: bool = False):
+    """
+    Build the BM25 index and load the dense vectorstore ahead of the first query.
+
+    The vectorstore is not loaded when a shared embedding server is running (see `embedding_server.py`).
+    """
+    get_lexical_index()
+    offence_cache = get_offence_cache()
+    if offence_cache is not None:
+        offence_cache.load()
+    if embedding_server_available():
+        return None
+    return get_ipc_store().warmup(background=background)
+
+
+def _dense_ranking(query: str, depth: int, use_embedding_server: bool = True) -> list:
+    # The embedding server, when running, saves this process its own copy of the model and index
+    docs = remote_similarity_search(query, depth) if use_embedding_server else None
+    if docs is not None:
+        return docs
+    return get_ipc_store().similarity_search(query, k=depth)
+
+
+def _bm25_ranking(query: str, depth: int) -> list:
+    index = get_lexical_index()
+    return [index.documents[doc_index] for doc_index, _ in index.bm25.search(query, k=depth)]
+
+
+def search_ipc(
+    query: str, k: int = 3, mode: str = None, use_offence_cache: bool = True, use_embedding_server: bool = True
+) -> list[dict]:
+    """
+    Retrieve the IPC sections most relevant to a query.
+
+    Frequent offence queries ("theft", "criminal intimidation") are answered
+    from the precomputed table in `retrieval/offence_cache.py` when it is built.
+    Explicit citations ("Section 379", "IPC 420", "498A IPC") are answered
+    directly from the section-number index; only the remaining free text, if
+    it has any content words, goes through the search `mode`:
+        - `dense`: embedding similarity search only.
+        - `bm25`: lexical BM25 over section titles and descriptions only.
+        - `hybrid`: both, merged with reciprocal rank fusion.
+        - `auto`: BM25 alone when its top-k is lexically confident, hybrid otherwise.
+
+    Args:
+        query (str): User query in natural language.
+        k (int): Number of sections to return (every cited section is always returned).
+        mode (str): One of `SEARCH_MODES` (default: `IPC_SEARCH_MODE` or `dense`).
+        use_offence_cache (bool): Look the query up in the precomputed offence table first.
+        use_embedding_server (bool): Send dense search to the embedding server when it is running.
+
+    Returns:
+        list[dict]: Matching IPC sections with metadata and content.
+    """
+    mode = mode or os.getenv("IPC_SEARCH_MODE", "dense")
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"❌ Unknown IPC search mode '{mode}'. Expected one of {SEARCH_MODES}.")
+
+    index = get_lexical_index()
+    offence_cache = get_offence_cache() if use_offence_cache else None
+    cached_sections = offence_cache.lookup(query, k, mode) if offence_cache is not None else None
+    if cached_sections is not None:
+        return [
+            doc_to_result(index.documents[entry_index])
+            for entry_index in map(index.sections.lookup, cached_sections)
+            if entry_index is not None
+        ]
+
+    cited_sections, free_text = parse_citations(query)
+    cited_docs = [
+        index.documents[entry_index]
+        for entry_index in map(index.sections.lookup, cited_sections)
+        if entry_index is not None
+    ]
+
+    if not cited_docs:
+        return [doc_to_result(doc) for doc in _search_free_text(query, k, mode, use_embedding_server)]
+
+    results = [doc_to_result(doc) for doc in cited_docs]
+    remaining = k - len(results)
+    if remaining <= 0 or not tokenize(free_text):
+        return results
+
+    cited_ids = {document_id(doc) for doc in cited_docs}
+    extra_docs = [
+        doc for doc in _search_free_text(free_text, k + len(cited_docs), mode, use_embedding_server)
+        if document_id(doc) not in cited_ids
+    ]
+    return results + [doc_to_result(doc) for doc in extra_docs[:remaining]]
+
+
+def _search_free_text(query: str, k: int, mode: str, use_embedding_server: bool = True) -> list:
+    if mode == "dense":
+        return _dense_ranking(query, k, use_embedding_server)
+
+    if mode in ("bm25", "auto"):
+        index = get_lexical_index()
+        hits = index.bm25.search(query, k=k)
+        min_coverage = float(os.getenv("IPC_BM25_MIN_COVERAGE", "0.6"))
+        if mode == "bm25" or index.bm25.is_confident(query, hits, k, min_coverage):
+            return [index.documents[doc_index] for doc_index, _ in hits]
+
+    # Hybrid: fuse a deeper candidate list from each retriever
+    depth = max(k * 4, 10)
+    dense_docs = _dense_ranking(query, depth, use_embedding_server)
+    bm25_docs = _bm25_ranking(query, depth)
+
+    by_id = {document_id(doc): doc for doc in bm25_docs + dense_docs}
+    fused = reciprocal_rank_fusion([
+        [document_id(doc) for doc in dense_docs],
+        [document_id(doc) for doc in bm25_docs],
+    ])
+    return [by_id[doc_id] for doc_id in fused[:k]]
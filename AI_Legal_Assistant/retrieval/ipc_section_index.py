@@ -0,0 +1,108 @@
+# ipc_section_index.py
+
+import re
+from collections import defaultdict
+
+
+_NUMBER = r"\d+[a-z]{0,2}(?:\s*\(\w+\))*"
+_LIST_SEPARATOR = r"\s*(?:,|and|&|/|or)\s*"
+# A further number only belongs to a singular citation when the list ends or continues after it,
+# so "Section 379 and 380" cites both but "Section 379 and 2 others" cites only 379
+_LIST_END = r"(?=\s*(?:$|[,;.:)&/]|(?:and|or|of|r/w|read|ipc)\b|i\.p\.c))"
+
+# "Sections 379 and 380", "Secs. 302, 34", "Ss. 420/120B"
+_PLURAL_CITATION = re.compile(
+    rf"\b(?:sections|secs\.?|ss\.)\s*({_NUMBER}(?:{_LIST_SEPARATOR}{_NUMBER})*)",
+    re.IGNORECASE
+)
+# "Section 379", "Sec. 420", "S. 302", "u/s 498A", "IPC 420", "§ 420", "Section 376(2)", "u/s 379/411"
+_PREFIXED_CITATION = re.compile(
+    rf"(?:\b(?:section|sec\.?|s\.|u/s\.?|ipc)|§)\s*({_NUMBER}(?:{_LIST_SEPARATOR}{_NUMBER}{_LIST_END})*)",
+    re.IGNORECASE
+)
+# "420 IPC", "302 of the IPC", "498A of Indian Penal Code"
+_SUFFIXED_CITATION = re.compile(
+    r"\b(\d+[a-z]{0,2})(?:\s*\(\w+\))*\s*(?:of\s+(?:the\s+)?)?(?:ipc|indian\s+penal\s+code)\b",
+    re.IGNORECASE
+)
+_SECTION_NUMBER = re.compile(r"(?<![(\w])(\d+[a-z]{0,2})(?!\w)", re.IGNORECASE)
+
+
+def normalize_section(section) -> str:
+    """Canonical form of a section number, e.g. `498a` -> `498A`, `379` -> `379`."""
+    return str(section).strip().upper()
+
+
+def parse_citations(text: str) -> tuple[list[str], str]:
+    """
+    Extract explicit IPC section citations from free text.
+
+    Args:
+        text (str): Query or case summary, e.g. "theft under Section 379 and 380 IPC".
+
+    Returns:
+        tuple[list[str], str]: Cited section numbers in order of appearance
+        (normalized, de-duplicated) and the text with the citations removed.
+    """
+    matches = sorted(
+        [
+            *_PLURAL_CITATION.finditer(text),
+            *_PREFIXED_CITATION.finditer(text),
+            *_SUFFIXED_CITATION.finditer(text),
+        ],
+        key=lambda match: match.start()
+    )
+
+    sections, spans = [], []
+    for match in matches:
+        if spans and match.start() < spans[-1][1]:
+            continue  # overlaps a citation already taken, e.g. "IPC 420 IPC"
+        spans.append(match.span())
+        for number in _SECTION_NUMBER.findall(match.group(1)):
+            section = normalize_section(number)
+            if section not in sections:
+                sections.append(section)
+
+    remaining, cursor = [], 0
+    for start, end in spans:
+        remaining.append(text[cursor:start])
+        cursor = end
+    remaining.append(text[cursor:])
+
+    return sections, " ".join("".join(remaining).split())
+
+
+class SectionIndex:
+    """Precomputed section-number -> entry and chapter -> entries lookups over `ipc.json`."""
+
+    def __init__(self, entries: list[dict]):
+        self.by_section = {}
+        self.by_chapter = defaultdict(list)
+
+        for entry_index, entry in enumerate(entries):
+            self.by_section[normalize_section(entry["Section"])] = entry_index
+            self.by_chapter[entry["chapter"]].append(entry_index)
+
+    def lookup(self, section) -> int | None:
+        """
+        Entry index of a section number.
+
+        Args:
+            section (str | int): Section number such as `379` or `"498A"`.
+
+        Returns:
+            int | None: Entry index, or None when the section does not exist.
+        """
+        return self.by_section.get(normalize_section(section))
+
+    def chapter_entries(self, chapter: int) -> list[int]:
+        """
+        Entry indexes of every section in a chapter, in statute order.
+
+        Args:
+            chapter (int): Chapter number.
+
+        Returns:
+            list[int]: Entry indexes (empty for an unknown chapter).
+        """
+        return self.by_chapter.get(chapter, [])
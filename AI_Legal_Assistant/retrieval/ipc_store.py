@@ -0,0 +1,326 @@
+# ipc_store.py
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import chromadb
+from dotenv import load_dotenv
+from langchain_chroma import Chroma
+
+from retrieval.embedding_backends import (
+    MicroBatchingEmbeddings,
+    check_index_embedding,
+    create_embeddings,
+    embedding_fingerprint,
+    embedding_spec,
+    with_micro_batching,
+)
+from retrieval.embedding_cache import CachedEmbeddings, with_query_cache
+
+
+load_dotenv()
+
+VECTOR_BACKENDS = ("chroma", "numpy", "quantized", "routed")
+
+
+def doc_to_result(doc) -> dict:
+    """
+    Convert a retrieved IPC document into the dict shape returned by the tools.
+
+    Args:
+        doc (Document): LangChain document produced by `prepare_documents`.
+
+    Returns:
+        dict: Section metadata and content.
+    """
+    return {
+        "section": doc.metadata.get("section"),
+        "section_title": doc.metadata.get("section_title"),
+        "chapter": doc.metadata.get("chapter"),
+        "chapter_title": doc.metadata.get("chapter_title"),
+        "content": doc.page_content
+    }
+
+
+class ManagedVectorStore:
+    """
+    Process-wide handle on the IPC embedding model and a vector index.
+
+    The sentence-transformer and the index are opened once and shared by every
+    tool call, crew run and Streamlit session in the process. Loading is guarded
+    by a lock so concurrent callers never build a second copy; searches run
+    without the lock against a snapshot of the loaded handles, and `close` /
+    `reload` wait for searches in flight before releasing those handles.
+
+    The embedding model comes from `retrieval.embedding_backends`; opening an
+    index built with a different model raises `EmbeddingModelMismatch`.
+
+    Subclasses implement `_open_index` and `similarity_search`.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        self._active_searches = 0
+        self._closing = False
+        self._embeddings = None
+        self._index = None
+        self._warmup_thread = None
+        self.load_seconds = None
+        self.index_seconds = None
+        self.query_count = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the embedding model and vector index are already in memory."""
+        return self._index is not None
+
+    def load(self):
+        """
+        Load the embedding model and open the vector index if needed.
+
+        Returns:
+            The shared index handle.
+        """
+        index = self._index
+        if index is not None:
+            return index
+
+        with self._lock:
+            if self._index is None:
+                self._open()
+            return self._index
+
+    @contextmanager
+    def _in_use(self):
+        """
+        Pin the loaded embeddings and index for one search.
+
+        Yields:
+            tuple: `(embeddings, index)`, kept open until the block exits.
+        """
+        with self._lock:
+            while self._closing:
+                self._idle.wait()
+            if self._index is None:
+                self._open()
+            self._active_searches += 1
+            handles = (self._embeddings, self._index)
+        try:
+            yield handles
+        finally:
+            with self._lock:
+                self._active_searches -= 1
+                if self._active_searches == 0:
+                    self._idle.notify_all()
+
+    def _open(self):
+        load_dotenv()
+
+        start = time.perf_counter()
+        spec = embedding_spec()
+        # Cache hits never wait for a batch; only misses reach the model
+        embeddings = with_query_cache(
+            with_micro_batching(create_embeddings(spec)), model_name=embedding_fingerprint(spec)
+        )
+        index_start = time.perf_counter()
+        index = self._open_index(embeddings)
+        check_index_embedding(self._index_embedding_info(index), spec)
+
+        self._embeddings = embeddings
+        self._index = index
+        self.index_seconds = time.perf_counter() - index_start
+        self.load_seconds = time.perf_counter() - start
+
+    def _open_index(self, embeddings):
+        raise NotImplementedError
+
+    def _index_embedding_info(self, index) -> dict | None:
+        """Embedding model metadata recorded with an opened index (flat indexes expose it as `info`)."""
+        return getattr(index, "info", None)
+
+    def warmup(self, background: bool = False):
+        """
+        Load the store ahead of the first query.
+
+        Args:
+            background (bool): Load in a daemon thread instead of blocking the caller.
+
+        Returns:
+            threading.Thread | None: The warmup thread when `background` is set.
+        """
+        if not background:
+            self.load()
+            return None
+
+        with self._lock:
+            if self.is_loaded:
+                return None
+            if self._warmup_thread is None or not self._warmup_thread.is_alive():
+                self._warmup_thread = threading.Thread(
+                    target=self.load, name="ipc-store-warmup", daemon=True
+                )
+                self._warmup_thread.start()
+            return self._warmup_thread
+
+    def similarity_search(self, query: str, k: int = 3) -> list:
+        """
+        Run a dense similarity search against the shared index.
+
+        Args:
+            query (str): User query in natural language.
+            k (int): Number of documents to return.
+
+        Returns:
+            list[Document]: Matching IPC documents.
+        """
+        raise NotImplementedError
+
+    def embed_query(self, query: str) -> list[float]:
+        """
+        Embed a query with the shared (cached, possibly micro-batched) embedding model.
+
+        Args:
+            query (str): User query in natural language.
+
+        Returns:
+            list[float]: Query embedding.
+        """
+        with self._in_use() as (embeddings, _):
+            return embeddings.embed_query(query)
+
+    def reload(self):
+        """Drop the current handles and reopen them, e.g. after the index is rebuilt."""
+        with self._lock:
+            self.close()
+            self._open()
+
+    def cache_stats(self) -> dict | None:
+        """
+        Query embedding cache counters.
+
+        Returns:
+            dict | None: Hit/miss counters, or None when the cache is disabled or the store is not loaded.
+        """
+        embeddings = self._embeddings
+        if isinstance(embeddings, CachedEmbeddings):
+            return embeddings.cache.stats()
+        return None
+
+    def _batching_embeddings(self) -> MicroBatchingEmbeddings | None:
+        embeddings = self._embeddings
+        if isinstance(embeddings, CachedEmbeddings):
+            embeddings = embeddings.embeddings
+        return embeddings if isinstance(embeddings, MicroBatchingEmbeddings) else None
+
+    def batch_stats(self) -> dict | None:
+        """
+        Query micro-batching counters.
+
+        Returns:
+            dict | None: Queries, forward passes and mean batch size, or None when batching is off or the store is not loaded.
+        """
+        batching = self._batching_embeddings()
+        return batching.stats() if batching is not None else None
+
+    def close(self):
+        """Release the embedding model, the query cache and the index once searches in flight finish."""
+        with self._lock:
+            # New searches wait until the handles are released (and, in `reload`, reopened)
+            self._closing = True
+            try:
+                while self._active_searches:
+                    self._idle.wait()
+
+                batching = self._batching_embeddings()
+                if batching is not None:
+                    batching.close()
+                if isinstance(self._embeddings, CachedEmbeddings):
+                    self._embeddings.cache.close()
+                self._index = None
+                self._embeddings = None
+                self.load_seconds = None
+                self.index_seconds = None
+            finally:
+                self._closing = False
+                self._idle.notify_all()
+
+
+class ChromaVectorStore(ManagedVectorStore):
+    """IPC sections served from the persisted Chroma collection."""
+
+    def _open_index(self, embeddings) -> Chroma:
+        persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH")
+        if not persist_dir_path:
+            raise EnvironmentError("❌ 'PERSIST_DIRECTORY_PATH' is not set in .env")
+        collection_name = os.getenv("IPC_COLLECTION_NAME")
+
+        # Opened through the client so a missing collection fails here instead of being created empty
+        client = chromadb.PersistentClient(path=persist_dir_path)
+        self._collection_metadata = client.get_collection(collection_name).metadata
+        return Chroma(
+            client=client,
+            collection_name=collection_name,
+            embedding_function=embeddings
+        )
+
+    def _index_embedding_info(self, index) -> dict | None:
+        return self._collection_metadata
+
+    def similarity_search(self, query: str, k: int = 3) -> list:
+        with self._in_use() as (_, index):
+            docs = index.similarity_search(query, k=k)
+        self.query_count += 1
+        return docs
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_ipc_store(backend: str = None) -> ManagedVectorStore:
+    """
+    Return the process-wide IPC vector store.
+
+    Args:
+        backend (str): One of `VECTOR_BACKENDS` (default: `IPC_VECTOR_BACKEND` or `chroma`).
+
+    Returns:
+        ManagedVectorStore: The shared store for that backend.
+    """
+    backend = backend or os.getenv("IPC_VECTOR_BACKEND", "chroma")
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"❌ Unknown IPC vector backend '{backend}'. Expected one of {VECTOR_BACKENDS}.")
+
+    with _stores_lock:
+        if backend not in _stores:
+            # Imported lazily so the Chroma backend does not pay for numpy indexes
+            if backend == "numpy":
+                from retrieval.ipc_numpy_store import NumpyVectorStore
+                _stores[backend] = NumpyVectorStore()
+            elif backend == "quantized":
+                from retrieval.ipc_quantized_store import QuantizedVectorStore
+                _stores[backend] = QuantizedVectorStore()
+            elif backend == "routed":
+                from retrieval.ipc_routed_store import ChapterRoutedVectorStore
+                _stores[backend] = ChapterRoutedVectorStore()
+            else:
+                _stores[backend] = ChromaVectorStore()
+        return _stores[backend]
+
+
+def warmup_ipc_store(background: bool = False):
+    """Load the process-wide IPC vector store ahead of the first query."""
+    return get_ipc_store().warmup(background=background)
+
+
+def reload_ipc_store():
+    """Reopen the process-wide IPC vector store."""
+    get_ipc_store().reload()
+
+
+def close_ipc_store():
+    """Release the process-wide IPC vector store."""
+    get_ipc_store().close()
@@ -0,0 +1,304 @@
+# offence_cache.py
+#
+# Precomputed top-k IPC sections for frequent offence queries.
+#
+#   python -m retrieval.offence_cache [--k 3] [--min-hits 2] [--max-history 500]
+#
+# Most traffic names a handful of offences ("theft", "cheating", "criminal
+# intimidation"), and every crew run repeats the same search for them. This table
+# holds the search results for offence terms taken from short `section_title`s in
+# the offence chapters ("Theft", "Punishment for cheating" -> "cheating") and for
+# queries the query embedding cache has seen repeatedly. It is loaded at startup, and `search_ipc`
+# answers any query with the same index terms (case, punctuation, stopwords such
+# as "IPC section for" and plural/-ing endings ignored) from memory.
+#
+# `ipc_vectordb_builder.py` rebuilds the table when a build changed the indexed
+# sections or the embedding model, or the table is missing or was computed for
+# another configuration; running processes pick up the new file on their next lookup. Entries are only used
+# with the embedding model, vector backend, search mode and k they were computed with.
+#
+#   IPC_OFFENCE_CACHE       `0` disables the table
+#   IPC_OFFENCE_CACHE_PATH  default `<PERSIST_DIRECTORY_PATH>/offence_cache.json`
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from ipc_vectordb_builder import load_ipc_data
+from retrieval.embedding_backends import embedding_fingerprint
+from retrieval.embedding_cache import query_cache_path
+from retrieval.ipc_bm25 import tokenize
+from retrieval.ipc_section_index import parse_citations
+
+
+# Titles up to this many words (after dropping "Punishment for") name an offence rather than a variant of one
+MAX_TERM_WORDS = 4
+
+# Chapters I-IV define terms, punishments and general exceptions; offences start at Chapter V (abetment)
+FIRST_OFFENCE_CHAPTER = 5
+
+# Single index terms that name a legal notion rather than an offence someone would search for
+GENERIC_TERMS = frozenset({"abettor", "act", "force", "offence", "person", "property", "punishment", "unnatural"})
+
+_DEFINITION = re.compile(r"\bdefin(?:ed|ition)\b", re.IGNORECASE)
+_PUNISHMENT_PREFIX = re.compile(r"^punishment (?:for|of) ", re.IGNORECASE)
+_ETC_SUFFIX = re.compile(r",?\s*etc\.?$", re.IGNORECASE)
+
+
+def offence_key(query: str) -> str:
+    """Index terms of a query, in order, so phrasings that differ only in filler words share an entry."""
+    return " ".join(tokenize(query))
+
+
+def offence_cache_path() -> str:
+    """
+    Location of the precomputed offence table.
+
+    Returns:
+        str: `IPC_OFFENCE_CACHE_PATH`, or `<PERSIST_DIRECTORY_PATH>/offence_cache.json` by default.
+    """
+    path = os.getenv("IPC_OFFENCE_CACHE_PATH")
+    if path:
+        return path
+    return os.path.join(os.getenv("PERSIST_DIRECTORY_PATH", "."), "offence_cache.json")
+
+
+def title_terms(entries: list[dict]) -> list[str]:
+    """
+    Offence terms from short section titles, e.g. "Punishment for theft" -> "theft".
+
+    Only sections of the offence chapters are used, and definitions ("Coin defined")
+    and titles that reduce to one generic term ("Punishment", "Force") are skipped.
+
+    Args:
+        entries (list[dict]): IPC entries loaded from JSON.
+
+    Returns:
+        list[str]: Lowercased terms in source order.
+    """
+    terms = []
+    for entry in entries:
+        if int(entry.get("chapter") or 0) < FIRST_OFFENCE_CHAPTER or _DEFINITION.search(entry["section_title"]):
+            continue
+        title = _ETC_SUFFIX.sub("", _PUNISHMENT_PREFIX.sub("", entry["section_title"].strip()))
+        if not title or len(title.split()) > MAX_TERM_WORDS or offence_key(title) in GENERIC_TERMS:
+            continue
+        terms.append(title.lower())
+    return terms
+
+
+def history_terms(min_hits: int, limit: int) -> list[str]:
+    """
+    Frequent queries from the query embedding cache, most hit first.
+
+    Args:
+        min_hits (int): Cache hits a query needs to be included.
+        limit (int): Most queries to return.
+
+    Returns:
+        list[str]: Normalized query texts (empty when there is no cache file yet).
+    """
+    path = query_cache_path()
+    if not os.path.exists(path):
+        return []
+
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = db.execute(
+            "SELECT query, SUM(hits) AS total FROM query_embeddings GROUP BY query"
+            " HAVING total >= ? ORDER BY total DESC LIMIT ?",
+            (min_hits, limit)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []  # Cache file without the table yet
+    finally:
+        db.close()
+    return [query for query, _ in rows]
+
+
+def _matches_configuration(table: dict, mode: str = None) -> bool:
+    # Results from another model or index are not what a live search would return
+    return table.get("embedding") == embedding_fingerprint() and (
+        table.get("vector_backend") == os.getenv("IPC_VECTOR_BACKEND", "chroma")
+    ) and (mode is None or table.get("mode") == mode)
+
+
+def offence_cache_current(path: str = None) -> bool:
+    """
+    Whether the table on disk was computed with the current embedding model, vector backend and search mode.
+
+    Args:
+        path (str): Table file (default: `offence_cache_path()`).
+
+    Returns:
+        bool: False when the table is missing, unreadable or computed for another configuration.
+    """
+    try:
+        with open(path or offence_cache_path(), "r", encoding="utf-8") as file:
+            table = json.load(file)
+    except (OSError, ValueError):
+        return False
+    return _matches_configuration(table, mode=os.getenv("IPC_SEARCH_MODE", "dense"))
+
+
+def build_offence_cache(k: int = 3, min_hits: int = 2, max_history: int = 500, path: str = None) -> dict:
+    """
+    Compute and save the top-k results of every offence term with the current index.
+
+    Terms are searched on this process's own index, never through the embedding
+    server, so the table reflects the index that was just built.
+
+    Args:
+        k (int): Results per term (the IPC search tool asks for 3).
+        min_hits (int): Query cache hits a logged query needs to be included.
+        max_history (int): Most logged queries to include.
+        path (str): Output file (default: `offence_cache_path()`).
+
+    Returns:
+        dict: Counts of terms taken from titles and history, and entries written.
+    """
+    # Imported here: `retrieval.ipc_search` looks entries up in this table
+    from retrieval.ipc_search import search_ipc
+
+    load_dotenv()
+    mode = os.getenv("IPC_SEARCH_MODE", "dense")
+    path = path or offence_cache_path()
+
+    from_titles = title_terms(load_ipc_data(os.getenv("IPC_JSON_PATH")))
+    from_history = history_terms(min_hits, max_history)
+
+    entries = {}
+    for term in from_titles + from_history:
+        key = offence_key(term)
+        cited_sections, _ = parse_citations(term)
+        # Cited sections are already answered exactly without a search
+        if not key or key in entries or cited_sections:
+            continue
+        results = search_ipc(term, k=k, mode=mode, use_offence_cache=False, use_embedding_server=False)
+        entries[key] = {"query": term, "sections": [str(result["section"]) for result in results]}
+
+    table = {
+        "embedding": embedding_fingerprint(),
+        "vector_backend": os.getenv("IPC_VECTOR_BACKEND", "chroma"),
+        "mode": mode,
+        "k": k,
+        "built_at": time.time(),
+        "entries": entries,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(table, file, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+    return {"title_terms": len(from_titles), "history_terms": len(from_history), "entries": len(entries)}
+
+
+class OffenceCache:
+    """
+    In-memory offence table, reloaded when the file on disk is replaced.
+
+    Lookups return section numbers; the caller turns them into documents.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._table = None
+
+    def _current(self) -> dict | None:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with open(self.path, "r", encoding="utf-8") as file:
+                        table = json.load(file)
+                    self._table = table if _matches_configuration(table) else None
+                    self._mtime = mtime
+        return self._table
+
+    def load(self):
+        """Read the table ahead of the first lookup."""
+        self._current()
+
+    def lookup(self, query: str, k: int, mode: str) -> list[str] | None:
+        """
+        Precomputed section numbers for a query.
+
+        Args:
+            query (str): User query in natural language.
+            k (int): Number of sections requested.
+            mode (str): Search mode in effect.
+
+        Returns:
+            list[str] | None: Section numbers, best first, or None when the query is not in the table.
+        """
+        table = self._current()
+        if table is None or table["k"] != k or table["mode"] != mode:
+            return None
+
+        entry = table["entries"].get(offence_key(query))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["sections"]
+
+    def stats(self) -> dict:
+        """
+        Lookup counters and table size.
+
+        Returns:
+            dict: Hits, misses, hit rate and entries loaded.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._table["entries"]) if self._table else 0,
+        }
+
+
+_cache_lock = threading.Lock()
+_cache = None
+
+
+def get_offence_cache() -> OffenceCache | None:
+    """Return the process-wide offence table, or None when `IPC_OFFENCE_CACHE=0`."""
+    global _cache
+
+    if os.getenv("IPC_OFFENCE_CACHE", "1") == "0":
+        return None
+
+    with _cache_lock:
+        if _cache is None or _cache.path != offence_cache_path():
+            _cache = OffenceCache(offence_cache_path())
+        return _cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute IPC search results for frequent offence queries.")
+    parser.add_argument("--k", type=int, default=3, help="Results per term (default: 3, as the IPC search tool).")
+    parser.add_argument("--min-hits", type=int, default=2, help="Query cache hits a logged query needs.")
+    parser.add_argument("--max-history", type=int, default=500, help="Most logged queries to include.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = build_offence_cache(k=args.k, min_hits=args.min_hits, max_history=args.max_history)
+    print(
+        f"✅ Precomputed {counts['entries']} offence queries ({counts['title_terms']} title terms, "
+        f"{counts['history_terms']} logged queries) to '{offence_cache_path()}' in {time.perf_counter() - start:.1f}s"
+    )
@@ -0,0 +1,129 @@
+# precedent_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different spellings share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+class PrecedentCache:
+    """
+    SQLite store of raw Tavily responses keyed by normalized query, trusted sources and result count.
+
+    The same file serves as a TTL cache for live traffic and as a recording
+    for offline replay: `get` honours the TTL unless `ignore_ttl` is set.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS precedent_responses ("
+            " key TEXT PRIMARY KEY, query TEXT NOT NULL, sources TEXT NOT NULL,"
+            " response TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(query: str, sources: list[str], max_results: int) -> str:
+        """
+        Cache key for a search.
+
+        Args:
+            query (str): Tavily search query.
+            sources (list[str]): Trusted domains the search is restricted to.
+            max_results (int): Tavily result count.
+
+        Returns:
+            str: SHA-256 hex digest.
+        """
+        payload = json.dumps([normalize_query(query), sorted(sources), max_results])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, ignore_ttl: bool = False) -> dict | None:
+        """
+        Look up a stored response.
+
+        Args:
+            key (str): Key from `PrecedentCache.key`.
+            ignore_ttl (bool): Return the entry even if it has expired (replay mode).
+
+        Returns:
+            dict | None: Raw Tavily response, or None on a miss.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created FROM precedent_responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (not ignore_ttl and time.time() - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key: str, query: str, sources: list[str], response: dict):
+        """
+        Store a raw response.
+
+        Args:
+            key (str): Key from `PrecedentCache.key`.
+            query (str): Tavily search query.
+            sources (list[str]): Trusted domains the search was restricted to.
+            response (dict): Raw Tavily response.
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO precedent_responses (key, query, sources, response, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, normalize_query(query), json.dumps(sorted(sources)), json.dumps(response), time.time())
+            )
+            self._db.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Delete entries older than the TTL.
+
+        Returns:
+            int: Number of deleted entries.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM precedent_responses WHERE created < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters since the cache was opened.
+
+        Returns:
+            dict: Hits, misses and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        """Close the SQLite file."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,142 @@
+# precedent_fanout.py
+#
+# Query expansion and result merging for multi-query precedent search.
+#
+# One legal issue ("Home trespassing and theft - precedent cases in India") is
+# expanded into the original query, one query per offence it names and one per
+# IPC section it cites or that best matches an offence. The variants are searched
+# concurrently by the precedent tool and their results merged here by URL with
+# reciprocal rank fusion.
+
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+from retrieval.ipc_bm25 import reciprocal_rank_fusion, tokenize
+from retrieval.ipc_section_index import parse_citations
+
+
+# Separators between offences in an issue description
+_OFFENCE_SPLIT = re.compile(r"\s*(?:,|;|/|&|\band\b|\bor\b|\bplus\b|\s-\s|\bwith\b)\s*", re.IGNORECASE)
+# Boilerplate the agent adds around the issue itself
+_BOILERPLATE = re.compile(
+    r"\b(?:relevant\s+)?(?:precedent|precedents|case|cases|judgments?|rulings?|case\s+law)\b"
+    r"|\b(?:in|of|under)\s+india\b|\bindian\s+(?:courts?|law)\b|\b(?:ipc|indian\s+penal\s+code)\b",
+    re.IGNORECASE
+)
+# Connectives left dangling once a citation is removed ("Cheating under")
+_TRAILING_CONNECTIVE = re.compile(r"(?:\s+(?:under|of|u/s|for|in|the))+$", re.IGNORECASE)
+
+# Minimum share of an offence phrase's terms the best-matching section must contain to be used as a variant
+MIN_SECTION_COVERAGE = 0.75
+
+
+def offence_phrases(issue: str) -> list[str]:
+    """
+    Split an issue description into the offences it names.
+
+    Args:
+        issue (str): Legal issue without section citations, e.g. "Home trespassing and theft - precedent cases in India".
+
+    Returns:
+        list[str]: Offence phrases in order, e.g. `["Home trespassing", "theft"]`.
+    """
+    phrases = []
+    for part in _OFFENCE_SPLIT.split(issue):
+        phrase = _TRAILING_CONNECTIVE.sub("", " ".join(_BOILERPLATE.sub(" ", part).split())).strip(" .:-")
+        if tokenize(phrase) and phrase.lower() not in (existing.lower() for existing in phrases):
+            phrases.append(phrase)
+    return phrases
+
+
+def _matching_section(phrase: str) -> tuple[str, str] | None:
+    """Number and title of the best BM25 match for an offence phrase, when it contains enough of the phrase."""
+    try:
+        from retrieval.ipc_search import get_lexical_index
+        index = get_lexical_index()
+    except EnvironmentError:
+        return None  # No IPC_JSON_PATH: offence variants only
+
+    hits = index.bm25.search(phrase, k=1)
+    if not hits or index.bm25.coverage(phrase, hits[0][0]) < MIN_SECTION_COVERAGE:
+        return None
+    entry = index.bm25.entries[hits[0][0]]
+    return str(entry["Section"]), entry["section_title"]
+
+
+def expand_precedent_queries(issue: str, max_queries: int) -> list[str]:
+    """
+    Expand one legal issue into up to `max_queries` search queries.
+
+    The original issue always comes first, followed by alternating per-offence
+    ("<offence> judgment") and per-section ("Section <n> IPC <title> judgment")
+    phrasings.
+
+    Args:
+        issue (str): The precedent tool's query.
+        max_queries (int): Largest number of queries to return.
+
+    Returns:
+        list[str]: Distinct queries, original first.
+    """
+    queries = [issue]
+    if max_queries <= 1:
+        return queries
+
+    cited_sections, remaining = parse_citations(issue)
+    phrases = offence_phrases(remaining)
+
+    section_queries = [" ".join([f"Section {section} IPC", *phrases[:1], "judgment"]) for section in cited_sections]
+    offence_queries = []
+    for phrase in phrases:
+        offence_queries.append(f"{phrase} judgment")
+        if not cited_sections:
+            match = _matching_section(phrase)
+            if match:
+                section, title = match
+                section_queries.append(f"Section {section} IPC {title} judgment")
+
+    # Interleave so a small budget still gets both kinds of variant
+    for pair in zip(offence_queries, section_queries):
+        queries.extend(pair)
+    longer = offence_queries if len(offence_queries) > len(section_queries) else section_queries
+    queries.extend(longer[min(len(offence_queries), len(section_queries)):])
+
+    distinct = []
+    for query in queries:
+        if query.lower() not in (existing.lower() for existing in distinct):
+            distinct.append(query)
+    return distinct[:max_queries]
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a result URL for deduplication (scheme and host lowercased, no fragment or trailing slash)."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+
+def merge_results(result_lists: list[list[dict]], limit: int) -> list[dict]:
+    """
+    Deduplicate results by URL and merge their rankings with reciprocal rank fusion.
+
+    Args:
+        result_lists (list[list[dict]]): Tool results (`title`, `summary`, `link`) per query, best first.
+        limit (int): Largest number of results to return.
+
+    Returns:
+        list[dict]: Merged results; each URL keeps the entry with the longest summary.
+    """
+    best, rankings = {}, []
+    for results in result_lists:
+        ranking = []
+        for item in results:
+            if not item.get("link"):
+                continue
+            url = normalize_url(item["link"])
+            if url in ranking:
+                continue
+            ranking.append(url)
+            if url not in best or len(item.get("summary") or "") > len(best[url].get("summary") or ""):
+                best[url] = item
+        rankings.append(ranking)
+
+    return [best[url] for url in reciprocal_rank_fusion(rankings)[:limit]]
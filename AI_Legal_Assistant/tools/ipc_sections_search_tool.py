@@ -1,11 +1,8 @@
 # ipc_sections_search_tool.py
 
-import os
-
-from dotenv import load_dotenv
 from crewai.tools import tool
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+
+from retrieval.ipc_search import search_ipc
 
 
 @tool("IPC Sections Search Tool")
@@ -19,42 +16,10 @@ def search_ipc_sections(query: str) -> list[dict]:
     Returns:
         list[dict]: List of matching IPC sections with metadata and content.
     """
-    # Load environment variables
-    load_dotenv()
-
-    # Resolve vector DB path
-    persist_dir = os.getenv("PERSIST_DIRECTORY_PATH")
-    if not persist_dir:
-        raise EnvironmentError("❌ 'PERSIST_DIRECTORY_PATH' is not set in .env")
-
-    persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH")
-    collection_name = os.getenv("IPC_COLLECTION_NAME")
-
-    embedding_function = HuggingFaceEmbeddings()
-
-    # Load vectorstore
-    vector_db = Chroma(
-        collection_name=collection_name,
-        persist_directory=persist_dir_path,
-        embedding_function=embedding_function
-    )
-
     top_k = 3 # can be passed as an argument for flexibility
 
-    # Perform similarity search
-    docs = vector_db.similarity_search(query, k=top_k)
-
-    # Format results
-    return [
-        {
-            "section": doc.metadata.get("section"),
-            "section_title": doc.metadata.get("section_title"),
-            "chapter": doc.metadata.get("chapter"),
-            "chapter_title": doc.metadata.get("chapter_title"),
-            "content": doc.page_content
-        }
-        for doc in docs
-    ]
+    # BM25 / dense / hybrid search over shared, process-wide indexes (IPC_SEARCH_MODE)
+    return search_ipc(query, k=top_k)
 
 
 # Example usage of the IPC Section Search Tool - uncomment for testing the tool functionality
@@ -63,4 +28,6 @@ def search_ipc_sections(query: str) -> list[dict]:
 # for r in results:
 #     print(r)
 
-# NOTE: Retrieval is a bit slower. Can be improved by caching the vectordb and using GPU for embedding.
+# NOTE: The embedding model and vectordb are cached per process (see retrieval/ipc_store.py).
+# Run `python query_vectordb.py` to compare cold vs warm query latency and
+# `python -m benchmarks.ipc_search_modes` to compare search modes.
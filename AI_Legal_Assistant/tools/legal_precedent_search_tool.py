@@ -1,10 +1,20 @@
 # legal_precedent_search_tool.py
 
+import contextvars
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from crewai.tools import tool
+from requests import Session
+from requests.adapters import HTTPAdapter
 from tavily import TavilyClient
 
+from pipeline.hedging import current_stage_deadline, hedging_enabled, run_with_deadline
+from retrieval.precedent_cache import PrecedentCache
+from retrieval.precedent_fanout import expand_precedent_queries, merge_results
+
 load_dotenv()
 
 # 🔧 Trusted Indian legal domains — you can add more here anytime
@@ -12,39 +22,119 @@ LEGAL_SOURCES = [
     "indiankanoon.org"
 ]
 
+# live: TTL cache in front of Tavily | record: always search live and store | replay: serve stored responses only
+PRECEDENT_SEARCH_MODES = ("live", "record", "replay")
+MAX_RESULTS = 10
+
+_lock = threading.Lock()
+_client = None
+_client_key = None
+_cache = None
+_fanout_pool = None
+
+
+def _fanout_queries() -> int:
+    """Number of query variants searched per call (`PRECEDENT_FANOUT`, default 1 = the query alone)."""
+    return max(1, int(os.getenv("PRECEDENT_FANOUT", "1")))
+
+
 def _is_legal_source(url: str) -> bool:
     """Check if a URL belongs to one of the trusted legal domains."""
     return any(domain in url for domain in LEGAL_SOURCES)
 
 
-@tool("Legal Precedent Search Tool")
-def search_legal_precedents(query: str) -> list[dict]:
+def _get_client() -> TavilyClient:
+    """Reuse one Tavily client per API key, with a keep-alive connection pool sized for concurrent fan-out queries."""
+    global _client, _client_key
+
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        raise ValueError("❌ 'TAVILY_API_KEY' not found in .env file")
+
+    with _lock:
+        if _client is None or _client_key != api_key:
+            session = Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(10, _fanout_queries())))
+            _client = TavilyClient(api_key=api_key, session=session)
+            _client_key = api_key
+        return _client
+
+
+def get_precedent_cache() -> PrecedentCache:
+    """Return the process-wide precedent response cache / recording."""
+    global _cache
+
+    with _lock:
+        if _cache is None:
+            path = os.getenv("PRECEDENT_CACHE_PATH") or os.path.join(
+                os.getenv("PERSIST_DIRECTORY_PATH", "."), "precedent_cache.sqlite3"
+            )
+            _cache = PrecedentCache(path, ttl_seconds=float(os.getenv("PRECEDENT_CACHE_TTL_SECONDS", "604800")))
+            if os.getenv("PRECEDENT_SEARCH_MODE", "live") == "live":
+                _cache.purge_expired()
+        return _cache
+
+
+def fetch_precedent_response(search_query: str) -> dict:
     """
-    Use Tavily Search to find precedent legal cases for a given legal issue.
-    sample tool input: "Home trespassing and theft - precedent cases in India"
+    Run a Tavily search through the cache according to `PRECEDENT_SEARCH_MODE`.
 
     Args:
-        query (str): The structured legal issue or case summary.
+        search_query (str): Site-restricted Tavily query.
 
     Returns:
-        list[dict]: Relevant case titles, summaries, and links from trusted Indian legal sources.
+        dict: Raw Tavily response.
     """
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise ValueError("❌ 'TAVILY_API_KEY' not found in .env file")
+    mode = os.getenv("PRECEDENT_SEARCH_MODE", "live")
+    if mode not in PRECEDENT_SEARCH_MODES:
+        raise ValueError(f"❌ Unknown precedent search mode '{mode}'. Expected one of {PRECEDENT_SEARCH_MODES}.")
+
+    cache = get_precedent_cache()
+    key = PrecedentCache.key(search_query, LEGAL_SOURCES, MAX_RESULTS)
+
+    if mode != "record":
+        response = cache.get(key, ignore_ttl=mode == "replay")
+        if response is not None:
+            return response
+        if mode == "replay":
+            raise LookupError(f"❌ No recorded precedent search for query: {search_query!r}")
+
+    # Bounded by what is left of the precedent stage's deadline (PRECEDENT_SEARCH_TIMEOUT_SECONDS
+    # when the stage has none) and hedged when LEGAL_HEDGING covers `search`
+    deadline = current_stage_deadline()
+    if deadline is None:
+        timeout = float(os.getenv("PRECEDENT_SEARCH_TIMEOUT_SECONDS", "20"))
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+    response = run_with_deadline(
+        "search",
+        lambda: _get_client().search(query=search_query, max_results=MAX_RESULTS),
+        deadline=deadline,
+        hedge=hedging_enabled("search")
+    )
+    cache.put(key, search_query, LEGAL_SOURCES, response)
+    return response
+
 
-    client = TavilyClient(api_key=api_key)
+def _get_fanout_pool() -> ThreadPoolExecutor:
+    """Process-wide worker threads for concurrent query variants."""
+    global _fanout_pool
 
+    with _lock:
+        if _fanout_pool is None:
+            _fanout_pool = ThreadPoolExecutor(max_workers=_fanout_queries(), thread_name_prefix="precedent-fanout")
+        return _fanout_pool
+
+
+def _search_trusted_sources(query: str) -> list[dict]:
+    """One site-restricted search, keeping only results from the trusted legal domains."""
     # 🔍 Restrict search to only trusted legal domains
     search_query = f"site:{' OR site:'.join(LEGAL_SOURCES)} {query}"
 
-    response = client.search(
-        query=search_query,
-        max_results=10
-    )
+    # Served from the cache / recording when possible (PRECEDENT_SEARCH_MODE)
+    response = fetch_precedent_response(search_query)
 
     raw_results = response.get("results", [])
-    legal_results = [
+    return [
         {
             "title": item.get("title"),
             "summary": item.get("content"),
@@ -54,6 +144,59 @@ def search_legal_precedents(query: str) -> list[dict]:
         if _is_legal_source(item.get("url", ""))
     ]
 
+
+def search_precedent_variants(query: str) -> list[dict]:
+    """
+    Search the query and its per-offence / per-section variants concurrently and merge the results.
+
+    With `PRECEDENT_FANOUT` above 1 the issue is expanded into that many queries
+    (see `retrieval.precedent_fanout`), all sent at once over the pooled client,
+    so the call takes about as long as the slowest single search. Results are
+    deduplicated by URL and ranked by reciprocal rank fusion. A failing variant
+    is skipped; the call fails only when every query fails.
+
+    Args:
+        query (str): The structured legal issue or case summary.
+
+    Returns:
+        list[dict]: Up to `MAX_RESULTS` merged results from trusted sources.
+    """
+    queries = expand_precedent_queries(query, _fanout_queries())
+    if len(queries) == 1:
+        return _search_trusted_sources(query)
+
+    # Each variant runs in a copy of this context, so it sees the current task and its stage deadline
+    futures = [
+        _get_fanout_pool().submit(contextvars.copy_context().run, _search_trusted_sources, variant)
+        for variant in queries
+    ]
+    result_lists, errors = [], []
+    for future in futures:
+        try:
+            result_lists.append(future.result())
+        except Exception as error:
+            errors.append(error)
+
+    if not result_lists:
+        raise errors[0]
+    return merge_results(result_lists, MAX_RESULTS)
+
+
+@tool("Legal Precedent Search Tool")
+def search_legal_precedents(query: str) -> list[dict]:
+    """
+    Use Tavily Search to find precedent legal cases for a given legal issue.
+    sample tool input: "Home trespassing and theft - precedent cases in India"
+
+    Args:
+        query (str): The structured legal issue or case summary.
+
+    Returns:
+        list[dict]: Relevant case titles, summaries, and links from trusted Indian legal sources.
+    """
+    # One query, or several variants searched concurrently (PRECEDENT_FANOUT)
+    legal_results = search_precedent_variants(query)
+
     return legal_results if legal_results else [{
         "title": "No relevant legal precedents found",
         "summary": "No matching results found from trusted Indian legal sources.",